@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Сравнение движков распознавания на одних и тех же записях.
+
+Для каждого движка из ASR_BACKENDS: время загрузки модели и задержка
+распознавания каждой записи (медиана повторов), целиком и кусками
+в пуле ParallelTranscriber. Настройки движков берутся из секции asr
+в config.json.
+
+Запуск:
+    python benchmarks/bench_asr.py [файл.wav ...] [--engines google,vosk,whisper] [--repeats 3]
+        [--workers 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import speech_recognition as sr
+
+from harness import make_fixture, median
+
+from interview_core import ASR_BACKENDS, ParallelTranscriber, Transcriber, load_config, read_wav, to_audio_data
+
+
+def bench_engine(engine, options, clips, repeats, workers):
+    start = time.perf_counter()
+    try:
+        transcriber = Transcriber(engine=engine, **options)
+    except Exception as e:
+        print(f"⏭️ {engine}: недоступен ({e})")
+        return
+    print(f"🧠 {engine}: загрузка {(time.perf_counter() - start) * 1000:.0f} мс")
+    
+    print("   целиком:")
+    bench_clips(transcriber, clips, repeats)
+    if workers > 1:
+        print(f"   кусками по паузам, {workers} потока:")
+        bench_clips(ParallelTranscriber(transcriber, workers), clips, repeats)
+
+
+def bench_clips(transcriber, clips, repeats):
+    latencies = []
+    for name, audio in clips:
+        timings = []
+        text = ""
+        for _ in range(repeats):
+            start = time.perf_counter()
+            try:
+                text = transcriber.transcribe(audio)
+            except sr.UnknownValueError:
+                text = "(не распознано)"
+            except sr.RequestError as e:
+                text = f"❌ {e}"
+            timings.append(time.perf_counter() - start)
+        latencies.append(median(timings))
+        print(f"   {name:<24} {latencies[-1] * 1000:8.0f} мс  {text[:60]}")
+    print(f"   медиана {median(latencies) * 1000:.0f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="WAV записи (по умолчанию синтетические)")
+    parser.add_argument('--engines', default=",".join(ASR_BACKENDS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    
+    paths = args.paths
+    if not paths:
+        directory = tempfile.mkdtemp()
+        paths = [make_fixture(os.path.join(directory, f"fixture_{s}s.wav"), duration=s) for s in (3, 8, 30)]
+    
+    clips = []
+    for path in paths:
+        samples, rate = read_wav(path)
+        clips.append((os.path.basename(path), to_audio_data(samples, rate)))
+    
+    options = dict(load_config().get('asr', {}))
+    for key in ('engine', 'parallel_workers', 'segment_seconds', 'retries'):
+        options.pop(key, None)
+    for engine in args.engines.split(','):
+        bench_engine(engine.strip(), options, clips, args.repeats, args.workers)
+
+
+if __name__ == "__main__":
+    main()
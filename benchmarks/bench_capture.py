@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Сравнение захвата в список bytes и в кольцевой буфер.
+
+Запуск: python benchmarks/bench_capture.py [секунды записи]
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interview_core import CaptureEngine
+
+CHANNELS = 2
+RATE = 44100
+CHUNK_SIZE = 1024
+
+
+class FakeStream:
+    """Поток, отдающий заранее сгенерированные блоки как stream.read"""
+
+    def __init__(self, total_chunks):
+        rng = np.random.default_rng(0)
+        self.block = memoryview(rng.integers(-3000, 3000, CHUNK_SIZE * CHANNELS, dtype=np.int16).tobytes())
+        self.left = total_chunks
+
+    def read(self, chunk_size, exception_on_overflow=True):
+        self.left -= 1
+        return self.block.tobytes()
+
+    def close(self):
+        pass
+
+
+class FakeAudio:
+    def __init__(self, total_chunks):
+        self.total_chunks = total_chunks
+
+    def open(self, **kwargs):
+        return FakeStream(self.total_chunks)
+
+    def get_format_from_width(self, width):
+        return 8
+
+
+class FakeCallbackStream:
+    """Поток в callback-режиме: блоки приходят из отдельного потока в темпе устройства"""
+
+    def __init__(self, callback, total_chunks, speedup):
+        self.block = memoryview(np.zeros(CHUNK_SIZE * CHANNELS, dtype=np.int16).tobytes())
+        self.thread = threading.Thread(target=self.run, args=(callback, total_chunks, CHUNK_SIZE / RATE / speedup))
+        self.thread.start()
+
+    def run(self, callback, total_chunks, period):
+        next_time = time.perf_counter()
+        for _ in range(total_chunks):
+            callback(self.block.tobytes(), CHUNK_SIZE, None, 0)
+            next_time += period
+            time.sleep(max(next_time - time.perf_counter(), 0))
+
+    def is_active(self):
+        return self.thread.is_alive()
+
+    def close(self):
+        self.thread.join()
+
+
+class FakeCallbackAudio(FakeAudio):
+    def __init__(self, total_chunks, speedup):
+        super().__init__(total_chunks)
+        self.speedup = speedup
+
+    def open(self, stream_callback=None, **kwargs):
+        return FakeCallbackStream(stream_callback, self.total_chunks, self.speedup)
+
+
+def stall_test(duration, speedup=10, stall_every=20, stall=0.05):
+    """Потребитель периодически «подвисает» (как Tk); считаем, дошло ли всё аудио"""
+    total_chunks = -(-duration * RATE // CHUNK_SIZE)
+    engine = CaptureEngine(FakeCallbackAudio(total_chunks, speedup), None, CHANNELS, RATE, CHUNK_SIZE)
+    counter = [0]
+    
+    def slow_meter(chunk):
+        counter[0] += 1
+        if counter[0] % stall_every == 0:
+            time.sleep(stall)
+    
+    samples = engine.record(duration + 1, lambda: True, slow_meter)
+    print(f"callback + остановки {stall * 1000:.0f} мс каждые {stall_every} блоков (x{speedup}): "
+          f"получено {len(samples)}/{total_chunks * CHUNK_SIZE} кадров, "
+          f"переполнений {engine.overflows}, отброшено {engine.dropped_frames}")
+
+
+def capture_list(duration):
+    """Старый путь: список блоков + b''.join"""
+    stream = FakeStream(0)
+    frames = []
+    for _ in range(-(-duration * RATE // CHUNK_SIZE)):
+        frames.append(stream.read(CHUNK_SIZE, exception_on_overflow=False))
+    return b''.join(frames)
+
+
+def capture_ring(duration):
+    """Новый путь: CaptureEngine с предвыделенным буфером"""
+    engine = CaptureEngine(FakeAudio(0), None, CHANNELS, RATE, CHUNK_SIZE, callback_mode=False)
+    return engine.record(duration, lambda: True)
+
+
+def measure(name, func, duration, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(duration)
+        times.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    result = func(duration)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    size = len(result) if isinstance(result, bytes) else result.nbytes
+    print(f"{name:<14} {min(times) * 1000:8.2f} мс  пик {peak / 1e6:7.2f} МБ  данные {size / 1e6:7.2f} МБ")
+
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    print(f"🎧 Захват {duration} сек, {CHANNELS} канала, {RATE} Гц, блок {CHUNK_SIZE}")
+    measure("list + join", capture_list, duration)
+    measure("ring buffer", capture_ring, duration)
+    stall_test(duration)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Размер контекста за часовое собеседование: обрезка по числу сообщений против бюджета токенов.
+
+Прежний GUI держал последние 2 * 10 сообщений целиком и слал их JSON
+с каждым вопросом - длинные ответы раздувают запрос, и prefill
+растёт к концу собеседования. ConversationContext держит запрос в
+бюджете, старое сжимается в сводку в фоне. Сводку «пишет» медленная
+заглушка модели (--summary-seconds), чтобы было видно, что на горячий
+путь она не влияет. Время до первого токена - модель: размер запроса
+делится на скорость prefill (--prefill-tps).
+
+Запуск:
+    python benchmarks/bench_context.py [--questions 60] [--budget 2000] [--prefill-tps 400]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from harness import median
+
+from interview_core import ConversationContext, estimate_tokens
+from interview_core.context import extractive_summary
+
+WORDS = ("горутина канал мьютекс индекс транзакция изоляция шардирование репликация кэш очередь "
+         "балансировщик контейнер память указатель интерфейс сборщик мусора латентность пропускная "
+         "способность блокировка дедлок планировщик поток процесс сокет протокол").split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def session(questions, seed=0):
+    """Вопросы и ответы разной длины, как на живом собеседовании"""
+    rng = random.Random(seed)
+    for _ in range(questions):
+        question = sentence(rng, rng.randint(6, 14))[:-1] + "?"
+        answer = " ".join(sentence(rng, rng.randint(8, 16)) for _ in range(rng.randint(4, 30)))
+        yield question, answer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=60, help="вопросов за сессию (час - примерно 60)")
+    parser.add_argument('--budget', type=int, default=2000)
+    parser.add_argument('--recent', type=int, default=1200)
+    parser.add_argument('--history-length', type=int, default=10, help="max_history_length прежней обрезки")
+    parser.add_argument('--summary-seconds', type=float, default=1.0, help="сколько «модель» пишет сводку")
+    parser.add_argument('--prefill-tps', type=float, default=400, help="скорость prefill модели, токенов/с")
+    args = parser.parse_args()
+
+    def slow_summary(summary, messages):
+        time.sleep(args.summary_seconds)
+        return extractive_summary(summary, messages, 300)
+
+    context = ConversationContext(args.budget, args.recent, summarize=slow_summary)
+    history = []
+    old_sizes, new_sizes, hot_path = [], [], []
+
+    for number, (question, answer) in enumerate(session(args.questions), 1):
+        # Прежний путь
+        history.append({"role": "user", "content": question, "timestamp": "2024-01-01T00:00:00"})
+        if len(history) > args.history_length * 2:
+            history = history[-args.history_length * 2:]
+        old_sizes.append(sum(estimate_tokens(m["content"]) for m in history))
+        old_bytes = len(json.dumps(history, ensure_ascii=False).encode('utf-8'))
+
+        # Бюджет токенов
+        start = time.perf_counter()
+        context.add("user", question)
+        messages = context.messages()
+        hot_path.append(time.perf_counter() - start)
+        new_sizes.append(sum(estimate_tokens(m["content"]) for m in messages))
+        new_bytes = len(json.dumps(messages, ensure_ascii=False).encode('utf-8'))
+
+        if number in (1, 10, 20, 40, args.questions):
+            print(f"#{number:3d}  по сообщениям ~{old_sizes[-1]:5d} ток ({old_bytes // 1024} КБ), "
+                  f"бюджет ~{new_sizes[-1]:5d} ток ({new_bytes // 1024} КБ)  {context.summary_line()}")
+
+        history.append({"role": "assistant", "content": answer, "timestamp": "2024-01-01T00:00:00"})
+        context.add("assistant", answer)
+        # Между вопросами проходит время: интервьюер слушает ответ
+        time.sleep(0.05)
+
+    context.wait(args.summary_seconds * 5)
+    late_old = old_sizes[len(old_sizes) // 2:]
+    late_new = new_sizes[len(new_sizes) // 2:]
+    print(f"📏 максимум запроса: по сообщениям ~{max(old_sizes)} ток, бюджет ~{max(new_sizes)} ток")
+    print(f"⏱️ 1-й токен во второй половине (модель, {args.prefill_tps:.0f} ток/с): "
+          f"по сообщениям медиана {median(late_old) / args.prefill_tps:.2f} с, максимум {max(late_old) / args.prefill_tps:.2f} с; "
+          f"бюджет медиана {median(late_new) / args.prefill_tps:.2f} с, максимум {max(late_new) / args.prefill_tps:.2f} с")
+    print(f"🧵 горячий путь add+messages: медиана {median(hot_path) * 1e6:.0f} мкс, максимум {max(hot_path) * 1e6:.0f} мкс; "
+          f"сводок {context.summaries}, в фоне {context.summary_seconds:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Запросы через requests.* (новое соединение каждый раз) против общего HttpPool.
+
+По умолчанию - локальный сервис ответов из harness (видно число TCP
+соединений); с --url - любой внешний адрес, где заметно и TLS рукопожатие.
+
+Запуск:
+    python benchmarks/bench_http.py [--requests 20] [--url https://api.deepseek.com]
+"""
+
+import argparse
+import time
+
+import requests
+
+from harness import FakeAnswerService, median
+
+from interview_core import HttpPool
+
+
+def timed_requests(send, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            send().close()
+        except requests.RequestException as e:
+            print(f"❌ {e}")
+            return []
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench(url, count, service=None):
+    connections = service.server.connections if service else 0
+    plain = timed_requests(lambda: requests.get(url, timeout=10), count)
+    plain_connections = service.server.connections - connections if service else None
+    
+    pool = HttpPool()
+    pool.warm([url])[0].join()
+    connections = service.server.connections if service else 0
+    pooled = timed_requests(lambda: pool.get('health', url, timeout=10), count)
+    pooled_connections = service.server.connections - connections if service else None
+    pool.close()
+    
+    for name, timings, opened in (("requests.get", plain, plain_connections), ("HttpPool", pooled, pooled_connections)):
+        line = f"{name:<14} медиана {median(timings) * 1000:7.2f} мс  первый {timings[0] * 1000:7.2f} мс" if timings else f"{name:<14} -"
+        if opened is not None:
+            line += f"  новых соединений: {opened}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--url', default=None, help="внешний адрес вместо локального сервиса")
+    args = parser.parse_args()
+    
+    if args.url:
+        print(f"🌐 {args.url}, {args.requests} запросов")
+        bench(args.url, args.requests)
+        return
+    
+    with FakeAnswerService() as service:
+        print(f"🦀 {service.url}/health, {args.requests} запросов")
+        bench(f"{service.url}/health", args.requests, service)
+
+
+if __name__ == "__main__":
+    main()
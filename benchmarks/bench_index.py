@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Поиск похожих вопросов в QuestionIndex на десятках тысяч записей.
+
+Индекс наполняется синтетическими вопросами, запросы - те же вопросы
+с типичными ошибками распознавания (пропущенное, лишнее слово, другое
+окончание) и совсем новые вопросы, которые находиться не должны.
+
+Запуск:
+    python benchmarks/bench_index.py [--questions 50000] [--queries 500] [--threshold 0.7]
+"""
+
+import argparse
+import random
+import time
+
+from harness import median
+
+from interview_core import QuestionIndex
+
+LETTERS = 'абвгдежзиклмнопрстуфхцчшщыэюя'
+
+
+def distort(question, vocabulary, rng):
+    """Тот же вопрос, услышанный распознаванием чуть иначе"""
+    words = question.split()
+    kind = rng.randrange(3)
+    if kind == 0 and len(words) > 3:
+        words.pop(rng.randrange(len(words)))
+    elif kind == 1:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+    else:
+        i = rng.randrange(len(words))
+        words[i] = words[i][:-1] + rng.choice('аыеу')
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--threshold', type=float, default=0.7)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    questions = [" ".join(rng.sample(vocabulary, rng.randint(5, 10))) for _ in range(args.questions)]
+
+    index = QuestionIndex(args.threshold)
+    start = time.perf_counter()
+    for number, question in enumerate(questions):
+        index.add(question, number)
+    build = time.perf_counter() - start
+    print(f"📚 {len(index)} вопросов, добавление {build / len(index) * 1e6:.0f} мкс/вопрос")
+
+    timings, found, false_hits = [], 0, 0
+    for _ in range(args.queries):
+        number = rng.randrange(len(questions))
+        query = distort(questions[number], vocabulary, rng)
+        start = time.perf_counter()
+        best = index.best(query)
+        timings.append(time.perf_counter() - start)
+        found += bool(best) and best[2] == number
+
+        best = index.best(" ".join(rng.sample(vocabulary, 7)))
+        false_hits += best is not None
+
+    print(f"🔎 поиск: медиана {median(timings) * 1000:.2f} мс, максимум {max(timings) * 1000:.2f} мс")
+    print(f"🎯 найдено искажённых {found / args.queries:.1%}, ложных совпадений {false_hits / args.queries:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Путь ответа: Python → Rust /stream → Ollama /api/generate против прямого /api/chat.
+
+Rust сервис изображает прокси в этом же процессе: как и настоящий, он
+теряет историю диалога, собирает промпт заново и на каждый вопрос
+открывает новое соединение к Ollama. Прямой клиент шлёт историю
+сообщениями после неизменного системного промпта - фейковая Ollama
+с одним слотом KV кэша пересчитывает только новые токены. Для
+сравнения тот же чат без стабильного префикса: каждый вопрос
+пересчитывает всю историю.
+
+Вторая часть - длинная сессия с маленьким бюджетом, где контекст
+постоянно сжимается: префикс меняется только на сжатиях, и чем реже
+они (больше разрыв между max_tokens и recent_tokens), тем реже полный
+пересчёт.
+
+Запуск:
+    python benchmarks/bench_ollama_paths.py [--turns 12] [--prefill-tps 2000] [--budget 2000]
+        [--compaction-turns 30] [--compaction-budget 600]
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from harness import FakeOllamaService, median
+
+from interview_core import AnswerLoop, AsyncAnswerClient, AsyncOllamaChatClient, ConversationContext
+from interview_core.ollama_chat import SYSTEM_PROMPT
+
+QUESTIONS = [
+    "Чем горутина отличается от потока операционной системы?",
+    "Как устроен планировщик Go и что такое GOMAXPROCS?",
+    "Что такое уровни изоляции транзакций в PostgreSQL?",
+    "Когда индекс в базе данных замедляет работу?",
+    "Как бы вы спроектировали кэш с вытеснением LRU?",
+    "Чем отличается буферизованный канал от небуферизованного?",
+]
+
+
+class RustProxyHandler(BaseHTTPRequestHandler):
+    """Как src/main.rs: /stream без истории, новый клиент к Ollama на запрос"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        question = json.loads(self.rfile.read(length)).get('question', '')
+        payload = {"model": "fake", "prompt": f"{SYSTEM_PROMPT}\n\nВопрос: {question}", "stream": True}
+        upstream = requests.post(f"{self.server.ollama_url}/generate", json=payload, stream=True)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        parts = []
+        for line in upstream.iter_lines():
+            if not line:
+                continue
+            item = json.loads(line)
+            if item.get('response'):
+                parts.append(item['response'])
+                self.write_event({"type": "word", "content": item['response'], "done": False})
+            if item.get('done'):
+                break
+        upstream.close()
+        self.write_event({"type": "done", "content": "".join(parts), "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def write_event(self, data):
+        event = f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+        self.wfile.flush()
+
+
+def run_session(answers, turns, budget, before_turn=None, context_enabled=True, recent_share=0.5):
+    """Диалог из turns вопросов с контекстом в бюджете: времена до первого токена"""
+    context = ConversationContext(budget, int(budget * recent_share))
+    first_tokens = []
+    for turn in range(turns):
+        if before_turn:
+            before_turn(turn)
+        question = QUESTIONS[turn % len(QUESTIONS)]
+        context.add("user", question)
+        stream = answers.submit(question, context.messages(), context_enabled)
+        answer = ""
+        for event_type, content in stream.events():
+            if event_type == 'done':
+                answer = content
+            elif event_type == 'error':
+                raise Exception(content)
+        first_tokens.append(stream.first_token_at - stream.started_at)
+        context.add("assistant", answer)
+        # Сводка без модели готова почти сразу; так сжатие не зависит от таймингов
+        context.wait(5)
+    run_session.summaries = context.summaries
+    return first_tokens
+
+
+def report(name, first_tokens, extra=""):
+    print(f"{name:44s} 1-й токен: медиана {median(first_tokens) * 1000:6.0f} мс, "
+          f"первый вопрос {first_tokens[0] * 1000:6.0f} мс, последний {first_tokens[-1] * 1000:6.0f} мс{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=12)
+    parser.add_argument('--prefill-tps', type=float, default=2000, help="скорость prefill модели, токенов/с")
+    parser.add_argument('--budget', type=int, default=2000, help="бюджет контекста, токенов")
+    parser.add_argument('--compaction-turns', type=int, default=30)
+    parser.add_argument('--compaction-budget', type=int, default=600)
+    args = parser.parse_args()
+
+    with FakeOllamaService(prefill_tps=args.prefill_tps) as ollama:
+        proxy = ThreadingHTTPServer(('127.0.0.1', 0), RustProxyHandler)
+        proxy.daemon_threads = True
+        proxy.ollama_url = ollama.base_url
+        threading.Thread(target=proxy.serve_forever, daemon=True).start()
+        host, port = proxy.server_address
+
+        answers = AnswerLoop(AsyncAnswerClient(f"http://{host}:{port}"))
+        connections = ollama.server.connections
+        report("Rust /stream → /api/generate", run_session(answers, args.turns, args.budget),
+               f", соединений к Ollama {ollama.server.connections - connections}, история теряется")
+        answers.close()
+        proxy.shutdown()
+
+        client = AsyncOllamaChatClient("fake", ollama.base_url)
+        answers = AnswerLoop(client)
+        report("прямой /api/chat без истории", run_session(answers, args.turns, args.budget, context_enabled=False),
+               ", тот же промпт, что у Rust - разница только в лишнем звене")
+
+        connections = ollama.server.connections
+        evaluated = []
+        first_tokens = run_session(
+            answers, args.turns, args.budget,
+            lambda turn: evaluated.append(client.last_stats.get('prompt_tokens', 0)) if turn else None
+        )
+        report("прямой /api/chat", first_tokens,
+               f", соединений {ollama.server.connections - connections}, пересчёт промпта медиана {median(evaluated):.0f} ток")
+
+        def unstable_prefix(turn):
+            client.system_prompt = f"{SYSTEM_PROMPT} Вопрос №{turn + 1}."
+            if turn:
+                evaluated.append(client.last_stats.get('prompt_tokens', 0))
+
+        evaluated = []
+        first_tokens = run_session(answers, args.turns, args.budget, unstable_prefix)
+        report("/api/chat без стабильного префикса", first_tokens,
+               f", пересчёт промпта медиана {median(evaluated):.0f} ток")
+
+        print(f"\n🗜️ сжатие контекста: {args.compaction_turns} вопросов, бюджет {args.compaction_budget} ток")
+        for name, share, prompt in (
+            ("стабильный префикс, recent 50%", 0.5, None),
+            ("стабильный префикс, recent 80% - без запаса", 0.8, None),
+            ("без стабильного префикса", 0.5, "unstable"),
+        ):
+            def before_turn(turn, prompt=prompt):
+                if prompt:
+                    client.system_prompt = f"{SYSTEM_PROMPT} Вопрос №{turn + 1}."
+                if turn:
+                    evaluated.append(client.last_stats.get('prompt_tokens', 0))
+
+            client.system_prompt = SYSTEM_PROMPT
+            evaluated = []
+            first_tokens = run_session(answers, args.compaction_turns, args.compaction_budget, before_turn,
+                                       recent_share=share)
+            report(name, first_tokens,
+                   f", пересчёт промпта медиана {median(evaluated):.0f} ток, "
+                   f"в среднем {sum(evaluated) / len(evaluated):.0f} ток, сжатий {run_session.summaries}")
+        answers.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Задержки по этапам без аудио-оборудования: запись проигрывается через
+ReplayAudio тем же путём захвата, что и BlackHole.
+
+Этапы: конец речи → фраза вырезана → транскрипт → первый токен → ответ готов.
+
+Запуск:
+    python benchmarks/bench_pipeline.py [файл.wav ...] [--speed 1] [--asr fixed|google|vosk|whisper]
+        [--answers fake|URL] [--streaming] [--speculate] [--asr-delay 0.3] [--wps 3]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from harness import FakeAnswerService, FixedTranscriber, make_fixture, median
+
+from interview_core import (
+    ASR_BACKENDS,
+    RUST_API_URL,
+    AnswerLoop,
+    AsyncAnswerClient,
+    CaptureEngine,
+    ReplayAudio,
+    SpeculativeDispatcher,
+    StreamingTranscriber,
+    VoiceActivityDetector,
+    create_transcriber,
+    find_device,
+    load_config,
+    to_audio_data,
+)
+
+
+def run_pipeline(paths, transcriber, answers, speed=1.0, streaming=False, speculate=False):
+    """Прогоняет записи через захват, VAD, распознавание и ответ; возвращает замеры"""
+    audio = ReplayAudio(paths, speed=speed)
+    engine = CaptureEngine(audio, find_device(audio, 'blackhole'))
+    vad = VoiceActivityDetector(engine.rate)
+    results = []
+    on_chunk = on_cut = None
+    utterances = {}
+    speculation = SpeculativeDispatcher(answers) if speculate else None
+    
+    if streaming or speculate:
+        streaming = StreamingTranscriber(
+            transcriber, engine.rate, engine.channels, vad.max_segment_s + 5,
+            on_partial=speculation.on_partial if speculation else None
+        )
+        streaming.start()
+        
+        # Та же связка с детектором речи, что и в авто-режиме GUI
+        def on_chunk(chunk):
+            streaming.feed(chunk)
+            current = streaming.current
+            if vad.segment_start is None:
+                if current:
+                    streaming.cancel()
+                    if speculation:
+                        speculation.reset()
+            elif current is None or current.start != vad.segment_start:
+                streaming.begin(vad.segment_start)
+            else:
+                streaming.mark_pause(vad.silence_run >= vad.hangover_frames // 3)
+        
+        def on_cut(segment):
+            utterance = streaming.end(engine.frame_at(segment.end_time))
+            if utterance and utterance.start == engine.frame_at(segment.start_time):
+                utterances[segment.start_time] = utterance
+    
+    def on_segment(segment):
+        cut = time.time()
+        # Момент, когда конец фразы «прозвучал» на устройстве
+        speech_end = engine.started_at + (segment.end_time - engine.started_at) / (speed or float('inf'))
+        result = {"cut": cut - speech_end if speed else 0.0}
+        
+        start = time.time()
+        utterance = utterances.pop(segment.start_time, None)
+        try:
+            if utterance:
+                text = utterance.result()
+            else:
+                text = transcriber.transcribe(to_audio_data(segment.samples, segment.rate))
+        except Exception as e:
+            result["error"] = f"распознавание: {e}"
+            results.append(result)
+            return
+        result["transcript"] = time.time() - start
+        
+        start = time.time()
+        try:
+            stream = speculation.resolve(text) if speculation else None
+            result["speculative"] = stream is not None
+            for event_type, content in (stream or answers.submit(text)).events():
+                if event_type == 'word' and "first_token" not in result:
+                    result["first_token"] = time.time() - start
+                elif event_type == 'error':
+                    result["error"] = f"ответ: {content}"
+            result["done"] = time.time() - start
+        except Exception as e:
+            result["error"] = f"ответ: {e}"
+        results.append(result)
+    
+    worker = engine.listen(lambda: True, on_segment, vad, on_chunk, on_cut)
+    worker.join()
+    if streaming:
+        streaming.stop()
+    audio.terminate()
+    if speculation:
+        print(f"⚡ {speculation.summary()}")
+    return results
+
+
+def report(results):
+    print(f"{'#':>3} {'вырезка':>9} {'транскрипт':>11} {'1-й токен':>10} {'ответ':>9}")
+    for i, result in enumerate(results, 1):
+        cells = [f"{result[key] * 1000:8.0f}мс" if key in result else f"{'-':>10}"
+                 for key in ("cut", "transcript", "first_token", "done")]
+        mark = "  ⚡" if result.get("speculative") else ""
+        print(f"{i:>3} " + " ".join(cells) + mark + (f"  ❌ {result['error']}" if "error" in result else ""))
+    
+    print("медиана " + " ".join(
+        f"{key}={median([r[key] for r in results if key in r]) * 1000:.0f}мс"
+        for key in ("cut", "transcript", "first_token", "done")
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="WAV записи (по умолчанию синтетические)")
+    parser.add_argument('--speed', type=float, default=1.0, help="скорость проигрывания, 0 - без пауз")
+    parser.add_argument('--asr', default='fixed', choices=['fixed'] + list(ASR_BACKENDS))
+    parser.add_argument('--asr-delay', type=float, default=0.0, help="задержка распознавания для --asr fixed, сек")
+    parser.add_argument('--wps', type=float, default=None, help="для --asr fixed: слов в секунду в гипотезах по ходу речи")
+    parser.add_argument('--streaming', action='store_true', help="потоковое распознавание по ходу речи")
+    parser.add_argument('--speculate', action='store_true', help="ранний запрос ответа по устоявшемуся тексту")
+    parser.add_argument('--answers', default='fake', help="'fake' или URL Rust сервиса")
+    args = parser.parse_args()
+    
+    paths = args.paths
+    if not paths:
+        directory = tempfile.mkdtemp()
+        paths = [
+            make_fixture(os.path.join(directory, f"question_{i}.wav"), duration=4, speech_spans=[(0.5, 3.0)])
+            for i in range(3)
+        ]
+    
+    if args.asr == 'fixed':
+        transcriber = FixedTranscriber(delay=args.asr_delay, words_per_second=args.wps)
+    else:
+        config = load_config()
+        config['asr'] = dict(config.get('asr', {}), engine=args.asr)
+        transcriber = create_transcriber(config, on_warning=print)
+    
+    if args.answers == 'fake':
+        with FakeAnswerService() as service:
+            answers = AnswerLoop(AsyncAnswerClient(service.url))
+            results = run_pipeline(paths, transcriber, answers, args.speed, args.streaming, args.speculate)
+    else:
+        answers = AnswerLoop(AsyncAnswerClient(args.answers or RUST_API_URL))
+        results = run_pipeline(paths, transcriber, answers, args.speed, args.streaming, args.speculate)
+    
+    mode = "потоковое" if args.streaming or args.speculate else "по фразе"
+    if args.speculate:
+        mode += ", ранний ответ"
+    print(f"🎧 {len(paths)} записей, скорость x{args.speed or '∞'}, ASR: {args.asr} ({mode}), ответы: {args.answers}")
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Размер и время подготовки аудио для распознавания: 44.1 кГц стерео против 16 кГц моно.
+
+Запуск: python benchmarks/bench_preprocess.py [файл.wav ...]
+Без аргументов создаётся синтетическая 30-секундная запись.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import speech_recognition as sr
+
+from harness import make_fixture
+
+from interview_core import read_wav, to_audio_data
+
+UPLINK_MBPS = 10
+
+
+def timed(func, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def bench(path):
+    samples, rate = read_wav(path)
+    print(f"\n🎧 {os.path.basename(path)}: {len(samples) / rate:.1f} сек, {samples.shape[1]} кан., {rate} Гц")
+    
+    def old_path():
+        with sr.AudioFile(path) as source:
+            return sr.Recognizer().record(source)
+    
+    for name, build in (
+        ("исходный", old_path),
+        ("16 кГц моно", lambda: to_audio_data(samples, rate)),
+    ):
+        audio, prepare_time = timed(build)
+        flac, encode_time = timed(audio.get_flac_data)
+        print(f"{name:<12} подготовка {prepare_time * 1000:7.1f} мс  "
+              f"FLAC {encode_time * 1000:7.1f} мс  {len(flac) / 1024:8.1f} КБ  "
+              f"PCM {len(audio.frame_data) / 1024:8.1f} КБ  "
+              f"отправка ~{len(flac) * 8 / UPLINK_MBPS / 1000:6.0f} мс при {UPLINK_MBPS} Мбит/с")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    if not paths:
+        fixture = os.path.join(tempfile.mkdtemp(), "fixture_30s.wav")
+        make_fixture(fixture)
+        paths = [fixture]
+    
+    for path in paths:
+        bench(path)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Разбор SSE потока ответа: sseclient + json.loads против SSEParser.
+
+Микро-замер гоняет готовый поток событий в формате Rust сервиса (одно
+событие на чтение, как при живой генерации, и весь поток разом, как у
+отставшего читателя). Живой замер читает FakeAnswerService с заданной
+скоростью токенов и меряет процессорное время читающего потока.
+
+Запуск:
+    python benchmarks/bench_sse.py [--tokens 5000] [--rate 100]
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import sseclient
+
+from harness import FakeAnswerService
+
+from interview_core import AnswerClient, SSEParser, decode_event
+
+
+def make_stream(count):
+    """Байты событий, как их пишет serde_json в Rust сервисе"""
+    words = ["Горутина", " - ", "лёгкий", " поток", " исполнения,", " которым", " управляет", " runtime", " Go."]
+    events = [
+        {"type": "word", "content": words[i % len(words)], "done": False} for i in range(count)
+    ] + [{"type": "done", "content": "".join(words), "done": True}]
+    return [f"data: {json.dumps(e, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8') for e in events]
+
+
+def with_sseclient(chunks):
+    tokens = 0
+    for event in sseclient.SSEClient(iter(chunks)).events():
+        data = json.loads(event.data)
+        tokens += data['type'] == 'word'
+    return tokens
+
+
+def with_parser(chunks):
+    parser = SSEParser()
+    tokens = 0
+    for chunk in chunks:
+        for payload in parser.feed(chunk):
+            tokens += decode_event(payload)[0] == 'word'
+    return tokens
+
+
+def timed(function, chunks, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def micro(count):
+    events = make_stream(count)
+    whole = b"".join(events)
+    # requests отдаёт ответ итератору sseclient кусками по 128 байт
+    by_128 = [chunk[i:i + 128] for chunk in events for i in range(0, len(chunk), 128)]
+    cases = (
+        ("по событию", by_128, events),
+        ("всё разом", [whole[i:i + 128] for i in range(0, len(whole), 128)], [whole]),
+    )
+    print(f"📦 {count} токенов, {len(whole) // 1024} КБ")
+    for name, old_chunks, new_chunks in cases:
+        old = timed(with_sseclient, old_chunks)
+        new = timed(with_parser, new_chunks)
+        print(f"   {name:<11} sseclient {old / count * 1e6:6.2f} мкс/токен   "
+              f"SSEParser {new / count * 1e6:6.2f} мкс/токен   x{old / new:.1f}")
+
+
+def live(count, rate):
+    """Процессорное время читающего потока на токен при живой генерации"""
+    with FakeAnswerService(token_count=count, token_interval=1 / rate, first_token_delay=0) as service:
+        client = AnswerClient(service.url)
+
+        def old_path():
+            response = client.post_stream("вопрос")
+            try:
+                for event in sseclient.SSEClient(response).events():
+                    data = json.loads(event.data)
+                    if data['type'] == 'done':
+                        return
+            finally:
+                response.close()
+
+        def new_path():
+            for event_type, _ in client.stream("вопрос"):
+                pass
+
+        print(f"🌊 живой поток: {count} токенов, {rate} токенов/с")
+        for name, run in (("sseclient", old_path), ("SSEParser", new_path)):
+            result = {}
+
+            def worker():
+                start = time.thread_time()
+                run()
+                result['cpu'] = time.thread_time() - start
+
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            print(f"   {name:<10} процессор читающего потока {result['cpu'] / count * 1e6:6.1f} мкс/токен")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=100, help="токенов в секунду для живого замера")
+    parser.add_argument('--live-tokens', type=int, default=300)
+    args = parser.parse_args()
+
+    micro(args.tokens)
+    live(args.live_tokens, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Несколько одновременных потоковых ответов: поток на запрос (AnswerClient)
+против одного цикла asyncio (AnswerLoop).
+
+Меряются время до первого токена и до конца всех ответов и число новых
+соединений, а также отмена: за сколько сервис замечает закрытое
+соединение.
+
+Запуск:
+    python benchmarks/bench_streams.py [--streams 4] [--rounds 3] [--tokens 50]
+"""
+
+import argparse
+import threading
+import time
+
+from harness import FakeAnswerService, median
+
+from interview_core import AnswerClient, AnswerLoop, AsyncAnswerClient
+
+
+def with_threads(client, count):
+    """Поток на каждый запрос, как раньше в GUI"""
+    first_tokens = []
+
+    def run(start):
+        for event_type, _ in client.stream("вопрос"):
+            if event_type == 'word' and len(first_tokens) < count:
+                first_tokens.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(start,)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, first_tokens
+
+
+def with_loop(answers, count):
+    start = time.perf_counter()
+    streams = [answers.submit("вопрос") for _ in range(count)]
+    for stream in streams:
+        stream.wait()
+    first_tokens = [stream.first_token_at - stream.started_at for stream in streams if stream.first_token_at]
+    return time.perf_counter() - start, first_tokens
+
+
+def cancel_latency(service, submit_and_cancel):
+    """Сколько проходит от отмены до того, как сервис видит разрыв"""
+    cancelled = service.server.cancelled
+    start = submit_and_cancel()
+    while service.server.cancelled == cancelled:
+        if time.perf_counter() - start > 5:
+            return float('nan')
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--tokens', type=int, default=50)
+    args = parser.parse_args()
+
+    with FakeAnswerService(token_count=args.tokens) as service:
+        client = AnswerClient(service.url)
+        answers = AnswerLoop(AsyncAnswerClient(service.url), warm=False)
+
+        for name, run in (("потоки", lambda: with_threads(client, args.streams)),
+                          ("AnswerLoop", lambda: with_loop(answers, args.streams))):
+            connections = service.server.connections
+            totals, firsts = [], []
+            for _ in range(args.rounds):
+                total, first_tokens = run()
+                totals.append(total)
+                firsts.extend(first_tokens)
+            print(f"{name:<11} ответов {args.streams}: все готовы {median(totals) * 1000:6.0f} мс, "
+                  f"1-й токен {median(firsts) * 1000:5.0f} мс, "
+                  f"новых соединений {service.server.connections - connections}")
+
+        def cancel_thread():
+            events = client.stream("вопрос")
+            next(events)
+            start = time.perf_counter()
+            events.close()
+            return start
+
+        def cancel_loop():
+            stream = answers.submit("вопрос")
+            events = stream.events()
+            next(events)
+            start = time.perf_counter()
+            events.close()
+            return start
+
+        for name, cancel in (("потоки", cancel_thread), ("AnswerLoop", cancel_loop)):
+            latency = median([cancel_latency(service, cancel) for _ in range(args.rounds)])
+            print(f"{name:<11} отмена замечена сервисом через {latency * 1000:.1f} мс")
+        answers.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Общие средства бенчмарков: синтетические записи и локальный сервис ответов."""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interview_core import write_wav
+
+
+def make_fixture(path, duration=30, rate=44100, channels=2, speech_spans=None):
+    """Синтетическая «речь»: гармоники с огибающей слогов и шумом.
+
+    speech_spans - список интервалов (начало, конец) в секундах, вне их тишина
+    с фоновым шумом; по умолчанию речь идёт всю запись.
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration * rate)) / rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 3 * t), 0, None)
+    if speech_spans is not None:
+        mask = np.zeros(len(t))
+        for start, end in speech_spans:
+            mask[int(start * rate):int(end * rate)] = 1
+        envelope = envelope * mask
+    signal = 4000 * voice * envelope + rng.normal(0, 200, len(t))
+    samples = np.clip(signal, -32768, 32767).astype(np.int16)
+    write_wav(path, np.repeat(samples[:, None], channels, axis=1), channels, rate)
+    return path
+
+
+class FakeAnswerHandler(BaseHTTPRequestHandler):
+    """Имитация Rust сервиса: /health, /ask и SSE /stream"""
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят отдельными записями: без этого keep-alive упирается в delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json({"status": "ok", "service": "fake-answers"})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        # Тело запроса читается целиком, чтобы соединение осталось пригодным для keep-alive
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        tokens = [f"слово{i} " for i in range(server.token_count)]
+        
+        if self.path == '/ask':
+            time.sleep(server.first_token_delay + server.token_interval * len(tokens))
+            self.send_json({"type": "complete", "content": "".join(tokens), "done": True})
+            return
+        if self.path != '/stream':
+            self.send_error(404)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        # Как axum: chunked, соединение остаётся открытым для следующего запроса
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        
+        try:
+            time.sleep(server.first_token_delay)
+            for token in tokens:
+                self.write_event({"type": "word", "content": token, "done": False})
+                time.sleep(server.token_interval)
+            self.write_event({"type": "done", "content": "".join(tokens).strip(), "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент отменил запрос
+            server.cancelled += 1
+            self.close_connection = True
+
+    def write_event(self, data):
+        # Компактный JSON, как serde_json::to_string в Rust сервисе
+        event = f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+        self.wfile.flush()
+
+
+class FakeAnswerService:
+    """Локальный сервис ответов в фоне с настраиваемой скоростью токенов"""
+
+    def __init__(self, token_count=50, token_interval=0.01, first_token_delay=0.2, port=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), FakeAnswerHandler)
+        self.server.daemon_threads = True
+        self.server.token_count = token_count
+        self.server.token_interval = token_interval
+        self.server.first_token_delay = first_token_delay
+        self.server.cancelled = 0
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Имитация Ollama: потоковые /api/generate и /api/chat (NDJSON).
+
+    Prefill моделируется по KV кэшу с одним слотом: общий префикс с
+    прошлым промптом считается бесплатно, остальное - prefill_tps
+    токенов в секунду (~3.5 символа на токен).
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if self.path == '/api/chat':
+            prompt = "".join(f"<{m['role']}>{m['content']}" for m in request.get('messages', []))
+        elif self.path == '/api/generate':
+            prompt = request.get('prompt', '')
+        else:
+            self.send_error(404)
+            return
+
+        server = self.server
+        with server.lock:
+            shared = len(os.path.commonprefix([server.cached_prompt, prompt]))
+        evaluated = max(int((len(prompt) - shared) / 3.5), 1)
+        prefill = evaluated / server.prefill_tps
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        tokens = [f"слово{i} " for i in range(server.token_count)]
+        # Сгенерированное тоже остаётся в KV кэше
+        answer = "".join(tokens)
+        with server.lock:
+            server.cached_prompt = prompt + (f"<assistant>{answer}" if self.path == '/api/chat' else answer)
+        try:
+            time.sleep(prefill)
+            for token in tokens:
+                if self.path == '/api/chat':
+                    self.write_line({"message": {"role": "assistant", "content": token}, "done": False})
+                else:
+                    self.write_line({"response": token, "done": False})
+                time.sleep(server.token_interval)
+            final = {"done": True, "prompt_eval_count": evaluated, "prompt_eval_duration": int(prefill * 1e9),
+                     "eval_count": server.token_count}
+            final.update({"message": {"role": "assistant", "content": ""}} if self.path == '/api/chat' else {"response": ""})
+            self.write_line(final)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def write_line(self, data):
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+
+class FakeOllamaService(FakeAnswerService):
+    """Локальная Ollama в фоне: base_url - адрес с /api"""
+
+    def __init__(self, token_count=30, token_interval=0.01, prefill_tps=400, port=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), FakeOllamaHandler)
+        self.server.daemon_threads = True
+        self.server.token_count = token_count
+        self.server.token_interval = token_interval
+        self.server.prefill_tps = prefill_tps
+        self.server.cached_prompt = ""
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"{self.url}/api"
+
+
+class FixedTranscriber:
+    """Распознавание-заглушка: всегда возвращает заданный текст.
+
+    С words_per_second отдаёт только столько первых слов, сколько
+    «успело прозвучать» за длину записи - как гипотезы по ходу речи.
+    """
+
+    engine = 'fixed'
+
+    def __init__(self, text="Расскажите, что такое горутина в Go и чем она отличается от потока?",
+                 delay=0.0, words_per_second=None):
+        self.text = text
+        self.delay = delay
+        self.words_per_second = words_per_second
+
+    def transcribe(self, audio):
+        time.sleep(self.delay)
+        if not self.words_per_second:
+            return self.text
+        duration = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        words = self.text.split()
+        return " ".join(words[:max(int(duration * self.words_per_second), 1)])
+
+
+def median(values):
+    return float(np.median(values)) if values else float('nan')
@@ -5,13 +5,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import time
-import requests
-import json
 import speech_recognition as sr
-import pyaudio
-import wave
-import numpy as np
-import sseclient
 from datetime import datetime
 import sys
 import os
@@ -19,6 +13,34 @@ import subprocess
 import tempfile
 import base64
 
+from interview_core import (
+    AnswerClient,
+    AnswerLoop,
+    AnswerStream,
+    AsyncAnswerClient,
+    CaptureEngine,
+    DualSourceListener,
+    PrerollListener,
+    StreamingTranscriber,
+    VoiceActivityDetector,
+    archive_capture,
+    configure_pool,
+    create_answer_cache,
+    create_chat_client,
+    create_context,
+    create_dispatcher,
+    create_transcriber,
+    create_warmer,
+    find_device,
+    load_config,
+    open_audio,
+    rms_volume,
+    service_url,
+    shared_pool,
+    summary_prompt,
+    to_audio_data,
+)
+
 class InterviewAssistantGUI:
     def __init__(self):
         self.root = tk.Tk()
@@ -26,8 +48,33 @@ class InterviewAssistantGUI:
         self.root.geometry("900x700")
         self.root.configure(bg='#2b2b2b')
         
-        self.rust_api_url = "http://127.0.0.1:3030"
+        self.config = load_config()
+        self.rust_api_url = service_url(self.config)
+        self.answer_client = AnswerClient(self.rust_api_url)
+        # Политики пула - до создания клиентов: таймауты они берут из него
+        pool = configure_pool(self.config)
+        # Прямой путь к Ollama /api/chat без Rust сервиса посередине
+        chat_client = create_chat_client(self.config)
+        self.answer_provider = 'ollama' if chat_client else 'rust'
+        self.service_name = "Ollama" if chat_client else "Rust Service"
+        # Историю в запрос передаёт только прямой путь: Rust сервис принимает один вопрос
+        self.sends_history = chat_client is not None
+        if self.config.get('http', {}).get('warm_on_start', True):
+            pool.warm([chat_client.base_url if chat_client else self.rust_api_url])
+        self.answers = AnswerLoop(chat_client or AsyncAnswerClient(self.rust_api_url))
+        self.current_answer = None
+        self.answer_cache = create_answer_cache(self.config)
+        self.warmer = None
+        # Rust сервис отвечает моделью Ollama - она входит в ключ кэша
+        self.answer_model = self.config.get('ollama', {}).get('model', 'deepseek-coder-v2')
+        self.archive_dir = self.config.get('speech', {}).get('archive_dir', '')
+        self.preroll_seconds = self.config.get('speech', {}).get('preroll_seconds', 0)
+        self.preroll_listener = None
+        self.dual_source = self.config.get('speech', {}).get('dual_source', False)
+        self.streaming_enabled = self.config.get('speech', {}).get('streaming', False)
+        self.speculation = create_dispatcher(self.config, self.answers) if self.streaming_enabled else None
         self.recording = False
+        self.auto_listening = False
         self.generating = False
         self.blackhole_device = None
         
@@ -38,8 +85,7 @@ class InterviewAssistantGUI:
         self.end_x = None
         self.end_y = None
         
-        self.conversation_history = []
-        self.max_history_length = 10
+        self.context = create_context(self.config, summarize=self.summarize_context)
         self.context_enabled = True
         
         self.auto_scroll = True
@@ -55,20 +101,22 @@ class InterviewAssistantGUI:
     def setup_audio(self):
         """Настройка аудио системы"""
         try:
-            self.recognizer = sr.Recognizer()
-            self.audio = pyaudio.PyAudio()
+            # Лог ещё не создан - предупреждения выводятся из главного цикла Tk
+            self.transcriber = create_transcriber(
+                self.config, on_warning=lambda message: self.root.after(0, self.log, message)
+            )
+            self.audio = open_audio(self.config)
             self.find_blackhole_device()
+            self.start_preroll_listener()
         except Exception as e:
             messagebox.showerror("Ошибка аудио", f"Не удалось инициализировать аудио: {e}")
             sys.exit(1)
 
     def find_blackhole_device(self):
         """Поиск BlackHole устройства"""
-        for i in range(self.audio.get_device_count()):
-            device_info = self.audio.get_device_info_by_index(i)
-            if 'blackhole' in device_info['name'].lower():
-                self.blackhole_device = i
-                return
+        self.blackhole_device = find_device(self.audio, 'blackhole')
+        if self.blackhole_device is not None:
+            return
         
         messagebox.showwarning(
             "BlackHole не найден",
@@ -80,6 +128,15 @@ class InterviewAssistantGUI:
             "4. Включите Built-in Output + BlackHole 2ch"
         )
 
+    def start_preroll_listener(self):
+        """Держит BlackHole открытым и хранит последние секунды звука"""
+        if self.blackhole_device is None or not self.preroll_seconds:
+            return
+        
+        engine = CaptureEngine(self.audio, self.blackhole_device)
+        self.preroll_listener = PrerollListener(engine, self.preroll_seconds)
+        self.preroll_listener.start()
+
     def create_interface(self):
         """Создание графического интерфейса"""
         style = ttk.Style()
@@ -102,7 +159,7 @@ class InterviewAssistantGUI:
         
         self.rust_status = tk.Label(
             self.status_frame,
-            text="🔗 Rust Service: Проверка...",
+            text=f"🔗 {self.service_name}: Проверка...",
             font=('Arial', 10),
             fg='#ffaa00',
             bg='#2b2b2b'
@@ -143,6 +200,19 @@ class InterviewAssistantGUI:
         )
         self.record_button.pack(side='left', padx=5)
         
+        self.auto_listen_button = tk.Button(
+            control_frame,
+            text="🎙️ Авто: ВЫКЛ",
+            font=('Arial', 10, 'bold'),
+            bg='#607D8B',
+            fg='white',
+            activebackground='#546E7A',
+            command=self.toggle_auto_listen,
+            height=2,
+            width=12
+        )
+        self.auto_listen_button.pack(side='left', padx=2)
+        
         self.stop_generation_button = tk.Button(
             control_frame,
             text="⏹️ Стоп генерация",
@@ -425,10 +495,10 @@ class InterviewAssistantGUI:
         )
         duration_entry.pack(side='left')
         
-        self.history_length_var = tk.StringVar(value="10")
+        self.history_length_var = tk.StringVar(value=str(self.context.max_tokens))
         tk.Label(
             settings_frame,
-            text="Длина истории:",
+            text="Контекст (токенов):",
             font=('Arial', 10),
             fg='#ffffff',
             bg='#2b2b2b'
@@ -437,7 +507,7 @@ class InterviewAssistantGUI:
         history_entry = tk.Entry(
             settings_frame,
             textvariable=self.history_length_var,
-            width=3,
+            width=5,
             font=('Arial', 10)
         )
         history_entry.pack(side='left')
@@ -447,16 +517,24 @@ class InterviewAssistantGUI:
     def check_services(self):
         """Проверка доступности сервисов"""
         try:
-            response = requests.get(f"{self.rust_api_url}/health", timeout=5)
-            if response.status_code == 200:
-                self.rust_status.config(text="🔗 Rust Service: ✅ Работает", fg='#4CAF50')
+            if self.answer_provider == 'ollama':
+                response = shared_pool().get('health', f"{self.answers.client.base_url}/tags")
+                if response.status_code != 200:
+                    raise Exception(f"HTTP {response.status_code}")
             else:
-                raise Exception(f"HTTP {response.status_code}")
+                self.answer_client.health()
+            self.rust_status.config(text=f"🔗 {self.service_name}: ✅ Работает", fg='#4CAF50')
+            self.start_model_warmup()
         except Exception as e:
-            self.rust_status.config(text="🔗 Rust Service: ❌ Недоступен", fg='#f44336')
-            self.log("❌ Rust сервис недоступен. Запустите: cargo run")
+            self.rust_status.config(text=f"🔗 {self.service_name}: ❌ Недоступен", fg='#f44336')
+            if self.answer_provider == 'ollama':
+                self.log("❌ Ollama недоступен. Запустите: ollama serve")
+            else:
+                self.log("❌ Rust сервис недоступен. Запустите: cargo run")
         
-        if self.blackhole_device is not None:
+        if self.preroll_listener:
+            self.audio_status.config(text=f"🎤 BlackHole: ✅ Слушаю (запас {self.preroll_seconds} сек)", fg='#4CAF50')
+        elif self.blackhole_device is not None:
             self.audio_status.config(text="🎤 BlackHole: ✅ Найден", fg='#4CAF50')
         else:
             self.audio_status.config(text="🎤 BlackHole: ❌ Не найден", fg='#f44336')
@@ -465,6 +543,29 @@ class InterviewAssistantGUI:
         
         self.update_send_button_state()
 
+    def start_model_warmup(self):
+        """Загружает модель заранее: статус показывает готовность модели, а не только порта"""
+        self.warmer = create_warmer(self.config)
+        if self.warmer is None:
+            return
+        
+        self.rust_status.config(text=f"🔗 {self.service_name}: ✅ Работает · 🔥 модель загружается...", fg='#FF9800')
+        self.log(f"🔥 Прогреваю модель {self.warmer.model}...")
+        
+        def ready(seconds):
+            self.log(f"✅ Модель {self.warmer.model} загружена и готова ({seconds:.1f} сек)")
+            self.root.after(0, lambda: self.rust_status.config(
+                text=f"🔗 {self.service_name}: ✅ Работает · 🔥 модель готова", fg='#4CAF50'
+            ))
+        
+        def failed(error):
+            self.log(f"⚠️ Не удалось прогреть модель {self.warmer.model}: {error}")
+            self.root.after(0, lambda: self.rust_status.config(
+                text=f"🔗 {self.service_name}: ✅ Работает · ⚠️ модель не загружена", fg='#FF9800'
+            ))
+        
+        self.warmer.start(ready, failed)
+
     def log(self, message):
         """Добавление сообщения в лог"""
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -489,6 +590,10 @@ class InterviewAssistantGUI:
             messagebox.showerror("Ошибка", "BlackHole устройство не найдено!")
             return
         
+        if self.auto_listening:
+            messagebox.showwarning("Авто-режим", "Сначала выключите авто-режим")
+            return
+        
         self.recording = True
         self.record_button.config(text="🛑 Остановить запись", bg='#f44336')
         self.recording_indicator.config(text="🔴 Запись...", fg='#f44336')
@@ -504,71 +609,181 @@ class InterviewAssistantGUI:
 
     def record_audio(self, duration=30):
         """Запись системного аудио"""
+        streaming = None
         try:
             self.log(f"🎧 Начинаю захват системного звука ({duration} сек)")
             
-            audio_format = pyaudio.paInt16
-            channels = 2
-            rate = 44100
-            chunk_size = 1024
-            
-            stream = self.audio.open(
-                format=audio_format,
-                channels=channels,
-                rate=rate,
-                input=True,
-                input_device_index=self.blackhole_device,
-                frames_per_buffer=chunk_size
-            )
+            if self.preroll_listener and self.preroll_listener.running:
+                engine = self.preroll_listener.engine
+                recorder = self.preroll_listener
+            else:
+                engine = CaptureEngine(self.audio, self.blackhole_device)
+                recorder = engine
             
-            frames = []
-            start_time = time.time()
+            on_chunk = self.update_recording_level
+            if self.streaming_enabled:
+                streaming = self.create_streaming(engine, duration + self.preroll_seconds + 1)
+                streaming.begin(0)
+                
+                def on_chunk(chunk):
+                    self.update_recording_level(chunk)
+                    streaming.feed(chunk)
             
-            while self.recording and (time.time() - start_time) < duration:
-                try:
-                    data = stream.read(chunk_size, exception_on_overflow=False)
-                    frames.append(data)
-                    
-                    audio_array = np.frombuffer(data, dtype=np.int16)
-                    volume = np.sqrt(np.mean(audio_array**2))
-                    
-                    if volume > 500:
-                        self.recording_indicator.config(text="🔴 Записываю звук...", fg='#4CAF50')
-                    else:
-                        self.recording_indicator.config(text="🔴 Жду звук...", fg='#f44336')
-                        
-                except Exception as e:
-                    break
+            samples = recorder.record(duration, lambda: self.recording, on_chunk)
             
-            stream.close()
             self.stop_recording()
+            self.log_capture_losses(engine)
             
-            if frames:
-                temp_filename = "temp_system_audio.wav"
-                with wave.open(temp_filename, 'wb') as wf:
-                    wf.setnchannels(channels)
-                    wf.setsampwidth(self.audio.get_sample_size(audio_format))
-                    wf.setframerate(rate)
-                    wf.writeframes(b''.join(frames))
+            if len(samples):
+                if self.archive_dir:
+                    archive_capture(self.archive_dir, samples, engine.channels, engine.rate, engine.sample_width)
                 
-                self.transcribe_audio(temp_filename)
+                if streaming:
+                    self.transcribe_audio(utterance=streaming.end())
+                else:
+                    self.transcribe_audio(to_audio_data(samples, engine.rate, engine.sample_width))
             else:
                 self.log("❌ Аудио не записано")
                 
         except Exception as e:
             self.log(f"❌ Ошибка записи: {e}")
             self.stop_recording()
+        finally:
+            if streaming:
+                streaming.stop()
+
+    def create_streaming(self, engine, max_seconds):
+        """Потоковое распознавание с показом промежуточного текста вопроса"""
+        streaming = StreamingTranscriber(
+            self.transcriber, engine.rate, engine.channels, max_seconds,
+            on_partial=self.show_partial_question
+        )
+        streaming.start()
+        return streaming
+
+    def show_partial_question(self, text):
+        """Промежуточный текст вопроса, пока интервьюер ещё говорит"""
+        self.question_text.delete(1.0, tk.END)
+        self.question_text.insert(1.0, text)
+        
+        if self.speculation and not self.generating:
+            history = self.context.messages() + [{"role": "user", "content": text}] if self.context_enabled else []
+            self.speculation.on_partial(text, history, self.context_enabled)
+
+    def toggle_auto_listen(self):
+        """Включение/выключение автоматической нарезки вопросов"""
+        if self.auto_listening:
+            self.auto_listening = False
+            self.auto_listen_button.config(text="🎙️ Авто: ВЫКЛ", bg='#607D8B')
+            self.recording_indicator.config(text="⚪ Готов к записи", fg='#888888')
+            self.log("❌ Авто-режим выключен")
+            return
+        
+        if self.blackhole_device is None:
+            messagebox.showerror("Ошибка", "BlackHole устройство не найдено!")
+            return
+        
+        if self.recording:
+            self.stop_recording()
+        
+        self.auto_listening = True
+        self.auto_listen_button.config(text="🎙️ Авто: ВКЛ", bg='#4CAF50')
+        self.log("✅ Авто-режим: вопросы выделяются по паузам в речи")
+        threading.Thread(target=self.auto_listen, daemon=True).start()
 
-    def transcribe_audio(self, audio_file):
-        """Транскрипция аудио и получение ответа"""
+    def auto_listen(self):
+        """Непрерывный захват с детектором речи"""
+        streaming = None
         try:
-            self.log("🔄 Транскрибирую аудио...")
+            engine = CaptureEngine(self.audio, self.blackhole_device)
+            vad = VoiceActivityDetector(engine.rate, max_segment_s=int(self.duration_var.get()))
+            on_chunk = self.update_recording_level
+            on_cut = None
+            utterances = {}
             
-            with sr.AudioFile(audio_file) as source:
-                audio = self.recognizer.record(source)
+            if self.streaming_enabled:
+                streaming = self.create_streaming(engine, vad.max_segment_s + 5)
+                
+                def on_chunk(chunk):
+                    self.update_recording_level(chunk)
+                    streaming.feed(chunk)
+                    # Детектор уже видит начало фразы - распознаём её по ходу речи
+                    current = streaming.current
+                    if vad.segment_start is None:
+                        if current:
+                            streaming.cancel()
+                            if self.speculation:
+                                self.speculation.reset()
+                    elif current is None or current.start != vad.segment_start:
+                        streaming.begin(vad.segment_start)
+                    else:
+                        streaming.mark_pause(vad.silence_run >= vad.hangover_frames // 3)
+                
+                def on_cut(segment):
+                    utterance = streaming.end(engine.frame_at(segment.end_time))
+                    if utterance and utterance.start == engine.frame_at(segment.start_time):
+                        utterances[segment.start_time] = utterance
             
-            text = self.recognizer.recognize_google(audio, language="ru-RU")
-            text = text.strip()
+            def on_segment(segment):
+                self.log(f"🎙️ Фраза: {segment.end_time - segment.start_time:.1f} сек")
+                if self.archive_dir:
+                    archive_capture(self.archive_dir, segment.samples, engine.channels, engine.rate, engine.sample_width)
+                utterance = utterances.pop(segment.start_time, None)
+                if utterance:
+                    self.transcribe_audio(utterance=utterance)
+                else:
+                    self.transcribe_audio(to_audio_data(segment.samples, segment.rate, engine.sample_width))
+            
+            if self.dual_source:
+                mic_engine = CaptureEngine(self.audio, None, channels=1, rate=16000, source='mic')
+                listener = DualSourceListener(engine, mic_engine, vad, VoiceActivityDetector(mic_engine.rate))
+                self.log("🎤 Микрофон подключен: ваша речь идёт только в контекст")
+                listener.listen(lambda: self.auto_listening, on_segment, self.on_candidate_segment, on_chunk, on_cut)
+                self.log_capture_losses(mic_engine)
+            else:
+                engine.listen(lambda: self.auto_listening, on_segment, vad, on_chunk, on_cut)
+            self.log_capture_losses(engine)
+        except Exception as e:
+            self.log(f"❌ Ошибка авто-режима: {e}")
+            self.auto_listening = False
+            self.auto_listen_button.config(text="🎙️ Авто: ВЫКЛ", bg='#607D8B')
+        finally:
+            if streaming:
+                streaming.stop()
+
+    def on_candidate_segment(self, segment):
+        """Речь кандидата: распознаётся и сохраняется в контекст, без запроса к AI"""
+        try:
+            text = self.transcriber.transcribe(to_audio_data(segment.samples, segment.rate))
+        except (sr.UnknownValueError, sr.RequestError):
+            return
+        
+        if not text:
+            return
+        
+        self.log(f"🗣️ Вы: {text}")
+        if self.context_enabled:
+            self.context.add("user", f"[Ответ кандидата] {text}", speaker="candidate")
+            self.update_history_status()
+
+    def log_capture_losses(self, engine):
+        """Сообщает о потерянном при захвате аудио"""
+        if engine.lost_audio:
+            self.log(f"⚠️ Потери при захвате: переполнений {engine.overflows}, отброшено кадров {engine.dropped_frames}")
+
+    def update_recording_level(self, chunk):
+        """Обновление индикатора уровня звука"""
+        if rms_volume(chunk) > 500:
+            self.recording_indicator.config(text="🔴 Записываю звук...", fg='#4CAF50')
+        else:
+            self.recording_indicator.config(text="🔴 Жду звук...", fg='#f44336')
+
+    def transcribe_audio(self, audio=None, utterance=None):
+        """Транскрипция аудио (или завершение потоковой) и получение ответа"""
+        try:
+            self.log("🔄 Транскрибирую аудио...")
+            
+            text = utterance.result() if utterance else self.transcriber.transcribe(audio)
             
             if not text:
                 self.log("⚠️ Речь не распознана")
@@ -579,14 +794,14 @@ class InterviewAssistantGUI:
             self.question_text.delete(1.0, tk.END)
             self.question_text.insert(1.0, text)
             
-            self.log("🦀 Получаю ответ от AI...")
-            
-            self.get_ai_response(text)
+            stream = self.speculation.resolve(text) if self.speculation else None
+            if stream:
+                self.log(f"⚡ Ответ запрошен заранее по промежуточному тексту ({self.speculation.summary()})")
+            else:
+                self.log("🦀 Получаю ответ от AI...")
             
-            try:
-                os.remove(audio_file)
-            except:
-                pass
+            # Следующая фраза ждёт, пока ответ на эту не закончится
+            self.get_ai_response(text, stream).wait()
                 
         except sr.UnknownValueError:
             self.log("⚠️ Речь не распознана")
@@ -595,99 +810,114 @@ class InterviewAssistantGUI:
         except Exception as e:
             self.log(f"❌ Ошибка транскрипции: {e}")
 
-    def get_ai_response(self, question):
-        """Получение ответа от AI"""
-        try:
-            self.generating = True
-            self.stop_generation_button.config(state='normal')
-            
-            self.update_send_button_state()
-            
-            self.conversation_history.append({
-                "role": "user", 
-                "content": question,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            if len(self.conversation_history) > self.max_history_length * 2:
-                self.conversation_history = self.conversation_history[-self.max_history_length * 2:]
-            
-            self.update_history_status()
-            
-            self.log_conversation_context()
-            
-            payload = {
-                "question": question,
-                "conversation_history": self.conversation_history if self.context_enabled else [],
-                "context_enabled": self.context_enabled
-            }
-            
-            response = requests.post(
-                f"{self.rust_api_url}/stream",
-                json=payload,
-                headers={"Accept": "text/event-stream"},
-                stream=True,
-                timeout=60
+    def get_ai_response(self, question, stream=None):
+        """Запуск ответа AI (stream - уже начатый ранний ответ); возвращает AnswerStream.
+
+        Не блокирует: запрос идёт на цикле событий AnswerLoop, слова
+        выводит render_answer в главном потоке Tk.
+        """
+        self.generating = True
+        self.stop_generation_button.config(state='normal')
+        
+        self.update_send_button_state()
+        
+        self.context.add("user", question)
+        self.update_history_status()
+        
+        self.log_conversation_context()
+        
+        messages = self.context.messages() if self.context_enabled else []
+        # История, ушедшая в запрос до вопроса, входит в ключ кэша; Rust сервису она не уходит
+        history = messages[:-1] if self.sends_history else None
+        cached = self.answer_cache.get(question, self.answer_provider, self.answer_model, history) \
+            if stream is None and self.answer_cache else None
+        similar = self.answer_cache.suggest(question, self.answer_provider, self.answer_model) \
+            if stream is None and self.answer_cache and not cached else None
+        if similar:
+            # Похожий - не значит тот же: подсказка, пока готовится свежий ответ
+            self.log(f"💡 Похожий вопрос уже был ({similar['similarity']:.0%}): {similar['question']}")
+            self.log(f"💡 Тогда ответ был: {similar['answer'][:300]}")
+        if cached:
+            self.log(f"💾 Ответ из кэша ({self.answer_cache.summary()})")
+            stream = AnswerStream.completed(question, cached['answer'])
+            if self.answer_cache.refresh:
+                self.answer_cache.refresh_in_background(
+                    question, self.answer_provider, self.answer_model,
+                    lambda: self.answers.ask(question, messages, self.context_enabled), history
+                )
+        
+        if stream is None:
+            stream = self.answers.submit(
+                question,
+                conversation_history=messages,
+                context_enabled=self.context_enabled
             )
+        self.current_answer = stream
+        
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.log_text.insert(tk.END, f"[{timestamp}] 💭 Ответ AI: ")
+        self.smart_scroll_to_end()
+        
+        self.root.after(0, self.render_answer, stream, question, "", history)
+        return stream
+
+    def render_answer(self, stream, question, full_response, history=None):
+        """Выводит накопившиеся события ответа (главный поток Tk, по таймеру)"""
+        words = []
+        finished = False
+        
+        for item in stream.drain():
+            if item is None:
+                finished = True
+                break
             
-            if response.status_code != 200:
-                self.log(f"❌ Ошибка API: {response.status_code}")
-                self.generating = False
-                self.stop_generation_button.config(state='disabled')
-                self.update_send_button_state()
-                return
-            
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] 💭 Ответ AI: ")
+            event_type, content = item
+            if event_type == 'word':
+                words.append(content)
+                
+            elif event_type == 'done':
+                final_answer = content
+                self.log_text.insert(tk.END, "".join(words) + "\n")
+                full_response += "".join(words)
+                words = []
+                self.log(f"✅ Полный ответ: {final_answer}")
+                stats = getattr(self.answers.client, 'last_stats', None)
+                if stats and not stream.replayed:
+                    # Мало посчитанных токенов промпта - префикс взят из KV кэша Ollama
+                    self.log(f"📊 Промпт: посчитано {stats['prompt_tokens']} токенов за {stats['prompt_seconds']:.2f} с")
+                
+                if self.answer_cache and not stream.replayed:
+                    self.answer_cache.put(
+                        question, self.answer_provider, self.answer_model,
+                        final_answer or full_response, time.time() - stream.started_at, history
+                    )
+                
+                if self.context_enabled:
+                    self.context.add("assistant", final_answer or full_response)
+                    self.update_history_status()
+                
+                self.log("="*60)
+                
+            elif event_type == 'error':
+                self.log_text.insert(tk.END, "".join(words) + "\n")
+                words = []
+                self.log(f"❌ Ошибка AI: {content}")
+        
+        if words:
+            # Все слова, пришедшие с прошлого тика, - одной вставкой
+            text = "".join(words)
+            full_response += text
+            self.log_text.insert(tk.END, text)
             self.smart_scroll_to_end()
-            
-            full_response = ""
-            
-            client = sseclient.SSEClient(response)
-            
-            for event in client.events():
-                if not self.generating:
-                    self.log_text.insert(tk.END, " [ОСТАНОВЛЕНО]\n")
-                    break
-                    
-                if event.data:
-                    try:
-                        data = json.loads(event.data)
-                        
-                        if data['type'] == 'word':
-                            chunk = data['content']
-                            full_response += chunk
-                            self.log_text.insert(tk.END, chunk)
-                            self.smart_scroll_to_end()
-                            self.root.update_idletasks()
-                            
-                        elif data['type'] == 'done':
-                            final_answer = data['content']
-                            self.log_text.insert(tk.END, "\n")
-                            self.log(f"✅ Полный ответ: {final_answer}")
-                            
-                            if self.context_enabled:
-                                self.conversation_history.append({
-                                    "role": "assistant",
-                                    "content": final_answer or full_response,
-                                    "timestamp": datetime.now().isoformat()
-                                })
-                                self.update_history_status()
-                            
-                            self.log("="*60)
-                            break
-                            
-                        elif data['type'] == 'error':
-                            self.log_text.insert(tk.END, "\n")
-                            self.log(f"❌ Ошибка AI: {data['content']}")
-                            break
-                            
-                    except json.JSONDecodeError:
-                        continue
-                        
-        except Exception as e:
-            self.log(f"❌ Ошибка получения ответа: {e}")
-        finally:
+        
+        if not finished:
+            self.root.after(30, self.render_answer, stream, question, full_response, history)
+            return
+        
+        if stream.cancelled:
+            self.log_text.insert(tk.END, " [ОСТАНОВЛЕНО]\n")
+        if stream is self.current_answer:
+            self.current_answer = None
             self.generating = False
             self.stop_generation_button.config(state='disabled')
             self.update_send_button_state()
@@ -723,6 +953,7 @@ class InterviewAssistantGUI:
         self.log("   2. Нажмите 'Начать захват звука'")
         self.log("   3. Говорите или воспроизводите вопрос")
         self.log("   4. Нажмите 'Остановить запись' или дождитесь автостопа")
+        self.log("   • Или включите 'Авто' - вопросы выделяются по паузам без нажатий")
         self.log("   5. Перетащите изображение в область drag&drop для анализа")
         self.log("⌨️  Горячие клавиши:")
         self.log("   • Cmd+V - автоматическая вставка (текст или изображение)")
@@ -732,7 +963,7 @@ class InterviewAssistantGUI:
         self.log("   • AI запоминает предыдущие вопросы и ответы")
         self.log("   • Кнопка 'Контекст' - включить/выключить память")
         self.log("   • Кнопка 'Очистить историю' - сбросить память")
-        self.log("   • Настройка 'Длина истории' - количество запоминаемых сообщений")
+        self.log("   • Настройка 'Контекст (токенов)' - бюджет истории в запросе, старое сжимается в сводку")
         self.log("📜 Управление прокруткой:")
         self.log("   • Кнопка 'Авто-прокрутка' - включить/выключить автоматическую прокрутку")
         self.log("   • Кнопка '⬇️ В конец' - быстрый переход к последним сообщениям")
@@ -743,6 +974,8 @@ class InterviewAssistantGUI:
 
     def stop_generation(self):
         """Остановка генерации ответа"""
+        if self.current_answer:
+            self.current_answer.cancel()
         self.generating = False
         self.stop_generation_button.config(state='disabled')
         self.update_send_button_state()
@@ -757,17 +990,16 @@ class InterviewAssistantGUI:
         
         if self.generating:
             self.log("🛑 Остановка текущей генерации для нового вопроса...")
-            self.generating = False
-            self.root.after(100, lambda: self._send_new_question(question))
-        else:
-            self._send_new_question(question)
+            if self.current_answer:
+                self.current_answer.cancel()
+        self._send_new_question(question)
 
     def _send_new_question(self, question):
         """Отправка нового вопроса (внутренний метод)"""
         self.log(f"✏️ Текстовый вопрос: {question}")
         self.log("🦀 Получаю ответ от AI...")
         
-        threading.Thread(target=self.get_ai_response, args=(question,), daemon=True).start()
+        self.get_ai_response(question)
 
     def setup_drag_drop(self):
         """Настройка drag&drop функциональности"""
@@ -861,7 +1093,7 @@ class InterviewAssistantGUI:
                     'OCREngine': '2'
                 }
                 
-                response = requests.post(url, files=files, data=data, timeout=30)
+                response = shared_pool().post('ocr', url, files=files, data=data)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -1079,28 +1311,45 @@ class InterviewAssistantGUI:
             self.log(f"❌ Ошибка автоматической вставки: {e}")
 
     def update_history_length(self, event):
-        """Обновление длины истории"""
+        """Обновление бюджета контекста в токенах"""
         try:
             new_length = self.history_length_var.get()
-            if new_length.isdigit():
-                self.max_history_length = int(new_length)
-                self.log(f"🔄 Длина истории обновлена до {self.max_history_length} сообщений")
+            if new_length.isdigit() and int(new_length) > 0:
+                self.context.set_budget(int(new_length))
+                self.log(f"🔄 Бюджет контекста: {self.context.max_tokens} токенов")
+                self.update_history_status()
             else:
-                self.log("⚠️ Некорректный ввод длины истории")
+                self.log("⚠️ Некорректный ввод бюджета контекста")
         except Exception as e:
             self.log(f"❌ Ошибка обновления истории: {e}")
 
     def update_history_status(self):
         """Обновление статуса истории"""
-        self.history_status.config(text=f"💬 История: {len(self.conversation_history) // 2} сообщений")
+        self.history_status.config(text=f"💬 История: {len(self.context)} сообщений, ~{self.context.tokens} токенов")
 
     def log_conversation_context(self):
         """Логирование контекста диалога"""
-        if self.conversation_history and self.context_enabled:
-            self.log(f"📚 Отправляю {len(self.conversation_history)} сообщений из истории")
+        if len(self.context) and self.context_enabled:
+            self.log(f"📚 Отправляю контекст: {self.context.summary_line()}")
         else:
             self.log("📭 История пуста или отключена, отправляю без контекста")
 
+    def summarize_context(self, summary, messages):
+        """Сжатие старых реплик в сводку моделью (фоновый поток ConversationContext).
+
+        Сжатие начинается с приходом нового вопроса, но модель спрашивается
+        только после ответа на него: иначе сводка делит модель с ответом
+        и задерживает его первый токен. Реплики до готовности сводки
+        остаются в запросе, так что ожидание ничего не теряет. Rust сервису
+        история не уходит - модель на сводку не тратится, хватает
+        сводки из первых предложений.
+        """
+        if not self.sends_history:
+            return None
+        while self.generating:
+            time.sleep(0.2)
+        return self.answers.ask(summary_prompt(summary, messages, self.context.summary_tokens))
+
     def toggle_context(self):
         """Включение/выключение контекста"""
         self.context_enabled = not self.context_enabled
@@ -1113,7 +1362,7 @@ class InterviewAssistantGUI:
 
     def clear_conversation_history(self):
         """Очистка истории диалога"""
-        self.conversation_history = []
+        self.context.clear()
         self.update_history_status()
         self.log("🗑️ История диалога очищена")
 
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import speech_recognition as sr
-import requests
 import json
 import sys
 import threading
@@ -10,13 +8,60 @@ import time
 import subprocess
 from datetime import datetime
 
+try:
+    import speech_recognition as sr
+    from interview_core import (
+        AnswerClient,
+        ProviderStream,
+        configure_pool,
+        create_answer_cache,
+        create_calibration,
+        create_hedger,
+        create_registry,
+        create_transcriber,
+        load_config,
+        ollama_tokens,
+        open_provider_stream,
+        openai_tokens,
+        rust_tokens,
+        service_url,
+        shared_pool,
+        start_warmup,
+    )
+except ImportError:
+    # Запуск скриптом: недостающий пакет назовёт check_dependencies
+    if __name__ != "__main__":
+        raise
+
+PROVIDER_URLS = {
+    "ollama": "http://localhost:11434/api",
+    "deepseek": "https://api.deepseek.com/v1",
+    "qwen": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+}
+
+SYSTEM_PROMPT = "Ты помощник для технических собеседований. Отвечай кратко, четко и по делу."
+OLLAMA_PROMPT = "Ты помощник для технических собеседований. Отвечай кратко и по делу.\n\nВопрос: {question}"
+
 class SimpleInterviewAssistant:
     def __init__(self):
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
+        self.calibration = None
         
         self.config = self.load_config()
+        self.transcriber = create_transcriber(self.config, self.recognizer, on_warning=print)
         self.ai_provider = self.config.get('ai_provider', 'ollama')
+        self.http = shared_pool()
+        self.answer_cache = create_answer_cache(self.config)
+        # Модель грузится, пока настраивается микрофон и читается меню
+        self.warmer = start_warmup(self.config) if self.ai_provider == 'ollama' else None
+        self.hedger = create_hedger(self.config, self.open_stream)
+        self.registry = create_registry(self.config)
+        for name in self.provider_order():
+            self.registry.register(name, lambda question, name=name: self.open_stream(name, question))
+        self.answered_by = self.ai_provider
+        self.asked_at = time.time()
+        self.stream_answers = self.config.get('stream_answers', True)
         
         self.history = []
         
@@ -24,37 +69,32 @@ class SimpleInterviewAssistant:
 
     def load_config(self):
         """Загружает конфигурацию из config.json"""
-        try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {
-                "ai_provider": "ollama",
-                "ollama": {
-                    "base_url": "http://localhost:11434/api",
-                    "model": "qwen2:7b"
-                },
-                "deepseek": {
-                    "api_key": "",
-                    "model": "deepseek-coder",
-                    "base_url": "https://api.deepseek.com/v1"
-                },
-                "qwen": {
-                    "api_key": "",
-                    "model": "qwen-max",
-                    "base_url": "https://dashscope.aliyuncs.com/compatible-mode/v1"
-                }
+        return load_config(default={
+            "ai_provider": "ollama",
+            "stream_answers": True,
+            "providers": {
+                "fallback": ["ollama", "deepseek", "qwen"]
+            },
+            "ollama": {
+                "base_url": "http://localhost:11434/api",
+                "model": "qwen2:7b"
+            },
+            "deepseek": {
+                "api_key": "",
+                "model": "deepseek-coder",
+                "base_url": "https://api.deepseek.com/v1"
+            },
+            "qwen": {
+                "api_key": "",
+                "model": "qwen-max",
+                "base_url": "https://dashscope.aliyuncs.com/compatible-mode/v1"
             }
+        })
 
     def setup_microphone(self):
-        """Настраивает микрофон"""
-        try:
-            print("🎤 Настраиваю микрофон...")
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-            print("✅ Микрофон готов!")
-        except Exception as e:
-            print(f"❌ Ошибка микрофона: {e}")
+        """Настраивает микрофон: порог из сохранённого профиля шума"""
+        print("🎤 Настраиваю микрофон...")
+        self.calibration = create_calibration(self.config, self.microphone, self.recognizer)
 
     def show_notification(self, title, message):
         """Показывает системное уведомление на macOS"""
@@ -80,8 +120,7 @@ class SimpleInterviewAssistant:
             def record():
                 nonlocal audio
                 try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(source, phrase_time_limit=30)
+                    audio = self.calibration.listen(self.microphone, self.recognizer, phrase_time_limit=30)
                     recording_complete.set()
                 except Exception as e:
                     print(f"❌ Ошибка записи: {e}")
@@ -113,8 +152,7 @@ class SimpleInterviewAssistant:
             self.show_notification("🔄 Распознавание", "Обрабатываю речь")
             
             try:
-                text = self.recognizer.recognize_google(audio, language="ru-RU")
-                text = text.strip()
+                text = self.transcriber.transcribe(audio)
                 
                 if not text:
                     print("⚠️ Пустой текст")
@@ -123,17 +161,17 @@ class SimpleInterviewAssistant:
                 print(f"🎯 Распознано: {text}")
                 self.show_notification("🎯 Распознано", text[:50] + "..." if len(text) > 50 else text)
                 
-                response = self.send_to_ai(text)
+                tokens = self.send_to_ai(text)
+                response = self.show_answer(text, tokens) if tokens else None
                 
                 if response:
                     self.history.append({
                         "timestamp": datetime.now().isoformat(),
                         "question": text,
                         "answer": response,
-                        "provider": self.ai_provider
+                        "provider": self.answered_by
                     })
                     
-                    self.show_answer(text, response)
                     self.show_notification("✅ Готово!", "Ответ получен")
                 else:
                     print("❌ Не удалось получить ответ от AI")
@@ -148,126 +186,163 @@ class SimpleInterviewAssistant:
             print(f"❌ Ошибка обработки: {e}")
 
     def send_to_ai(self, question):
-        """Отправляет вопрос в AI и получает ответ"""
-        if self.ai_provider == "ollama":
-            return self.send_to_ollama(question)
-        elif self.ai_provider == "deepseek":
-            return self.send_to_deepseek(question)
-        elif self.ai_provider == "qwen":
-            return self.send_to_qwen(question)
-        else:
-            return None
-
-    def send_to_ollama(self, question):
-        """Отправляет вопрос в Ollama"""
+        """Отправляет вопрос в AI: итератор фрагментов ответа или None; повторный вопрос берётся из кэша"""
+        self.asked_at = time.time()
+        provider, model = self.cache_identity()
+        if self.answer_cache:
+            cached = self.answer_cache.get(question, provider, model)
+            similar = None if cached else self.answer_cache.suggest(question, provider, model)
+            if similar:
+                # Похожий - не значит тот же: подсказка, пока готовится свежий ответ
+                print(f"💡 Похожий вопрос уже был ({similar['similarity']:.0%}): {similar['question']}")
+                print(f"💡 Тогда ответ был: {similar['answer'][:300]}")
+            if cached:
+                print(f"💾 Ответ из кэша ({self.answer_cache.summary()})")
+                self.answered_by = cached['provider']
+                if self.answer_cache.refresh:
+                    self.answer_cache.refresh_in_background(
+                        question, provider, model, lambda: self.fresh_answer(question)
+                    )
+                return iter([cached['answer']])
+        
         try:
-            config = self.config.get('ollama', {})
-            url = f"{config.get('base_url', 'http://localhost:11434/api')}/generate"
-            
-            payload = {
-                "model": config.get('model', 'qwen2:7b'),
-                "prompt": f"Ты помощник для технических собеседований. Отвечай кратко и по делу.\n\nВопрос: {question}",
-                "stream": False
-            }
-            
-            print("🤖 Получаю ответ от Ollama...")
-            response = requests.post(url, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                return response.json().get('response', '')
-            else:
-                return None
-                
+            tokens = self.answer_tokens(question)
         except Exception as e:
+            print(f"❌ {e}")
             return None
+        if self.answer_cache:
+            return self.caching_tokens(question, provider, model, tokens)
+        return tokens
 
-    def send_to_deepseek(self, question):
-        """Отправляет вопрос в DeepSeek API"""
-        try:
-            config = self.config.get('deepseek', {})
-            api_key = config.get('api_key', '')
-            
-            if not api_key:
-                return "❌ DeepSeek API ключ не настроен в config.json"
-            
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": config.get('model', 'deepseek-coder'),
-                "messages": [
-                    {"role": "system", "content": "Ты помощник для технических собеседований. Отвечай кратко, четко и по делу."},
-                    {"role": "user", "content": question}
-                ],
-                "max_tokens": 2000
-            }
-            
-            print("🤖 Получаю ответ от DeepSeek...")
-            response = requests.post(
-                f"{config.get('base_url', 'https://api.deepseek.com/v1')}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content']
-            else:
-                return f"❌ DeepSeek ошибка: {response.status_code}"
-                
-        except Exception as e:
-            return f"❌ DeepSeek ошибка: {str(e)}"
+    def caching_tokens(self, question, provider, model, tokens):
+        """Пропускает фрагменты дальше и кэширует ответ, если он пришёл целиком"""
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+        answer = "".join(parts)
+        if answer:
+            if not self.hedger and self.answered_by != self.ai_provider:
+                # Ответил запасной провайдер - ключ кэша его
+                provider, model = self.cache_identity(self.answered_by)
+            self.answer_cache.put(question, provider, model, answer, time.time() - self.asked_at)
 
-    def send_to_qwen(self, question):
-        """Отправляет вопрос в Qwen API"""
-        try:
-            config = self.config.get('qwen', {})
-            api_key = config.get('api_key', '')
-            
-            if not api_key:
-                return "❌ Qwen API ключ не настроен в config.json"
-            
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
+    def answer_tokens(self, question):
+        """Фрагменты ответа: от первого работающего провайдера или от победителя гонки; все упали - исключение"""
+        self.answered_by = self.ai_provider
+        if self.hedger:
+            print(f"🏁 Спрашиваю одновременно: {', '.join(self.hedger.names)}...")
+            try:
+                winner, tokens = self.hedger.race(question)
+            except Exception as e:
+                raise Exception(f"Ни один провайдер не ответил: {e}")
+            print(f"🏁 Первым ответил {winner.upper()}")
+        else:
+            print(f"🤖 Получаю ответ от {self.ai_provider.title()}...")
+            try:
+                winner, tokens = self.registry.stream(question, on_skip=self.report_skip)
+            except Exception as e:
+                raise Exception(f"Ни один провайдер не ответил: {e}")
+            if winner != self.ai_provider:
+                print(f"🔀 Отвечает {winner.upper()}")
+        self.answered_by = winner
+        
+        if not self.stream_answers:
+            return iter(["".join(tokens)])
+        return tokens
+
+    def report_skip(self, name, error):
+        print(f"⚠️ {name.title()} не ответил: {error}")
+
+    def provider_order(self):
+        """Основной провайдер, за ним запасные из providers.fallback; без API ключа - пропускаются"""
+        order = [self.ai_provider] + self.config.get('providers', {}).get('fallback', [])
+        names = []
+        for name in order:
+            if name in names:
+                continue
+            if name in ('deepseek', 'qwen') and not self.config.get(name, {}).get('api_key'):
+                continue
+            names.append(name)
+        return names
+
+    def cache_identity(self, name=None):
+        """Провайдер и модель для ключа кэша; в гонке - все участники"""
+        names = self.hedger.names if self.hedger else [name or self.ai_provider]
+        return "+".join(names), "+".join(self.config.get(name, {}).get('model', '') for name in names)
+
+    def fresh_answer(self, question):
+        """Новый ответ для обновления кэша; ошибка провайдера - исключение"""
+        _, tokens = self.registry.stream(question)
+        answer = "".join(tokens)
+        if not answer:
+            raise Exception("пустой ответ")
+        return answer
+
+    def open_stream(self, provider, question):
+        """Потоковый запрос к провайдеру: ProviderStream с фрагментами ответа"""
+        config = self.config.get(provider, {})
+        
+        if provider == "rust":
+            response = AnswerClient(service_url(self.config), pool=self.http).post_stream(question)
+            return ProviderStream(provider, response, rust_tokens)
+        
+        base_url = config.get('base_url', PROVIDER_URLS.get(provider, ''))
+        if provider == "ollama":
             payload = {
-                "model": config.get('model', 'qwen-max'),
-                "messages": [
-                    {"role": "system", "content": "Ты помощник для технических собеседований. Отвечай кратко, четко и по делу."},
-                    {"role": "user", "content": question}
-                ],
-                "max_tokens": 2000
+                "model": config.get('model', 'qwen2:7b'),
+                "prompt": OLLAMA_PROMPT.format(question=question),
+                "stream": True
             }
-            
-            print("🤖 Получаю ответ от Qwen...")
-            response = requests.post(
-                f"{config.get('base_url', 'https://dashscope.aliyuncs.com/compatible-mode/v1')}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content']
-            else:
-                return f"❌ Qwen ошибка: {response.status_code}"
-                
-        except Exception as e:
-            return f"❌ Qwen ошибка: {str(e)}"
+            return open_provider_stream(self.http, 'ollama', provider, f"{base_url}/generate", payload, ollama_tokens)
+        
+        api_key = config.get('api_key', '')
+        if not api_key:
+            raise Exception(f"{provider.title()} API ключ не настроен в config.json")
+        payload = {
+            "model": config.get('model', ''),
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": question}
+            ],
+            "max_tokens": 2000,
+            "stream": True
+        }
+        return open_provider_stream(
+            self.http, provider, provider, f"{base_url}/chat/completions", payload, openai_tokens,
+            headers={"Authorization": f"Bearer {api_key}"}
+        )
 
     def show_answer(self, question, answer):
-        """Показывает вопрос и ответ в терминале"""
+        """Показывает вопрос и ответ в терминале по мере прихода фрагментов.
+
+        answer - строка или итератор фрагментов; возвращает полный текст
+        ответа или None, если поток оборвался.
+        """
         print("\n" + "="*80)
         print(f"📅 {datetime.now().strftime('%H:%M:%S')}")
         print(f"❓ ВОПРОС: {question}")
         print("-"*80)
-        print(f"💡 ОТВЕТ ({self.ai_provider.upper()}):")
-        print(answer)
+        print(f"💡 ОТВЕТ ({self.answered_by.upper()}):")
+        
+        parts = []
+        first_at = None
+        try:
+            for token in ([answer] if isinstance(answer, str) else answer):
+                if first_at is None:
+                    first_at = time.time()
+                print(token, end='', flush=True)
+                parts.append(token)
+        except Exception as e:
+            print(f"\n❌ Ответ прерван: {e}")
+            print("="*80)
+            return None
+        
+        print()
+        if first_at is not None:
+            print(f"⏱️ Первый фрагмент через {first_at - self.asked_at:.1f} с, весь ответ за {time.time() - self.asked_at:.1f} с")
         print("="*80)
+        return "".join(parts) or None
 
     def show_history(self):
         """Показывает историю вопросов и ответов"""
@@ -308,6 +383,12 @@ class SimpleInterviewAssistant:
         
         print(f"\n📄 Конфигурация: config.json")
         print(f"📝 История: {len(self.history)} вопросов")
+        if self.hedger:
+            print(f"🏁 Гонка провайдеров: {self.hedger.summary()}")
+        else:
+            print(f"🔀 Провайдеры по порядку: {self.registry.summary()}")
+        if self.answer_cache:
+            print(f"💾 {self.answer_cache.summary()}")
         print("="*80)
 
     def show_menu(self):
@@ -369,7 +450,8 @@ def check_dependencies():
     """Проверяет установлены ли все зависимости"""
     required_packages = {
         'speech_recognition': 'pip install SpeechRecognition',
-        'requests': 'pip install requests'
+        'requests': 'pip install requests',
+        'numpy': 'pip install numpy'
     }
     
     missing = []
@@ -394,12 +476,20 @@ def check_ai_provider(config):
     
     if provider == 'ollama':
         try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=5)
+            response = shared_pool().get('health', f"{config.get('ollama', {}).get('base_url', PROVIDER_URLS['ollama'])}/tags")
             return response.status_code == 200
         except:
             print("❌ Ollama не запущен. Запустите: brew services start ollama")
             return False
     
+    elif provider == 'rust':
+        try:
+            AnswerClient(service_url(config)).health()
+            return True
+        except:
+            print("❌ Rust сервис не запущен. Запустите: cargo run")
+            return False
+    
     elif provider in ['deepseek', 'qwen']:
         api_key = config.get(provider, {}).get('api_key', '')
         if not api_key:
@@ -423,9 +513,16 @@ if __name__ == "__main__":
         print("❌ config.json не найден или поврежден")
         sys.exit(1)
     
+    # Соединение с провайдером открывается заранее, пока идут проверки и настройка микрофона
+    provider = config.get('ai_provider', 'ollama')
+    configure_pool(config, [config.get(provider, {}).get('base_url', PROVIDER_URLS.get(provider, service_url(config)))])
+    
     if not check_ai_provider(config):
-        print(f"💡 Настройте AI провайдера в config.json")
-        sys.exit(1)
+        fallback = [name for name in config.get('providers', {}).get('fallback', []) if name != provider]
+        if not fallback:
+            print(f"💡 Настройте AI провайдера в config.json")
+            sys.exit(1)
+        print(f"⚠️ Отвечать будут запасные провайдеры: {', '.join(fallback)}")
     
     print("✅ Все проверки пройдены!")
     print("")
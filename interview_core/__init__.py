@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""Общее ядро Interview Assistant: захват, выделение фраз, распознавание, ответы.
+
+Фронтенды (GUI и консольные версии) - тонкие оболочки над этим пакетом.
+"""
+
+from .answer_cache import AnswerCache, create_answer_cache
+from .answers import RUST_API_URL, AnswerClient, service_url
+from .async_answers import AnswerLoop, AnswerStream, AsyncAnswerClient
+from .calibration import DEFAULT_PROFILE_FILE, NoiseCalibrator, create_calibration, microphone_name
+from .capture import (
+    AudioRingBuffer,
+    CaptureEngine,
+    PrerollListener,
+    Segment,
+    archive_capture,
+    rms_volume,
+    to_audio_data,
+    write_wav,
+)
+from .config import load_config
+from .context import ConversationContext, create_context, estimate_tokens, summary_prompt
+from .devices import find_device, list_devices, open_audio
+from .dual_source import DualSourceListener
+from .endpointing import VoiceActivityDetector, split_at_silence
+from .hedging import Hedger, create_hedger
+from .ollama_chat import AsyncOllamaChatClient, create_chat_client
+from .preprocess import SPEECH_RATE, downmix, resample_poly, to_speech_rate
+from .provider_registry import CircuitBreaker, ProviderRegistry, create_registry
+from .providers import ProviderStream, ollama_tokens, open_provider_stream, openai_tokens, rust_tokens
+from .question_index import QuestionIndex, normalize_question
+from .replay import ReplayAudio, read_wav
+from .sessions import HttpPool, configure_pool, shared_pool
+from .speculation import SpeculativeDispatcher, create_dispatcher
+from .sse import SSEParser, decode_event
+from .streaming import StreamingTranscriber, merge_words
+from .transcription import ASR_BACKENDS, ParallelTranscriber, Transcriber, create_transcriber
+from .warmup import ModelWarmer, create_warmer, start_warmup
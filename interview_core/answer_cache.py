@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .question_index import QuestionIndex, normalize_question
+
+DEFAULT_CACHE_FILE = "answer_cache.json"
+
+
+def history_digest(history):
+    """Короткий хэш истории диалога, ушедшей в запрос вместе с вопросом ("" - без истории)"""
+    if not history:
+        return ""
+    text = json.dumps([[m["role"], m["content"]] for m in history], ensure_ascii=False)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class AnswerCache:
+    """Кэш ответов на повторяющиеся вопросы.
+
+    Ключ - провайдер, модель, нормализованный текст вопроса и хэш
+    истории, если она ушла в запрос: ответ с историей верен только для
+    той же истории. В памяти
+    держится не больше capacity ответов (вытесняются давно не нужные),
+    на диск кэш пишется в фоне и переживает перезапуск. Для каждого
+    ответа запоминается, сколько он генерировался, - это и есть время,
+    сэкономленное попаданием. С fuzzy_threshold > 0 suggest() ищет
+    похожий прошлый вопрос через QuestionIndex: распознавание редко
+    слышит повтор слово в слово. В индекс попадает каждая пара вопрос -
+    ответ, и вытесненная из кэша, и сохранённая с другой историей. Похожий вопрос может быть и другим вопросом
+    («в Go» и «в Java»), поэтому его ответ - только подсказка, а не
+    попадание: свежий ответ всё равно запрашивается.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, capacity=500, refresh=False, fuzzy_threshold=0.0):
+        self.path = path
+        self.capacity = capacity
+        self.refresh = refresh
+        self.fuzzy_threshold = fuzzy_threshold
+        self.indexes = {}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.suggestions = 0
+        self.version = 0
+        self.saved_version = 0
+        self.load()
+
+    @staticmethod
+    def key(question, provider, model, digest=""):
+        key = f"{provider}|{model}|{normalize_question(question)}"
+        return f"{key}|{digest}" if digest else key
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except:
+            entries = []
+        for entry in entries[-self.capacity:]:
+            key = self.key(entry['question'], entry['provider'], entry['model'], entry.get('history', ""))
+            self.entries[key] = entry
+            self.index_question(entry)
+
+    def index_question(self, entry):
+        if self.fuzzy_threshold <= 0:
+            return
+        index = self.indexes.get((entry['provider'], entry['model']))
+        if index is None:
+            index = self.indexes[(entry['provider'], entry['model'])] = QuestionIndex(self.fuzzy_threshold)
+        index.add(entry['question'], entry)
+
+    def find_similar(self, question, provider, model):
+        """Ближайший прошлый вопрос (словарь с question, answer, ...) и сходство или (None, 0)"""
+        index = self.indexes.get((provider, model))
+        found = index.best(question) if index else None
+        if found is None:
+            return None, 0.0
+        score, _, entry = found
+        return entry, score
+
+    def suggest(self, question, provider, model):
+        """Ответ на похожий прошлый вопрос с полем similarity или None; попаданием не считается"""
+        if self.fuzzy_threshold <= 0:
+            return None
+        with self.lock:
+            entry, score = self.find_similar(question, provider, model)
+            if entry is None:
+                return None
+            self.suggestions += 1
+            return dict(entry, similarity=round(score, 3))
+
+    def get(self, question, provider, model, history=None):
+        """Сохранённый ответ на тот же вопрос при той же истории (словарь с answer, latency, ...) или None"""
+        key = self.key(question, provider, model, history_digest(history))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry.get('latency', 0)
+            return entry
+
+    def put(self, question, provider, model, answer, latency, history=None):
+        """Запоминает ответ и сохраняет кэш в фоне"""
+        if not answer or not normalize_question(question):
+            return
+        digest = history_digest(history)
+        key = self.key(question, provider, model, digest)
+        entry = {
+            "question": question,
+            "provider": provider,
+            "model": model,
+            "answer": answer,
+            "latency": round(latency, 3),
+            "updated": datetime.now().isoformat(),
+        }
+        if digest:
+            entry["history"] = digest
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            # Вытесненные из кэша пары остаются в индексе подсказками
+            self.index_question(entry)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+            entries = list(self.entries.values())
+            self.version += 1
+            version = self.version
+        threading.Thread(target=self.save, args=(entries, version), daemon=True).start()
+
+    def save(self, entries, version):
+        with self.write_lock:
+            # Более свежий снимок уже записан другим потоком
+            if version <= self.saved_version:
+                return
+            self.saved_version = version
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Не удалось сохранить кэш ответов: {e}")
+
+    def refresh_in_background(self, question, provider, model, generate, history=None):
+        """Заново генерирует ответ в фоне (generate() -> текст) и обновляет кэш"""
+        def run():
+            start = time.time()
+            try:
+                answer = generate()
+            except Exception as e:
+                print(f"⚠️ Не удалось обновить ответ в кэше: {e}")
+                return
+            self.put(question, provider, model, answer, time.time() - start, history)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        return (f"кэш ответов: попаданий {self.hits} из {self.hits + self.misses} ({self.hit_ratio:.0%}, "
+                f"подсказок по похожим {self.suggestions}), сэкономлено {self.saved_seconds:.1f} с, записей {len(self.entries)}")
+
+
+def create_answer_cache(config):
+    """AnswerCache по секции answer_cache из config.json или None"""
+    options = dict((config or {}).get('answer_cache', {}))
+    if not options.pop('enabled', False):
+        return None
+    return AnswerCache(**options)
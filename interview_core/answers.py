@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from .sessions import read_available, shared_pool
+from .sse import SSEParser, decode_events
+
+RUST_API_URL = "http://127.0.0.1:3030"
+
+
+def service_url(config):
+    """Адрес Rust сервиса из секции rust config.json"""
+    return (config or {}).get('rust', {}).get('base_url', RUST_API_URL)
+
+
+class AnswerClient:
+    """Клиент Rust сервиса: /health, /ask и потоковый /stream.
+
+    Запросы идут через общий HttpPool, таймауты по умолчанию - из политик
+    эндпоинтов health, ask и stream.
+    """
+
+    def __init__(self, base_url=RUST_API_URL, timeout=None, pool=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool = pool
+
+    @property
+    def http(self):
+        return self.pool or shared_pool()
+
+    def health(self, timeout=None):
+        """Проверяет сервис, возвращает ответ /health"""
+        response = self.http.get('health', f"{self.base_url}/health", timeout=timeout)
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+        return response.json()
+
+    def ask(self, question, timeout=None):
+        """Обычный запрос: возвращает полный ответ"""
+        response = self.http.post('ask', f"{self.base_url}/ask", json={"question": question}, timeout=timeout)
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+        return response.json()['content']
+
+    def stream(self, question, conversation_history=None, context_enabled=None):
+        """Потоковый запрос: возвращает генератор событий (type, content).
+
+        type - 'word' (очередной фрагмент), 'done' (полный ответ) или 'error'.
+        Запрос отправляется сразу, ошибка HTTP выбрасывается здесь же.
+        """
+        return self.events(self.post_stream(question, conversation_history, context_enabled))
+
+    def post_stream(self, question, conversation_history=None, context_enabled=None):
+        """Отправляет потоковый запрос и возвращает открытый ответ requests.
+
+        Закрытие ответа из другого потока прерывает чтение событий.
+        """
+        payload = {"question": question}
+        if conversation_history is not None:
+            payload["conversation_history"] = conversation_history
+        if context_enabled is not None:
+            payload["context_enabled"] = context_enabled
+        
+        response = self.http.post(
+            'stream',
+            f"{self.base_url}/stream",
+            json=payload,
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            timeout=self.timeout
+        )
+        
+        if response.status_code != 200:
+            response.close()
+            raise Exception(f"HTTP {response.status_code}")
+        
+        return response
+
+    def event_batches(self, response, read_size=65536):
+        """Разбирает SSE поток ответа: списки событий (type, content), пришедших за одно чтение.
+
+        Байты читаются из сокета крупными кусками (сколько уже пришло), так
+        что отстающий читатель получает все накопившиеся слова разом.
+        """
+        parser = SSEParser()
+        finished = False
+        try:
+            for data in read_available(response, read_size):
+                if finished:
+                    # Дочитываем хвост chunked, чтобы соединение вернулось в пул
+                    continue
+                batch = decode_events(parser.feed(data))
+                for index, (event_type, _) in enumerate(batch):
+                    if event_type in ('done', 'error'):
+                        batch = batch[:index + 1]
+                        finished = True
+                        break
+                if batch:
+                    yield batch
+                if finished and not response.raw.chunked:
+                    return
+        finally:
+            response.close()
+
+    def events(self, response):
+        """Разбирает SSE поток ответа в события (type, content)"""
+        batches = self.event_batches(response)
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            batches.close()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import queue
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .answers import RUST_API_URL
+from .sessions import shared_pool
+from .sse import ChunkedDecoder, SSEParser, decode_events
+
+
+class AsyncAnswerClient:
+    """asyncio клиент потокового /stream без сторонних библиотек.
+
+    HTTP/1.1 поверх asyncio.open_connection: несколько ответов идут
+    одновременно на одном цикле событий, отмена задачи сразу закрывает
+    соединение. Соединение, дочитанное до конца, остаётся открытым
+    для следующего вопроса.
+    """
+
+    def __init__(self, base_url=RUST_API_URL, timeout=None, connect_timeout=None):
+        policy = shared_pool().policy('stream')
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout or policy['timeout']
+        self.connect_timeout = connect_timeout or policy['connect_timeout']
+        self.idle = []
+
+    async def connect(self):
+        """Свободное keep-alive соединение или новое; второе значение - было ли оно в простое"""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context() if self.secure else None),
+            self.connect_timeout
+        )
+        return reader, writer, False
+
+    async def warm(self):
+        """Открывает соединение заранее, чтобы первый вопрос не ждал рукопожатия"""
+        try:
+            reader, writer, _ = await self.connect()
+            self.idle.append((reader, writer))
+        except (OSError, asyncio.TimeoutError):
+            pass
+
+    async def request(self, payload, path='/stream', accept='text/event-stream'):
+        """Отправляет POST на path, возвращает (reader, writer, заголовки)"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"POST {self.prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Accept: {accept}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode('ascii')
+
+        for attempt in range(2):
+            reader, writer, reused = await self.connect()
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not status_line and reused:
+                    # Сервер закрыл простаивавшее соединение - повторяем на новом
+                    writer.close()
+                    continue
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), self.timeout)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+            except BaseException:
+                writer.close()
+                raise
+            status = int(status_line.split()[1]) if len(status_line.split()) > 1 else 0
+            if status != 200:
+                writer.close()
+                raise Exception(f"HTTP {status}")
+            return reader, writer, headers
+        raise ConnectionError("Соединение закрыто сервером")
+
+    async def stream(self, question, conversation_history=None, context_enabled=None):
+        """Асинхронный генератор событий (type, content), как AnswerClient.stream"""
+        async for batch in self.stream_batches(question, conversation_history, context_enabled):
+            for event in batch:
+                yield event
+
+    async def stream_batches(self, question, conversation_history=None, context_enabled=None, read_size=65536):
+        """Списки событий, пришедших за одно чтение из сокета"""
+        payload = {"question": question}
+        if conversation_history is not None:
+            payload["conversation_history"] = conversation_history
+        if context_enabled is not None:
+            payload["context_enabled"] = context_enabled
+
+        reader, writer, headers = await self.request(payload)
+        chunked = headers.get('transfer-encoding', '').lower() == 'chunked'
+        decoder = ChunkedDecoder() if chunked else None
+        parser = SSEParser()
+        finished = False
+        reusable = False
+        try:
+            while not (decoder and decoder.finished):
+                data = await asyncio.wait_for(reader.read(read_size), self.timeout)
+                if not data:
+                    break
+                if decoder:
+                    data = decoder.feed(data)
+                if finished:
+                    continue
+                batch = decode_events(parser.feed(data))
+                for index, (event_type, _) in enumerate(batch):
+                    if event_type in ('done', 'error'):
+                        batch = batch[:index + 1]
+                        finished = True
+                        break
+                if batch:
+                    yield batch
+                if finished and not chunked:
+                    break
+            reusable = finished and chunked and decoder.finished \
+                and headers.get('connection', '').lower() != 'close'
+        finally:
+            if reusable:
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+
+
+class AnswerStream:
+    """Ответ в работе: события копятся в потокобезопасной очереди.
+
+    GUI забирает их из главного потока через drain(), консоль - блокирующим
+    events(); cancel() отменяет задачу на цикле событий.
+    """
+
+    def __init__(self, question):
+        self.question = question
+        self.queue = queue.Queue()
+        self.done = threading.Event()
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.failed = False
+        self.cancelled = False
+        self.replayed = False
+        self.loop = None
+        self.task = None
+
+    @classmethod
+    def completed(cls, question, answer):
+        """Уже готовый ответ (например, из кэша) в виде законченного потока"""
+        stream = cls(question)
+        stream.replayed = True
+        stream.put('word', answer)
+        stream.put('done', answer)
+        stream.finish()
+        return stream
+
+    def put(self, event_type, content):
+        if event_type == 'word' and self.first_token_at is None:
+            self.first_token_at = time.time()
+        elif event_type == 'error':
+            self.failed = True
+        self.queue.put((event_type, content))
+
+    def finish(self):
+        self.queue.put(None)
+        self.done.set()
+
+    def cancel(self):
+        """Отменяет запрос; соединение закрывается на цикле событий"""
+        if self.cancelled or self.done.is_set():
+            return
+        self.cancelled = True
+        if self.loop and self.task:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+
+    def drain(self):
+        """Все накопившиеся события без ожидания; None в списке - поток закончился"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def events(self):
+        """Блокирующий генератор событий; закрытие генератора отменяет запрос"""
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self.cancel()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class AnswerLoop:
+    """Один фоновый поток с циклом asyncio для всех потоковых ответов"""
+
+    def __init__(self, client=None, warm=True):
+        self.client = client or AsyncAnswerClient()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        if warm:
+            asyncio.run_coroutine_threadsafe(self.client.warm(), self.loop)
+
+    def submit(self, question, conversation_history=None, context_enabled=None):
+        """Запускает потоковый запрос, возвращает AnswerStream сразу"""
+        stream = AnswerStream(question)
+        stream.loop = self.loop
+
+        def start():
+            if stream.cancelled:
+                # Отменён до старта: задача не создаётся, но поток должен закончиться
+                stream.finish()
+                return
+            stream.task = self.loop.create_task(self.run(stream, conversation_history, context_enabled))
+
+        self.loop.call_soon_threadsafe(start)
+        return stream
+
+    async def run(self, stream, conversation_history, context_enabled):
+        try:
+            if stream.cancelled:
+                # cancel() успел между start() и созданием задачи
+                return
+            async for event_type, content in self.client.stream(stream.question, conversation_history, context_enabled):
+                stream.put(event_type, content)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            stream.put('error', str(e) or type(e).__name__)
+        finally:
+            stream.finish()
+
+    def ask(self, question, conversation_history=None, context_enabled=None):
+        """Блокирующий запрос через цикл событий: полный ответ; ошибка - исключение"""
+        for event_type, content in self.submit(question, conversation_history, context_enabled).events():
+            if event_type == 'done':
+                return content
+            if event_type == 'error':
+                raise Exception(content)
+        raise Exception("ответ оборвался")
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
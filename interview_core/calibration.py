@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from .capture import rms_volume
+
+DEFAULT_PROFILE_FILE = "noise_profiles.json"
+
+
+def microphone_name(microphone):
+    """Имя устройства sr.Microphone - ключ профиля шума"""
+    try:
+        audio = microphone.pyaudio_module.PyAudio()
+        try:
+            if microphone.device_index is None:
+                return audio.get_default_input_device_info()['name']
+            return audio.get_device_info_by_index(microphone.device_index)['name']
+        finally:
+            audio.terminate()
+    except Exception:
+        return "default"
+
+
+class NoiseCalibrator:
+    """Порог энергии речи, сохранённый по устройствам.
+
+    При запуске порог берётся из профиля вместо секундной калибровки;
+    профиля нет - калибровка идёт в фоне. Дальше порог подстраивается
+    по паузам в потоке: уровень шума - нижний перцентиль громкости блоков
+    за последние window_seconds (паузы между словами и фразами), порог -
+    шум * ratio, как dynamic_energy_ratio в speech_recognition. Профиль
+    периодически сохраняется.
+    """
+
+    def __init__(self, device, path=DEFAULT_PROFILE_FILE, ratio=1.5, window_seconds=10,
+                 percentile=15, min_threshold=50, save_interval=30):
+        self.device = device
+        self.path = path
+        self.ratio = ratio
+        self.window_seconds = window_seconds
+        self.percentile = percentile
+        self.min_threshold = min_threshold
+        self.save_interval = save_interval
+        self.threshold = None
+        self.noise_rms = None
+        self.levels = None
+        self.observed = 0
+        self.last_saved = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def read_profiles(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def load(self):
+        """Порог из профиля устройства или None"""
+        profile = self.read_profiles().get(self.device)
+        if profile:
+            self.threshold = profile['energy_threshold']
+            self.noise_rms = profile.get('noise_rms')
+        return self.threshold
+
+    def save(self):
+        """Сохраняет профиль в фоне, не трогая профили других устройств"""
+        self.last_saved = time.time()
+        profile = {
+            "energy_threshold": round(self.threshold, 1),
+            "noise_rms": round(self.noise_rms, 1) if self.noise_rms else None,
+            "updated": datetime.now().isoformat(),
+        }
+        threading.Thread(target=self.write_profile, args=(profile,), daemon=True).start()
+
+    def write_profile(self, profile):
+        with self.lock:
+            profiles = self.read_profiles()
+            profiles[self.device] = profile
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(profiles, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Не удалось сохранить профиль шума: {e}")
+
+    def update(self, threshold):
+        """Принимает порог, подобранный снаружи (например, dynamic_energy_threshold)"""
+        self.threshold = max(threshold, self.min_threshold)
+        if time.time() - self.last_saved >= self.save_interval:
+            self.save()
+        return self.threshold
+
+    def observe(self, samples, rate):
+        """Очередной блок потока: уточняет уровень шума, возвращает текущий порог"""
+        if self.levels is None:
+            self.levels = deque(maxlen=max(int(self.window_seconds * rate / max(len(samples), 1)), 10))
+        self.levels.append(rms_volume(samples))
+        self.observed += 1
+        
+        # Пока окно не набралось наполовину, речь в начале исказила бы оценку
+        warming_up = len(self.levels) < self.levels.maxlen // 2
+        if (warming_up and self.threshold is not None) or self.observed % 8:
+            return self.threshold
+        self.noise_rms = float(np.percentile(self.levels, self.percentile))
+        return self.update(self.noise_rms * self.ratio)
+
+    def calibrate(self, microphone, recognizer, duration=1):
+        """Разовая калибровка по микрофону (блокирует на duration секунд)"""
+        with microphone as source:
+            recognizer.adjust_for_ambient_noise(source, duration=duration)
+        self.noise_rms = recognizer.energy_threshold / self.ratio
+        self.threshold = recognizer.energy_threshold
+        self.save()
+
+    def calibrate_in_background(self, microphone, recognizer, duration=1):
+        """Калибровка в фоне; перед открытием микрофона нужно вызвать wait()"""
+        def run():
+            try:
+                self.calibrate(microphone, recognizer, duration)
+                print(f"✅ Микрофон откалиброван: порог {self.threshold:.0f}")
+            except Exception as e:
+                print(f"❌ Ошибка калибровки микрофона: {e}")
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def wait(self):
+        """Ждёт окончания фоновой калибровки, если она идёт"""
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def listen(self, microphone, recognizer, phrase_time_limit=None):
+        """recognizer.listen после калибровки; подобранный им порог запоминается в профиле"""
+        self.wait()
+        with microphone as source:
+            audio = recognizer.listen(source, phrase_time_limit=phrase_time_limit)
+        # listen подстраивает порог по тишине перед фразой
+        self.update(recognizer.energy_threshold)
+        return audio
+
+
+def create_calibration(config, microphone, recognizer):
+    """NoiseCalibrator для микрофона: порог из профиля, а без профиля - калибровка в фоне.
+
+    Не падает: если устройство не удалось опросить, остаётся порог
+    recognizer по умолчанию, а профиль пишется под именем "default".
+    """
+    path = (config or {}).get('speech', {}).get('calibration_file', DEFAULT_PROFILE_FILE)
+    calibration = NoiseCalibrator(microphone_name(microphone), path)
+    try:
+        threshold = calibration.load()
+        if threshold:
+            recognizer.energy_threshold = threshold
+            print(f"✅ Микрофон готов! Порог шума из профиля: {threshold:.0f}")
+        else:
+            print("🔄 Профиля шума нет, калибрую в фоне...")
+            calibration.calibrate_in_background(microphone, recognizer)
+    except Exception as e:
+        print(f"❌ Ошибка микрофона: {e}")
+    return calibration
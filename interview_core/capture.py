@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import speech_recognition as sr
+
+from .preprocess import SPEECH_RATE, to_speech_rate
+
+# Фраза из потока захвата: кадры, частота, время начала/конца (time.time) и источник
+Segment = namedtuple('Segment', 'samples rate start_time end_time source')
+
+# Флаги PortAudio (pyaudio.paContinue, pyaudio.paInputOverflow)
+PA_CONTINUE = 0
+PA_INPUT_OVERFLOW = 0x2
+
+
+def rms_volume(samples):
+    """Среднеквадратичная громкость блока int16 сэмплов"""
+    if samples.size == 0:
+        return 0.0
+    samples = samples.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def write_wav(filename, samples, channels, rate, sample_width=2):
+    """Записывает сэмплы в WAV файл без промежуточного копирования"""
+    with wave.open(filename, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(np.ascontiguousarray(samples))
+
+
+def to_audio_data(samples, rate, sample_width=2, target_rate=SPEECH_RATE):
+    """Собирает sr.AudioData прямо из буфера сэмплов, без WAV на диске.
+
+    Звук сводится в моно и передискретизируется до target_rate: распознаванию
+    больше не нужно, а объём для кодирования и отправки меньше в разы.
+    """
+    mono = np.ascontiguousarray(to_speech_rate(samples, rate, target_rate))
+    return sr.AudioData(mono.tobytes(), target_rate, sample_width)
+
+
+def archive_capture(archive_dir, samples, channels, rate, sample_width=2):
+    """Сохраняет запись в архив в фоне, каждая запись в своём файле"""
+    os.makedirs(archive_dir, exist_ok=True)
+    filename = os.path.join(archive_dir, f"capture_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav")
+    threading.Thread(
+        target=write_wav,
+        args=(filename, samples, channels, rate, sample_width),
+        daemon=True
+    ).start()
+    return filename
+
+
+class AudioRingBuffer:
+    """Предвыделенный кольцевой буфер int16 фиксированного размера"""
+
+    def __init__(self, max_frames, channels):
+        self.max_frames = max_frames
+        self.channels = channels
+        self.buffer = np.empty((max_frames, channels), dtype=np.int16)
+        self.total_frames = 0
+
+    def __len__(self):
+        return min(self.total_frames, self.max_frames)
+
+    @property
+    def full(self):
+        return self.total_frames >= self.max_frames
+
+    @property
+    def write_pos(self):
+        return self.total_frames % self.max_frames
+
+    @property
+    def first_frame(self):
+        """Абсолютный индекс самого старого кадра в буфере"""
+        return self.total_frames - len(self)
+
+    def clear(self):
+        """Сбрасывает буфер без освобождения памяти"""
+        self.total_frames = 0
+
+    def write(self, data):
+        """Копирует блок (bytes или ndarray) в буфер, возвращает его как массив кадров"""
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        count = len(frames)
+        start = self.total_frames
+        kept = frames
+        if count > self.max_frames:
+            kept = frames[-self.max_frames:]
+            start += count - self.max_frames
+        self._store(start % self.max_frames, kept)
+        self.total_frames += count
+        return frames
+
+    def _store(self, pos, frames):
+        first = min(len(frames), self.max_frames - pos)
+        self.buffer[pos:pos + first] = frames[:first]
+        self.buffer[:len(frames) - first] = frames[first:]
+
+    def view(self):
+        """Возвращает записанные кадры по порядку.
+
+        Пока буфер не переполнялся, это view без копирования,
+        после переполнения - одна склейка двух половин.
+        """
+        if self.total_frames <= self.max_frames:
+            return self.buffer[:self.total_frames]
+        return np.concatenate((self.buffer[self.write_pos:], self.buffer[:self.write_pos]))
+
+    def slice(self, start, end):
+        """Копия кадров [start, end) по абсолютным индексам потока"""
+        start = max(start, self.first_frame)
+        end = min(end, self.total_frames)
+        if end <= start:
+            return self.buffer[:0].copy()
+        pos = start % self.max_frames
+        count = end - start
+        if pos + count <= self.max_frames:
+            return self.buffer[pos:pos + count].copy()
+        return np.concatenate((self.buffer[pos:], self.buffer[:pos + count - self.max_frames]))
+
+
+class CaptureEngine:
+    """Захват аудио с устройства PyAudio в предвыделенный кольцевой буфер.
+
+    В callback-режиме PortAudio сам вызывает обработчик, который только
+    кладёт блок в очередь; запись в буфер, индикатор громкости и детектор
+    речи работают в потоке-потребителе и не могут задержать захват.
+    """
+
+    def __init__(self, audio, device_index, channels=2, rate=44100, chunk_size=1024,
+                 callback_mode=True, queue_seconds=5, source='loopback'):
+        self.audio = audio
+        self.source = source
+        self.device_index = device_index
+        self.channels = channels
+        self.rate = rate
+        self.chunk_size = chunk_size
+        self.sample_width = 2
+        # Устройство без своего темпа (проигрывание WAV с speed=0) не ждёт потребителя -
+        # callback переполнил бы очередь, поэтому только блокирующее чтение
+        self.callback_mode = callback_mode and getattr(audio, 'paced', True)
+        self.max_pending = max(int(queue_seconds * rate / chunk_size), 1)
+        self.poll_interval = chunk_size / rate / 2
+        self.started_at = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Сбрасывает счётчики потерь"""
+        self.overflows = 0
+        self.dropped_frames = 0
+
+    @property
+    def lost_audio(self):
+        return self.overflows > 0 or self.dropped_frames > 0
+
+    def frames_for(self, duration):
+        """Размер буфера в кадрах для записи длиной duration секунд"""
+        chunks = -(-int(duration * self.rate) // self.chunk_size)
+        return max(chunks, 1) * self.chunk_size
+
+    def open_stream(self, stream_callback=None):
+        """Открывает входной поток PyAudio"""
+        return self.audio.open(
+            format=self.audio.get_format_from_width(self.sample_width),
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.chunk_size,
+            stream_callback=stream_callback
+        )
+
+    def read_chunks(self, is_active):
+        """Генератор блоков с устройства, пока is_active() возвращает True"""
+        self.reset_stats()
+        self.started_at = time.time()
+        if self.callback_mode:
+            return self._callback_chunks(is_active)
+        return self._blocking_chunks(is_active)
+
+    def _blocking_chunks(self, is_active):
+        stream = self.open_stream()
+        try:
+            while is_active():
+                try:
+                    yield stream.read(self.chunk_size, exception_on_overflow=False)
+                except OSError:
+                    break
+        finally:
+            stream.close()
+
+    def _callback_chunks(self, is_active):
+        # deque.append/popleft атомарны: один производитель (PortAudio),
+        # один потребитель, блокировки не нужны
+        pending = deque()
+        
+        def callback(in_data, frame_count, time_info, status):
+            if status & PA_INPUT_OVERFLOW:
+                self.overflows += 1
+            if len(pending) >= self.max_pending:
+                self.dropped_frames += frame_count
+            else:
+                pending.append(in_data)
+            return None, PA_CONTINUE
+        
+        stream = self.open_stream(callback)
+        try:
+            while is_active():
+                if pending:
+                    yield pending.popleft()
+                elif stream.is_active():
+                    time.sleep(self.poll_interval)
+                else:
+                    break
+        finally:
+            stream.close()
+
+    def record(self, duration, is_recording, on_chunk=None):
+        """Записывает до duration секунд, пока is_recording() возвращает True.
+
+        on_chunk получает каждый блок как массив кадров (view, без копии).
+        Возвращает массив кадров формы (frames, channels).
+        """
+        ring = AudioRingBuffer(self.frames_for(duration), self.channels)
+        with closing(self.read_chunks(is_recording)) as chunks:
+            for data in chunks:
+                chunk = ring.write(data)
+                if on_chunk:
+                    on_chunk(chunk)
+                if ring.full:
+                    break
+        return ring.view()
+
+    def time_at(self, frame):
+        """Время (time.time) кадра с абсолютным индексом frame"""
+        return self.started_at + frame / self.rate
+
+    def frame_at(self, timestamp):
+        """Абсолютный индекс кадра для времени timestamp (обратное к time_at)"""
+        return int(round((timestamp - self.started_at) * self.rate))
+
+    def segment(self, ring, start, end):
+        """Вырезает фразу из буфера вместе с временными метками"""
+        return Segment(ring.slice(start, end), self.rate, self.time_at(start), self.time_at(end), self.source)
+
+    def listen(self, is_listening, on_segment, vad, on_chunk=None, on_cut=None):
+        """Непрерывный захват с автоматической нарезкой фраз детектором речи.
+
+        Законченные фразы (Segment) передаются в on_segment по очереди
+        в отдельном потоке, чтобы распознавание не задерживало чтение
+        с устройства. on_cut, если задан, вызывается сразу в потоке
+        захвата и должен быть дешёвым.
+        """
+        ring = AudioRingBuffer(self.frames_for(vad.max_segment_s + 5), self.channels)
+        segments = queue.Queue()
+        
+        def dispatch():
+            while True:
+                segment = segments.get()
+                if segment is None:
+                    return
+                on_segment(segment)
+        
+        worker = threading.Thread(target=dispatch, daemon=True)
+        worker.start()
+        
+        try:
+            for data in self.read_chunks(is_listening):
+                chunk = ring.write(data)
+                if on_chunk:
+                    on_chunk(chunk)
+                for start, end in vad.process(chunk):
+                    self._cut(segments, self.segment(ring, start, end), on_cut)
+            
+            final = vad.flush()
+            if final:
+                self._cut(segments, self.segment(ring, *final), on_cut)
+        finally:
+            segments.put(None)
+        return worker
+
+    def _cut(self, segments, segment, on_cut):
+        if on_cut:
+            on_cut(segment)
+        segments.put(segment)
+
+
+class PrerollListener:
+    """Постоянно открытый поток захвата, хранящий последние секунды звука.
+
+    Запись по запросу начинается с этого запаса, поэтому не теряется
+    начало вопроса и не тратится время на открытие устройства.
+    """
+
+    def __init__(self, engine, preroll_seconds=2):
+        self.engine = engine
+        self.preroll_seconds = preroll_seconds
+        self.preroll = AudioRingBuffer(engine.frames_for(preroll_seconds), engine.channels)
+        self.lock = threading.Lock()
+        self.capture = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Открывает поток и начинает накапливать звук в фоне"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Останавливает фоновый захват"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def run(self):
+        try:
+            with closing(self.engine.read_chunks(lambda: self.running)) as chunks:
+                for data in chunks:
+                    with self.lock:
+                        chunk = self.preroll.write(data)
+                        capture = self.capture
+                        if capture:
+                            ring, on_chunk, done = capture
+                            if not ring.full:
+                                ring.write(data)
+                            if ring.full:
+                                done.set()
+                    if capture and on_chunk:
+                        on_chunk(chunk)
+        finally:
+            self.running = False
+
+    def record(self, duration, is_recording, on_chunk=None):
+        """Как CaptureEngine.record, но запись начинается с накопленного запаса.
+
+        Запас передаётся в on_chunk первым блоком.
+        """
+        ring = AudioRingBuffer(self.engine.frames_for(duration + self.preroll_seconds), self.engine.channels)
+        done = threading.Event()
+        with self.lock:
+            if len(self.preroll):
+                seed = ring.write(self.preroll.view())
+                if on_chunk:
+                    on_chunk(seed)
+            self.capture = (ring, on_chunk, done)
+        try:
+            while is_recording() and self.running:
+                if done.wait(self.engine.poll_interval):
+                    break
+        finally:
+            with self.lock:
+                self.capture = None
+        return ring.view()
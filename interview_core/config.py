@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+CONFIG_PATH = 'config.json'
+
+
+def load_config(path=CONFIG_PATH, default=None):
+    """Загружает конфигурацию из config.json"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return default if default is not None else {}
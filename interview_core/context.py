@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+import time
+from datetime import datetime
+
+SUMMARY_PROMPT = (
+    "Сожми разговор на техническом собеседовании в краткую сводку, не больше {words} слов: "
+    "какие темы спрашивали, что ответили, что важно помнить дальше. Только сводка, без вступлений.\n\n"
+    "Прежняя сводка:\n{summary}\n\nНовые реплики:\n{dialogue}"
+)
+SUMMARY_HEADER = "Краткое содержание предыдущей части собеседования:\n"
+
+
+def estimate_tokens(text):
+    """Примерное число токенов: ~3.5 символа на токен плюс служебные токены сообщения"""
+    return len(text) * 2 // 7 + 4
+
+
+def dialogue_text(messages):
+    return "\n".join(f"{'Вопрос' if m['role'] == 'user' else 'Ответ'}: {m['content']}" for m in messages)
+
+
+def extractive_summary(summary, messages, limit_tokens):
+    """Сводка без модели: первые предложения реплик, самое старое отбрасывается первым"""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        first = re.split(r'(?<=[.!?])\s', message['content'].strip(), maxsplit=1)[0][:200]
+        lines.append(f"{'Вопрос' if message['role'] == 'user' else 'Ответ'}: {first}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > limit_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationContext:
+    """Контекст диалога в бюджете токенов: свежие реплики целиком + сводка старых.
+
+    Каждой реплике считается примерный размер в токенах. Когда сумма
+    выходит за max_tokens, старые реплики - столько, чтобы свежие
+    уложились в recent_tokens, - уходят в фоновое сжатие: summarize(прежняя
+    сводка, реплики) возвращает новую сводку не больше summary_tokens.
+    Запрос на ответ этого не ждёт: пока сводка готовится, реплики остаются
+    в запросе, а готовая сводка заменяет их одним шагом. Так префикс
+    запроса (сводка всегда первой, затем реплики по порядку) меняется
+    только раз за сжатие, а между сжатиями лишь дописывается - KV кэш
+    модели переиспользуется. Запрос никогда не больше hard_limit: если
+    сводка запаздывает, сжимаемые реплики убираются сразу, а при
+    дальнейшем росте - и следующие старые, они дописываются к сводке
+    первыми предложениями. Без summarize (или если он упал) сводка
+    собирается из первых предложений реплик.
+    """
+
+    def __init__(self, max_tokens=2000, recent_tokens=1000, summary_tokens=300, summarize=None, hard_limit=None):
+        self.max_tokens = max_tokens
+        # Сводка не больше пятой части бюджета: иначе после сжатия запрос
+        # сразу снова у предела и сжимается на каждом вопросе
+        self.summary_tokens = min(summary_tokens, max_tokens // 5)
+        self.recent_tokens = min(recent_tokens, max_tokens - self.summary_tokens)
+        self.hard_limit = hard_limit or max_tokens * 3 // 2
+        self.summarize = summarize
+        self.entries = []
+        self.summary = ""
+        # Сколько первых реплик сейчас сжимается и убраны ли они уже из запроса
+        self.compacting = 0
+        self.dropped = False
+        # Реплики сверх сжимаемых, убранные по hard_limit до готовности сводки
+        self.overflow = []
+        self.summaries = 0
+        self.summary_seconds = 0.0
+        self.generation = 0
+        self.idle = threading.Event()
+        self.idle.set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def tokens(self):
+        """Примерный размер того, что уйдёт в запрос"""
+        with self.lock:
+            return self.total()
+
+    def summary_size(self):
+        return estimate_tokens(SUMMARY_HEADER + self.summary) if self.summary else 0
+
+    def total(self):
+        return self.summary_size() + sum(tokens for _, tokens in self.entries)
+
+    def add(self, role, content, **extra):
+        """Добавляет реплику; при превышении бюджета старые уходят в фоновое сжатие"""
+        message = {"role": role, "content": content, "timestamp": datetime.now().isoformat(), **extra}
+        with self.lock:
+            self.entries.append((message, estimate_tokens(content)))
+            self.compact()
+
+    def compact(self):
+        if not self.compacting:
+            self.start_compaction()
+        if self.compacting:
+            self.enforce_hard_limit()
+
+    def start_compaction(self):
+        total = self.total()
+        if total <= self.max_tokens:
+            return
+        recent = total - self.summary_size()
+        count = 0
+        while count < len(self.entries) - 1 and recent > self.recent_tokens:
+            recent -= self.entries[count][1]
+            count += 1
+        if not count:
+            return
+        self.compacting = count
+        self.dropped = False
+        self.idle.clear()
+        batch = [message for message, _ in self.entries[:count]]
+        threading.Thread(target=self.summarize_batch, args=(self.generation, self.summary, batch), daemon=True).start()
+
+    def enforce_hard_limit(self):
+        """Сводка запаздывает, а запрос уже больше hard_limit: старые реплики убираются сразу"""
+        if self.total() <= self.hard_limit:
+            return
+        if not self.dropped:
+            del self.entries[:self.compacting]
+            self.dropped = True
+        while len(self.entries) > 1 and self.total() > self.hard_limit:
+            message, _ = self.entries.pop(0)
+            self.overflow.append(message)
+
+    def summarize_batch(self, generation, summary, batch):
+        """Фоновый поток: сжимает реплики в сводку и подменяет их ею одним шагом"""
+        started = time.time()
+        new_summary = None
+        if self.summarize:
+            try:
+                new_summary = (self.summarize(summary, batch) or "").strip()
+            except Exception as e:
+                print(f"⚠️ Не удалось сжать историю: {e}")
+        if not new_summary:
+            new_summary = extractive_summary(summary, batch, self.summary_tokens)
+        elif estimate_tokens(new_summary) > self.summary_tokens:
+            new_summary = extractive_summary("", [{"role": "user", "content": new_summary}], self.summary_tokens)
+
+        with self.lock:
+            if generation != self.generation:
+                # История очищена, сводка уже не нужна
+                return
+            if not self.dropped:
+                del self.entries[:self.compacting]
+            if self.overflow:
+                new_summary = extractive_summary(new_summary, self.overflow, self.summary_tokens)
+            self.compacting = 0
+            self.dropped = False
+            self.overflow = []
+            self.summary = new_summary
+            self.summaries += 1
+            self.summary_seconds += time.time() - started
+            # Пока шло сжатие, могли прийти новые реплики
+            self.compact()
+            if not self.compacting:
+                self.idle.set()
+
+    def messages(self):
+        """Сообщения для запроса: сводка (если есть) и свежие реплики, только role и content"""
+        with self.lock:
+            messages = [{"role": "system", "content": SUMMARY_HEADER + self.summary}] if self.summary else []
+            messages += [{"role": m["role"], "content": m["content"]} for m, _ in self.entries]
+        return messages
+
+    def set_budget(self, max_tokens):
+        """Новый бюджет; свежим репликам и жёсткому пределу остаётся та же доля, что была"""
+        with self.lock:
+            recent_share = self.recent_tokens / self.max_tokens
+            summary_share = self.summary_tokens / self.max_tokens
+            hard_share = self.hard_limit / self.max_tokens
+            self.max_tokens = max_tokens
+            self.summary_tokens = int(max_tokens * summary_share)
+            self.recent_tokens = int(max_tokens * recent_share)
+            self.hard_limit = int(max_tokens * hard_share)
+            self.compact()
+
+    def clear(self):
+        with self.lock:
+            self.entries = []
+            self.summary = ""
+            self.compacting = 0
+            self.dropped = False
+            self.overflow = []
+            self.generation += 1
+            self.idle.set()
+
+    def wait(self, timeout=None):
+        """Ждёт окончания фонового сжатия"""
+        return self.idle.wait(timeout)
+
+    def summary_line(self):
+        line = f"{len(self.entries)} сообщений, ~{self.tokens} токенов"
+        if self.summary:
+            line += f", сводка ~{estimate_tokens(self.summary)} токенов"
+        if self.compacting:
+            line += ", сжимается..."
+        return line
+
+
+def summary_prompt(summary, messages, limit_tokens):
+    """Запрос к модели на сжатие реплик в сводку"""
+    return SUMMARY_PROMPT.format(
+        words=max(limit_tokens // 2, 20),
+        summary=summary or "(нет)",
+        dialogue=dialogue_text(messages)
+    )
+
+
+def create_context(config, summarize=None):
+    """ConversationContext по секции context из config.json"""
+    options = dict((config or {}).get('context', {}))
+    return ConversationContext(summarize=summarize, **options)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from .replay import ReplayAudio
+
+
+def list_devices(audio):
+    """Список аудио устройств: (индекс, имя, число входных каналов)"""
+    devices = []
+    for i in range(audio.get_device_count()):
+        info = audio.get_device_info_by_index(i)
+        devices.append((i, info['name'], info.get('maxInputChannels', 0)))
+    return devices
+
+
+def find_device(audio, name='blackhole'):
+    """Индекс первого устройства ввода, в имени которого встречается name"""
+    for index, device_name, inputs in list_devices(audio):
+        if name in device_name.lower() and inputs > 0:
+            return index
+    return None
+
+
+def open_audio(config=None):
+    """PyAudio, либо проигрыватель WAV, если в config.json задан speech.replay_file"""
+    speech = (config or {}).get('speech', {})
+    if speech.get('replay_file'):
+        return ReplayAudio(speech['replay_file'], speed=speech.get('replay_speed', 1.0))
+    
+    import pyaudio
+    return pyaudio.PyAudio()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+
+SPEAKERS = {
+    'loopback': 'interviewer',
+    'mic': 'candidate',
+}
+
+
+class DualSourceListener:
+    """Одновременный захват системного звука и микрофона.
+
+    Фразы из loopback (BlackHole) помечаются как речь интервьюера,
+    фразы с микрофона - как речь кандидата. Оба потока размечены
+    общим временем (time.time), поэтому фразы микрофона, почти целиком
+    совпадающие по времени с речью интервьюера, считаются эхом из
+    динамиков и отбрасываются.
+    """
+
+    def __init__(self, loopback_engine, mic_engine, loopback_vad, mic_vad,
+                 echo_overlap=0.5, history_seconds=120):
+        self.loopback_engine = loopback_engine
+        self.mic_engine = mic_engine
+        self.loopback_vad = loopback_vad
+        self.mic_vad = mic_vad
+        self.echo_overlap = echo_overlap
+        self.history_seconds = history_seconds
+        self.interviewer_spans = deque()
+        self.echo_segments = 0
+
+    def speaker(self, segment):
+        """Кто говорит во фразе: 'interviewer' или 'candidate'"""
+        return SPEAKERS.get(segment.source, 'interviewer')
+
+    def interviewer_active_since(self):
+        """Начало текущей (ещё не законченной) фразы интервьюера или None"""
+        start = self.loopback_vad.segment_start
+        if start is None or self.loopback_engine.started_at is None:
+            return None
+        return self.loopback_engine.time_at(start)
+
+    def interviewer_overlap(self, start_time, end_time):
+        """Доля интервала [start_time, end_time], занятая речью интервьюера"""
+        spans = list(self.interviewer_spans)
+        active_since = self.interviewer_active_since()
+        if active_since is not None:
+            spans.append((active_since, time.time()))
+        
+        covered = sum(
+            max(0.0, min(end, end_time) - max(start, start_time))
+            for start, end in spans
+        )
+        return covered / max(end_time - start_time, 1e-6)
+
+    def listen(self, is_listening, on_interviewer, on_candidate=None, on_chunk=None, on_cut=None):
+        """Слушает оба источника, пока is_listening() возвращает True.
+
+        on_interviewer получает фразы интервьюера в потоке loopback,
+        on_candidate - фразы кандидата в потоке микрофона, поэтому
+        обработка речи кандидата не задерживает основной путь.
+        on_cut, как в CaptureEngine.listen, вызывается в потоке loopback.
+        """
+        def remember(segment):
+            if on_cut:
+                on_cut(segment)
+            self.interviewer_spans.append((segment.start_time, segment.end_time))
+            while self.interviewer_spans and self.interviewer_spans[0][1] < segment.end_time - self.history_seconds:
+                self.interviewer_spans.popleft()
+        
+        def candidate(segment):
+            if self.interviewer_overlap(segment.start_time, segment.end_time) >= self.echo_overlap:
+                self.echo_segments += 1
+                return
+            if on_candidate:
+                on_candidate(segment)
+        
+        mic_workers = []
+        
+        def run_mic():
+            mic_workers.append(self.mic_engine.listen(is_listening, candidate, self.mic_vad))
+        
+        mic_thread = threading.Thread(target=run_mic, daemon=True)
+        mic_thread.start()
+        
+        loopback_worker = self.loopback_engine.listen(
+            is_listening, on_interviewer, self.loopback_vad, on_chunk, on_cut=remember
+        )
+        mic_thread.join()
+        return [loopback_worker] + mic_workers
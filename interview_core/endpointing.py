@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from .preprocess import downmix
+
+
+def split_at_silence(mono, rate, max_seconds=8, min_seconds=2, frame_ms=20):
+    """Границы кусков записи не длиннее max_seconds, разрезанных в самых тихих местах.
+
+    Возвращает список (start, end) в сэмплах; куски короче min_seconds
+    получаются только в конце записи.
+    """
+    frame = max(int(rate * frame_ms / 1000), 1)
+    count = len(mono) // frame
+    energy = np.abs(mono[:count * frame].reshape(count, frame).astype(np.float32)).mean(axis=1)
+    max_frames = max(int(max_seconds * 1000 / frame_ms), 1)
+    min_frames = min(max(int(min_seconds * 1000 / frame_ms), 1), max_frames)
+
+    bounds = []
+    start = 0
+    while count - start > max_frames:
+        # Из одинаково тихих мест берётся самое позднее - куски длиннее и их меньше
+        window = energy[start + min_frames:start + max_frames][::-1]
+        cut = start + max_frames - 1 - int(np.argmin(window))
+        bounds.append((start * frame, cut * frame))
+        start = cut
+    bounds.append((start * frame, len(mono)))
+    return bounds
+
+
+class VoiceActivityDetector:
+    """Детектор речи: энергия + переходы через ноль + удержание (hangover).
+
+    Принимает блоки кадров из потока захвата и возвращает границы
+    законченных фраз в абсолютных индексах кадров этого потока.
+    """
+
+    def __init__(self, rate, energy_threshold=500, zcr_threshold=0.25, frame_ms=20,
+                 start_ms=60, hangover_ms=700, min_speech_ms=250, max_segment_s=30,
+                 padding_ms=200):
+        self.rate = rate
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.max_segment_s = max_segment_s
+
+        self.frame_len = max(int(rate * frame_ms / 1000), 2)
+        self.start_frames = max(-(-start_ms // frame_ms), 1)
+        self.hangover_frames = max(-(-hangover_ms // frame_ms), 1)
+        self.min_speech_frames = max(-(-min_speech_ms // frame_ms), 1)
+        self.max_segment_len = int(max_segment_s * rate)
+        self.padding = int(rate * padding_ms / 1000)
+
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает состояние детектора"""
+        self.pending = np.empty(0, dtype=np.int16)
+        self.position = 0
+        self.speech_run = 0
+        self.run_start = 0
+        self.segment_start = None
+        self.speech_frames = 0
+        self.silence_run = 0
+        self.last_speech_end = 0
+
+    def analyze(self, mono):
+        """Маска речи для каждого кадра анализа (векторно по всему блоку)"""
+        count = len(mono) // self.frame_len
+        frames = mono[:count * self.frame_len].reshape(count, self.frame_len).astype(np.float32)
+        energy = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_len - 1)
+        voiced = energy > self.energy_threshold
+        unvoiced = (energy > self.energy_threshold * 0.5) & (zcr > self.zcr_threshold)
+        return voiced | unvoiced
+
+    def process(self, chunk):
+        """Обрабатывает блок кадров, возвращает список законченных фраз (start, end)"""
+        mono = downmix(chunk)
+        if self.pending.size:
+            mono = np.concatenate((self.pending, mono))
+
+        count = len(mono) // self.frame_len
+        flags = self.analyze(mono)
+        self.pending = mono[count * self.frame_len:].copy()
+
+        segments = []
+        for i, is_speech in enumerate(flags):
+            segment = self.step(bool(is_speech), self.position + i * self.frame_len)
+            if segment:
+                segments.append(segment)
+        self.position += count * self.frame_len
+        return segments
+
+    def step(self, is_speech, frame_start):
+        """Переход конечного автомата на один кадр анализа"""
+        frame_end = frame_start + self.frame_len
+
+        if self.segment_start is None:
+            if not is_speech:
+                self.speech_run = 0
+                return None
+            if self.speech_run == 0:
+                self.run_start = frame_start
+            self.speech_run += 1
+            if self.speech_run >= self.start_frames:
+                self.segment_start = max(self.run_start - self.padding, 0)
+                self.speech_frames = self.speech_run
+                self.silence_run = 0
+                self.last_speech_end = frame_end
+            return None
+
+        if is_speech:
+            self.speech_frames += 1
+            self.silence_run = 0
+            self.last_speech_end = frame_end
+        else:
+            self.silence_run += 1
+
+        if self.silence_run >= self.hangover_frames or frame_end - self.segment_start >= self.max_segment_len:
+            return self.finish(frame_end)
+        return None
+
+    def finish(self, end):
+        """Закрывает текущую фразу; слишком короткие отбрасываются"""
+        segment = (self.segment_start, min(end, self.last_speech_end + self.padding))
+        long_enough = self.speech_frames >= self.min_speech_frames
+        self.segment_start = None
+        self.speech_run = 0
+        self.speech_frames = 0
+        self.silence_run = 0
+        return segment if long_enough else None
+
+    def flush(self):
+        """Закрывает незаконченную фразу в конце потока"""
+        if self.segment_start is None:
+            return None
+        return self.finish(self.position)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+
+class Hedger:
+    """Один вопрос сразу нескольким провайдерам, ответ - от первого заговорившего.
+
+    open_stream(name, question) возвращает ProviderStream. Запросы идут
+    параллельно; чей первый фрагмент пришёл раньше, тот и отвечает,
+    остальные соединения закрываются. Упавший провайдер не мешает
+    дождаться другого. По каждому провайдеру считаются победы и время
+    до первого фрагмента, гонки пишутся в metrics_file (JSONL).
+    """
+
+    def __init__(self, names, open_stream, timeout=30, metrics_file=""):
+        self.names = list(names)
+        self.open_stream = open_stream
+        self.timeout = timeout
+        self.metrics_file = metrics_file
+        self.stats = {name: {"races": 0, "wins": 0, "errors": 0, "first_token": []} for name in self.names}
+
+    def race(self, question):
+        """Запускает гонку: (имя победителя, итератор фрагментов ответа); все упали - исключение"""
+        results = queue.Queue()
+        lock = threading.Lock()
+        streams = {}
+        state = {"winner": None}
+        started = time.time()
+
+        def run(name):
+            try:
+                stream = self.open_stream(name, question)
+                with lock:
+                    if state["winner"] is not None:
+                        stream.cancel()
+                        return
+                    streams[name] = stream
+                tokens = iter(stream)
+                first = next(tokens, None)
+                if first is None:
+                    raise Exception("пустой ответ")
+            except Exception as e:
+                with lock:
+                    if state["winner"] is None:
+                        results.put((name, None, e))
+                return
+            with lock:
+                if state["winner"] is not None:
+                    # Опоздал: гонка уже решена
+                    stream.cancel()
+                    return
+                results.put((name, (first, tokens), time.time() - started))
+
+        for name in self.names:
+            threading.Thread(target=run, args=(name,), daemon=True).start()
+
+        errors = {}
+        while len(errors) < len(self.names):
+            try:
+                name, tokens, detail = results.get(timeout=self.timeout)
+            except queue.Empty:
+                break
+            if tokens is None:
+                errors[name] = str(detail)
+                continue
+            with lock:
+                state["winner"] = name
+                for other, stream in streams.items():
+                    if other != name:
+                        stream.cancel()
+            self.record(name, detail, errors)
+            return name, self.tokens(*tokens)
+
+        with lock:
+            state["winner"] = ""
+            for stream in streams.values():
+                stream.cancel()
+        self.record(None, None, errors)
+        raise Exception("; ".join(f"{name}: {error}" for name, error in errors.items()) or "нет ответа")
+
+    @staticmethod
+    def tokens(first, rest):
+        yield first
+        yield from rest
+
+    def record(self, winner, first_token, errors):
+        for name in self.names:
+            self.stats[name]["races"] += 1
+            if name in errors:
+                self.stats[name]["errors"] += 1
+        if winner:
+            self.stats[winner]["wins"] += 1
+            self.stats[winner]["first_token"].append(first_token)
+
+        if not self.metrics_file:
+            return
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "providers": self.names,
+            "winner": winner,
+            "first_token_seconds": round(first_token, 3) if first_token is not None else None,
+            "errors": errors,
+        }
+        try:
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Не удалось записать метрики: {e}")
+
+    def summary(self):
+        parts = []
+        for name, stats in self.stats.items():
+            races = stats["races"]
+            line = f"{name}: побед {stats['wins']}/{races}" + (f" ({stats['wins'] / races:.0%})" if races else "")
+            if stats["first_token"]:
+                line += f", 1-й фрагмент {float(np.median(stats['first_token'])):.2f} с"
+            if stats["errors"]:
+                line += f", ошибок {stats['errors']}"
+            parts.append(line)
+        return "; ".join(parts)
+
+
+def create_hedger(config, open_stream):
+    """Hedger по секции hedging из config.json или None"""
+    options = dict((config or {}).get('hedging', {}))
+    if not options.pop('enabled', False):
+        return None
+    names = options.pop('providers', ['ollama', 'deepseek'])
+    if len(names) < 2:
+        return None
+    return Hedger(names, open_stream, **options)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+
+from .async_answers import AsyncAnswerClient
+from .sse import ChunkedDecoder
+from .warmup import OLLAMA_URL
+
+# Тот же промпт, что у Rust сервиса: ответы обоих путей сравнимы
+SYSTEM_PROMPT = (
+    "Ты эксперт-программист и помощник для технических собеседований. "
+    "Отвечай четко, структурированно и с примерами кода когда это уместно."
+)
+
+
+class AsyncOllamaChatClient(AsyncAnswerClient):
+    """Прямой asyncio клиент Ollama /api/chat, без Rust сервиса посередине.
+
+    События те же, что у AsyncAnswerClient - (type, content), так что
+    AnswerLoop и GUI разницы не видят. Сообщения всегда начинаются с
+    одного и того же системного промпта, за ним сводка и реплики
+    ConversationContext: между сжатиями контекста история только
+    дописывается, и Ollama находит общий префикс с прошлым запросом в KV
+    кэше модели, заново считая лишь новые токены. Сжатие меняет префикс
+    и стоит одного полного пересчёта - поэтому контекст сжимается редко и
+    крупными порциями. /api/chat не возвращает context, как
+    /api/generate, - переиспользование держится на неизменном префиксе.
+    Сколько токенов промпта пришлось считать, видно в last_stats.
+    """
+
+    def __init__(self, model, base_url=OLLAMA_URL, system_prompt=SYSTEM_PROMPT, keep_alive="30m",
+                 options=None, timeout=None, connect_timeout=None):
+        super().__init__(base_url, timeout, connect_timeout)
+        self.model = model
+        self.system_prompt = system_prompt
+        self.keep_alive = keep_alive
+        self.options = options
+        self.last_stats = {}
+
+    def messages(self, question, conversation_history=None, context_enabled=None):
+        """Системный промпт, история и вопрос (если история им ещё не заканчивается)"""
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if context_enabled is not False and conversation_history:
+            messages += [{"role": m["role"], "content": m["content"]} for m in conversation_history]
+        if messages[-1] != {"role": "user", "content": question}:
+            messages.append({"role": "user", "content": question})
+        return messages
+
+    async def stream_batches(self, question, conversation_history=None, context_enabled=None, read_size=65536):
+        """Списки событий, пришедших за одно чтение из сокета (NDJSON /api/chat)"""
+        payload = {
+            "model": self.model,
+            "messages": self.messages(question, conversation_history, context_enabled),
+            "stream": True,
+            "keep_alive": self.keep_alive,
+        }
+        if self.options:
+            payload["options"] = self.options
+
+        reader, writer, headers = await self.request(payload, '/chat', 'application/x-ndjson')
+        chunked = headers.get('transfer-encoding', '').lower() == 'chunked'
+        decoder = ChunkedDecoder() if chunked else None
+        buffer = b""
+        parts = []
+        finished = False
+        reusable = False
+        try:
+            while not (decoder and decoder.finished):
+                data = await asyncio.wait_for(reader.read(read_size), self.timeout)
+                if not data:
+                    break
+                if decoder:
+                    data = decoder.feed(data)
+                if finished:
+                    continue
+                *lines, buffer = (buffer + data).split(b"\n")
+                batch = []
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if item.get('error'):
+                        batch.append(('error', item['error']))
+                        finished = True
+                        break
+                    content = (item.get('message') or {}).get('content', '')
+                    if content:
+                        parts.append(content)
+                        batch.append(('word', content))
+                    if item.get('done'):
+                        self.record(item)
+                        batch.append(('done', "".join(parts)))
+                        finished = True
+                        break
+                if batch:
+                    yield batch
+                if finished and not chunked:
+                    break
+            reusable = finished and chunked and decoder.finished \
+                and headers.get('connection', '').lower() != 'close'
+        finally:
+            if reusable:
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+
+    def record(self, item):
+        """Статистика последнего ответа из финального сообщения Ollama"""
+        self.last_stats = {
+            "prompt_tokens": item.get('prompt_eval_count', 0),
+            "prompt_seconds": item.get('prompt_eval_duration', 0) / 1e9,
+            "load_seconds": item.get('load_duration', 0) / 1e9,
+            "eval_tokens": item.get('eval_count', 0),
+            "eval_seconds": item.get('eval_duration', 0) / 1e9,
+        }
+
+
+def create_chat_client(config):
+    """AsyncOllamaChatClient по секции ollama config.json, если включён прямой путь (direct), иначе None"""
+    ollama = (config or {}).get('ollama', {})
+    if not ollama.get('direct', False):
+        return None
+    return AsyncOllamaChatClient(
+        ollama.get('model', 'deepseek-coder-v2'),
+        ollama.get('base_url', OLLAMA_URL),
+        keep_alive=(config or {}).get('warmup', {}).get('keep_alive', "30m"),
+        options=ollama.get('options')
+    )
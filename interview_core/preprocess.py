@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SPEECH_RATE = 16000
+
+
+def downmix(samples):
+    """Сводит кадры (frames, channels) в моно int16"""
+    if samples.ndim == 1 or samples.shape[1] == 1:
+        return samples.reshape(-1)
+    return (samples.sum(axis=1, dtype=np.int32) // samples.shape[1]).astype(np.int16)
+
+
+@lru_cache(maxsize=8)
+def polyphase_filter(up, down, half_len=10, beta=5.0):
+    """Фильтр нижних частот (окно Кайзера), разложенный на up фаз.
+
+    Возвращает матрицу (up, taps_per_phase) и задержку фильтра.
+    """
+    ratio = max(up, down)
+    length = 2 * half_len * ratio + 1
+    cutoff = 1.0 / ratio
+    taps = np.arange(length) - (length - 1) / 2
+    h = up * cutoff * np.sinc(cutoff * taps) * np.kaiser(length, beta)
+
+    per_phase = -(-length // up)
+    padded = np.zeros(per_phase * up)
+    padded[:length] = h
+    return padded.reshape(per_phase, up).T.astype(np.float32).copy(), (length - 1) // 2
+
+
+def resample_poly(samples, up, down):
+    """Полифазная передискретизация моно сигнала в up/down раз.
+
+    Выходы с шагом up используют одну фазу фильтра, а их входные окна
+    идут с шагом down, поэтому каждая фаза - одно матричное умножение
+    по view скользящих окон, без копирования входа.
+    """
+    phases, delay = polyphase_filter(up, down)
+    per_phase = phases.shape[1]
+    kernels = phases[:, ::-1]
+
+    x = np.zeros(len(samples) + 2 * per_phase, dtype=np.float32)
+    x[per_phase:per_phase + len(samples)] = samples
+    windows = sliding_window_view(x, per_phase)
+
+    out_len = -(-len(samples) * up // down)
+    out = np.empty(out_len, dtype=np.float32)
+    for first in range(min(up, out_len)):
+        t = first * down + delay
+        start = t // up + 1
+        count = len(range(first, out_len, up))
+        out[first::up] = windows[start:start + count * down:down] @ kernels[t % up]
+    return out
+
+
+def to_speech_rate(samples, rate, target_rate=SPEECH_RATE):
+    """Моно int16 на частоте распознавания: сведение каналов + передискретизация"""
+    mono = downmix(samples)
+    if rate == target_rate:
+        return mono
+    divisor = gcd(rate, target_rate)
+    resampled = resample_poly(mono, target_rate // divisor, rate // divisor)
+    return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
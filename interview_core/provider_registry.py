@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class CircuitBreaker:
+    """Здоровье одного провайдера: скользящие задержки и ошибки + автомат.
+
+    closed - запросы идут; open - провайдер пропускается cooldown секунд;
+    half-open - после паузы пускается один пробный запрос, успех
+    закрывает автомат, ошибка открывает снова. Автомат открывается после
+    failure_threshold ошибок подряд или когда медиана времени до первого
+    фрагмента за последние window запросов больше slow_seconds.
+    """
+
+    def __init__(self, failure_threshold=2, slow_seconds=10, cooldown_seconds=60, window=20):
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.last_error = ""
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.trial or time.time() - self.opened_at >= self.cooldown_seconds:
+            return "half-open"
+        return "open"
+
+    def available(self):
+        """Можно ли сейчас спрашивать провайдера; ничего не меняет - для выбора порядка"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            return not self.trial and time.time() - self.opened_at >= self.cooldown_seconds
+
+    def allow(self):
+        """Занимает место под запрос: в half-open пропускает один пробный; вызывать прямо перед запросом"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial or time.time() - self.opened_at < self.cooldown_seconds:
+                return False
+            self.trial = True
+            return True
+
+    def success(self, first_token):
+        with self.lock:
+            if self.opened_at is not None:
+                # Пробный запрос прошёл: старые медленные задержки больше не показательны
+                self.latencies.clear()
+            self.latencies.append(first_token)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.trial = False
+            if len(self.latencies) >= 3 and float(np.median(self.latencies)) > self.slow_seconds:
+                self.last_error = f"медленно: медиана {float(np.median(self.latencies)):.1f} с"
+                self.opened_at = time.time()
+            else:
+                self.opened_at = None
+
+    def failure(self, error):
+        with self.lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.trial or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.time()
+            self.trial = False
+
+    def summary(self):
+        parts = [self.state]
+        if self.latencies:
+            parts.append(f"1-й фрагмент {float(np.median(self.latencies)):.2f} с")
+        if self.outcomes:
+            parts.append(f"ошибок {self.outcomes.count(False)}/{len(self.outcomes)}")
+        if self.opened_at is not None and self.last_error:
+            parts.append(self.last_error[:80])
+        return ", ".join(parts)
+
+
+class ProviderRegistry:
+    """Реестр провайдеров ответа с общим потоковым интерфейсом и переключением.
+
+    Провайдер регистрируется функцией open_stream(question) -> ProviderStream.
+    stream() идёт по порядку провайдеров, пропуская те, чей автомат открыт,
+    и отдаёт ответ первого, кто прислал первый фрагмент не дольше
+    first_token_timeout. Упавший или зависший провайдер не тратит таймаут
+    на каждом вопросе: после нескольких неудач он пропускается до паузы,
+    а если открыты все автоматы, вопрос сразу получает ошибку. Задержки
+    дольше first_token_timeout не записываются, поэтому slow_seconds
+    должен быть меньше него.
+    """
+
+    def __init__(self, first_token_timeout=15, **breaker_options):
+        slow_seconds = breaker_options.get('slow_seconds', CircuitBreaker().slow_seconds)
+        if slow_seconds >= first_token_timeout:
+            raise ValueError("slow_seconds должно быть меньше first_token_timeout")
+        self.first_token_timeout = first_token_timeout
+        self.breaker_options = breaker_options
+        self.providers = {}
+        self.breakers = {}
+
+    def register(self, name, open_stream):
+        self.providers[name] = open_stream
+        self.breakers[name] = CircuitBreaker(**self.breaker_options)
+
+    @property
+    def names(self):
+        return list(self.providers)
+
+    def candidates(self, order=None):
+        """Провайдеры в порядке попытки, у которых автомат сейчас пропускает запросы"""
+        names = [name for name in (order or self.names) if name in self.providers]
+        return [name for name in names if self.breakers[name].available()]
+
+    def stream(self, question, order=None, on_skip=None):
+        """Ответ первого работающего провайдера: (имя, итератор фрагментов); все упали или отключены - исключение"""
+        errors = {}
+        for name in self.candidates(order):
+            # Пробное место half-open занимается только у того, кого действительно спрашиваем;
+            # его мог занять параллельный вопрос
+            if not self.breakers[name].allow():
+                continue
+            started = time.time()
+            try:
+                first, tokens = self.first_token(name, question)
+            except Exception as e:
+                self.breakers[name].failure(e)
+                errors[name] = str(e)
+                if on_skip:
+                    on_skip(name, e)
+                continue
+            self.breakers[name].success(time.time() - started)
+            return name, self.tokens(name, first, tokens)
+        if not errors:
+            names = [name for name in (order or self.names) if name in self.providers]
+            if names:
+                raise Exception("все провайдеры временно отключены: " + self.summary())
+            raise Exception("нет провайдеров")
+        raise Exception("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+    def first_token(self, name, question):
+        """Открывает поток и ждёт первый фрагмент не дольше first_token_timeout"""
+        result = queue.Queue()
+        holder = {}
+        lock = threading.Lock()
+
+        def run():
+            try:
+                stream = self.providers[name](question)
+                with lock:
+                    if holder.get('abandoned'):
+                        stream.cancel()
+                        return
+                    holder['stream'] = stream
+                tokens = iter(stream)
+                first = next(tokens, None)
+                if first is None:
+                    raise Exception("пустой ответ")
+                result.put((first, tokens))
+            except Exception as e:
+                result.put(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            outcome = result.get(timeout=self.first_token_timeout)
+        except queue.Empty:
+            with lock:
+                holder['abandoned'] = True
+                if 'stream' in holder:
+                    holder['stream'].cancel()
+            raise Exception(f"нет ответа за {self.first_token_timeout} с")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def tokens(self, name, first, rest):
+        """Фрагменты ответа; обрыв посреди ответа тоже считается ошибкой провайдера"""
+        yield first
+        try:
+            yield from rest
+        except Exception as e:
+            self.breakers[name].failure(e)
+            raise
+
+    def summary(self):
+        return "; ".join(f"{name}: {breaker.summary()}" for name, breaker in self.breakers.items())
+
+
+def create_registry(config):
+    """ProviderRegistry с настройками из секции providers config.json (без зарегистрированных провайдеров)"""
+    options = dict((config or {}).get('providers', {}))
+    options.pop('fallback', None)
+    return ProviderRegistry(**options)
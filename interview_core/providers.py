@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+from .sessions import read_available
+from .sse import SSEParser, decode_events
+
+
+class ProviderStream:
+    """Потоковый ответ провайдера: итератор фрагментов текста.
+
+    cancel() закрывает соединение, в том числе из другого потока, -
+    чтение прерывается, генерация на стороне провайдера останавливается.
+    """
+
+    def __init__(self, name, response, parse):
+        self.name = name
+        self.response = response
+        self.parse = parse
+        self.cancelled = False
+
+    def __iter__(self):
+        try:
+            for token in self.parse(self.response):
+                if token:
+                    yield token
+        finally:
+            self.response.close()
+
+    def cancel(self):
+        self.cancelled = True
+        self.response.close()
+
+
+def ollama_tokens(response):
+    """Фрагменты ответа Ollama /api/generate (NDJSON: объект на строку)"""
+    buffer = b""
+    for data in read_available(response):
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get('error'):
+                raise Exception(item['error'])
+            yield item.get('response', '')
+            if item.get('done'):
+                return
+
+
+def openai_tokens(response):
+    """Фрагменты ответа OpenAI-совместимого /chat/completions со stream: true (SSE)"""
+    parser = SSEParser()
+    for data in read_available(response):
+        for payload in parser.feed(data):
+            if payload.strip() == b"[DONE]":
+                return
+            item = json.loads(payload)
+            if item.get('error'):
+                raise Exception(item['error'].get('message', item['error']))
+            for choice in item.get('choices', []):
+                yield (choice.get('delta') or {}).get('content') or ''
+
+
+def rust_tokens(response):
+    """Фрагменты ответа Rust сервиса /stream (SSE события type/content)"""
+    parser = SSEParser()
+    for data in read_available(response):
+        for event_type, content in decode_events(parser.feed(data)):
+            if event_type == 'error':
+                raise Exception(content)
+            if event_type == 'done':
+                return
+            yield content
+
+
+def open_provider_stream(http, endpoint, name, url, payload, parse, headers=None):
+    """Отправляет потоковый запрос и возвращает ProviderStream; ошибка HTTP - исключение"""
+    response = http.post(endpoint, url, json=payload, headers=headers, stream=True)
+    if response.status_code != 200:
+        detail = response.text[:200]
+        response.close()
+        raise Exception(f"{name}: HTTP {response.status_code} {detail}".strip())
+    return ProviderStream(name, response, parse)
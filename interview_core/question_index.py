@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from .streaming import normalize_word
+
+
+def normalize_question(text):
+    """Ключ вопроса: слова без регистра, пунктуации и разницы е/ё"""
+    words = (normalize_word(word).replace('ё', 'е') for word in text.split())
+    return " ".join(word for word in words if word)
+
+
+def shingles(text, size=3):
+    """Хэши символьных n-грамм нормализованного текста (с границами слов)"""
+    text = f" {normalize_question(text)} "
+    grams = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class QuestionIndex:
+    """Поиск похожих вопросов: MinHash по символьным 3-граммам + LSH.
+
+    Распознавание каждый раз слышит один и тот же вопрос немного по-разному
+    (лишнее или пропущенное слово, другое окончание), поэтому точного
+    ключа мало. Подпись вопроса - num_perm минимумов хэшей его 3-грамм,
+    доля совпавших позиций двух подписей оценивает сходство Жаккара.
+    Подпись режется на bands полос, кандидаты - вопросы, совпавшие хотя бы
+    в одной полосе, так что поиск не перебирает всё индексированное.
+    Вопросы добавляются по одному, перестраивать индекс не нужно.
+    """
+
+    def __init__(self, threshold=0.7, num_perm=128, bands=32, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Хэширование умножением со сдвигом: нечётный множитель, старшие 32 бита
+        self.multipliers = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.signatures = np.empty((64, num_perm), dtype=np.uint32)
+        self.buckets = defaultdict(list)
+        self.items = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if not len(hashes):
+            return None
+        mixed = (hashes[:, None] * self.multipliers + self.offsets) >> np.uint64(32)
+        return mixed.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, question, value):
+        """Добавляет вопрос со значением (ответ, ключ кэша...); повтор вопроса обновляет значение"""
+        key = normalize_question(question)
+        if key in self.ids:
+            self.items[self.ids[key]] = (question, value)
+            return
+        signature = self.signature(question)
+        if signature is None:
+            return
+
+        index = len(self.items)
+        if index == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[index] = signature
+        for band_key in self.band_keys(signature):
+            self.buckets[band_key].append(index)
+        self.items.append((question, value))
+        self.ids[key] = index
+
+    def remove(self, question):
+        """Убирает вопрос из поиска (например, вытесненный из кэша)"""
+        index = self.ids.pop(normalize_question(question), None)
+        if index is not None:
+            # Место в подписях и корзинах остаётся, поиск его пропускает
+            self.items[index] = None
+
+    def search(self, question, threshold=None, limit=1):
+        """Похожие вопросы: список (сходство, вопрос, значение) по убыванию сходства"""
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.signature(question)
+        if signature is None:
+            return []
+
+        candidates = set()
+        for band_key in self.band_keys(signature):
+            candidates.update(index for index in self.buckets.get(band_key, ()) if self.items[index] is not None)
+        if not candidates:
+            return []
+
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        scores = (self.signatures[candidates] == signature).mean(axis=1)
+        order = np.argsort(-scores)[:limit]
+        return [(float(scores[i]), *self.items[candidates[i]]) for i in order if scores[i] >= threshold]
+
+    def best(self, question, threshold=None):
+        """Самый похожий вопрос не ниже порога: (сходство, вопрос, значение) или None"""
+        found = self.search(question, threshold)
+        return found[0] if found else None
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+import wave
+from math import gcd
+
+import numpy as np
+
+from .preprocess import downmix, resample_poly
+
+PA_INT16 = 8
+PA_CONTINUE = 0
+
+
+def read_wav(path):
+    """Читает 16-битный WAV: (кадры формы (frames, channels), частота)"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: поддерживается только 16-битный PCM")
+        frames = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return frames.reshape(-1, wf.getnchannels()), wf.getframerate()
+
+
+def convert(samples, rate, target_rate, channels):
+    """Приводит запись к нужной частоте и числу каналов"""
+    if rate == target_rate and samples.shape[1] == channels:
+        return samples
+    mono = downmix(samples)
+    if rate != target_rate:
+        divisor = gcd(rate, target_rate)
+        resampled = resample_poly(mono, target_rate // divisor, rate // divisor)
+        mono = np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+    return np.repeat(mono[:, None], channels, axis=1)
+
+
+class ReplayStream:
+    """Входной поток, отдающий запись блоками в темпе устройства"""
+
+    def __init__(self, samples, rate, chunk_size, speed=1.0, loop=False, callback=None):
+        self.samples = samples
+        self.chunk_size = chunk_size
+        self.period = chunk_size / rate / speed if speed else 0
+        self.loop = loop
+        self.pos = 0
+        self.active = True
+        self.started_at = time.time()
+        self.next_time = time.perf_counter()
+        self.thread = None
+        if callback:
+            self.thread = threading.Thread(target=self.run, args=(callback,), daemon=True)
+            self.thread.start()
+
+    def next_chunk(self):
+        """Следующий блок (дополняется тишиной в конце) или None"""
+        if self.pos >= len(self.samples):
+            if not self.loop or not len(self.samples):
+                return None
+            self.pos = 0
+        chunk = self.samples[self.pos:self.pos + self.chunk_size]
+        self.pos += self.chunk_size
+        if len(chunk) < self.chunk_size:
+            chunk = np.concatenate((chunk, np.zeros((self.chunk_size - len(chunk), chunk.shape[1]), np.int16)))
+        return chunk.tobytes()
+
+    def pace(self):
+        """Ждёт, пока «устройство» накопит очередной блок"""
+        if not self.period:
+            return
+        self.next_time += self.period
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def run(self, callback):
+        while self.active:
+            chunk = self.next_chunk()
+            if chunk is None:
+                break
+            self.pace()
+            _, flag = callback(chunk, self.chunk_size, {}, 0)
+            if flag != PA_CONTINUE:
+                break
+        self.active = False
+
+    def read(self, num_frames, exception_on_overflow=True):
+        chunk = self.next_chunk() if self.active else None
+        if chunk is None:
+            self.active = False
+            raise OSError("Запись закончилась")
+        self.pace()
+        return chunk
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+
+
+class ReplayAudio:
+    """Замена pyaudio.PyAudio: WAV файлы вместо устройства ввода.
+
+    Единственное устройство называется как BlackHole, поэтому фронтенды
+    находят его обычным поиском. Каждый open() проигрывает записи с начала,
+    между ними и в конце вставляется тишина, чтобы детектор речи успел
+    закрыть фразу. speed=0 - без пауз, так быстро, как читает потребитель:
+    у такого «устройства» нет своего темпа (paced), и CaptureEngine
+    читает его блокирующим чтением, а не через callback, где блоки
+    шли бы быстрее обработки и отбрасывались бы из очереди.
+    """
+
+    def __init__(self, paths, speed=1.0, gap_seconds=1.0, loop=False):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.speed = speed
+        self.gap_seconds = gap_seconds
+        self.loop = loop
+        self.cache = {}
+        self.streams = []
+
+    @property
+    def paced(self):
+        return bool(self.speed)
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        names = ", ".join(os.path.basename(path) for path in self.paths)
+        return {
+            'index': 0,
+            'name': f"BlackHole (replay: {names})",
+            'maxInputChannels': 2,
+            'maxOutputChannels': 0,
+        }
+
+    def get_format_from_width(self, width, unsigned=True):
+        return PA_INT16
+
+    def get_sample_size(self, format):
+        return 2
+
+    def load(self, rate, channels):
+        """Все записи подряд на нужной частоте, с тишиной между ними"""
+        key = (rate, channels)
+        if key not in self.cache:
+            gap = np.zeros((int(self.gap_seconds * rate), channels), np.int16)
+            parts = []
+            for path in self.paths:
+                samples, file_rate = read_wav(path)
+                parts.extend((convert(samples, file_rate, rate, channels), gap))
+            self.cache[key] = np.concatenate(parts) if parts else gap
+        return self.cache[key]
+
+    def open(self, rate, channels, frames_per_buffer=1024, stream_callback=None, **kwargs):
+        stream = ReplayStream(
+            self.load(rate, channels), rate, frames_per_buffer,
+            self.speed, self.loop, stream_callback
+        )
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        for stream in self.streams:
+            stream.close()
+        self.streams = []
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Политики по умолчанию; секция http.endpoints в config.json дополняет их по ключам
+DEFAULT_ENDPOINTS = {
+    "default": {"timeout": 30, "connect_timeout": 5, "retries": 1, "backoff": 0.3, "retry_status": [502, 503, 504]},
+    "health": {"timeout": 5, "retries": 0},
+    "ask": {"timeout": 30},
+    "stream": {"timeout": 60, "retries": 2},
+    "ollama": {"timeout": 30, "connect_timeout": 2},
+    "deepseek": {"timeout": 30},
+    "qwen": {"timeout": 30},
+    "ocr": {"timeout": 30, "retries": 0},
+}
+
+
+# Методы, которые можно повторить, даже если сервер уже получил запрос
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def base_url_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def read_available(response, size=65536):
+    """Куски тела потокового ответа requests по мере прихода, не больше size; сжатое распаковывается"""
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:
+        # urllib3 1.x без read1: iter_content(None) отдаёт chunked ответ по чанкам HTTP
+        yield from response.iter_content(chunk_size=None)
+        return
+    while True:
+        # decode_content: gzip/deflate ответ распаковывается, как в iter_content
+        data = read1(size, decode_content=True)
+        if not data:
+            return
+        yield data
+
+
+def not_sent(error):
+    """Упал ли запрос ещё до отправки: соединение так и не установилось"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class HttpPool:
+    """Общий слой HTTP: одна keep-alive сессия на базовый URL.
+
+    Повторные запросы к сервису идут по уже открытому соединению, без
+    нового TCP/TLS рукопожатия. Таймауты и повторы задаются по имени
+    эндпоинта. GET повторяется при ошибках соединения и статусах из
+    retry_status; POST - только если соединение не установилось и запрос
+    точно не ушёл: обрыв после отправки мог уже запустить генерацию, и
+    повтор отправил бы вопрос модели дважды.
+    """
+
+    def __init__(self, endpoints=None, pool_size=4):
+        self.endpoints = {name: dict(policy) for name, policy in DEFAULT_ENDPOINTS.items()}
+        for name, policy in (endpoints or {}).items():
+            self.endpoints.setdefault(name, {}).update(policy)
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def policy(self, endpoint):
+        policy = dict(self.endpoints["default"])
+        policy.update(self.endpoints.get(endpoint, {}))
+        return policy
+
+    def session(self, url):
+        """Сессия для базового URL адреса url (создаётся при первом обращении)"""
+        base = base_url_of(url)
+        with self.lock:
+            session = self.sessions.get(base)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(base, adapter)
+                self.sessions[base] = session
+            return session
+
+    def request(self, endpoint, method, url, timeout=None, **kwargs):
+        """Запрос с политикой эндпоинта; timeout переопределяет таймаут чтения"""
+        policy = self.policy(endpoint)
+        timeout = (policy["connect_timeout"], timeout or policy["timeout"])
+        session = self.session(url)
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(policy["retries"] + 1):
+            last = attempt == policy["retries"]
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except requests.ConnectionError as e:
+                # Сюда попадает и соединение, закрытое сервером за время простоя
+                if last or not (idempotent or not_sent(e)):
+                    raise
+            else:
+                if last or not idempotent or response.status_code not in policy["retry_status"]:
+                    return response
+                response.close()
+            time.sleep(policy["backoff"] * (attempt + 1))
+
+    def get(self, endpoint, url, **kwargs):
+        return self.request(endpoint, "GET", url, **kwargs)
+
+    def post(self, endpoint, url, **kwargs):
+        return self.request(endpoint, "POST", url, **kwargs)
+
+    def warm(self, urls):
+        """Заранее открывает соединения (TCP и TLS) к сервисам в фоне"""
+        def run(url):
+            try:
+                self.session(url).head(base_url_of(url), timeout=(self.policy("default")["connect_timeout"], 5))
+            except requests.RequestException:
+                pass
+
+        threads = []
+        for url in set(urls):
+            if url:
+                thread = threading.Thread(target=run, args=(url,), daemon=True)
+                thread.start()
+                threads.append(thread)
+        return threads
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+_shared = None
+
+
+def shared_pool():
+    """Общий для процесса HttpPool (по умолчанию - с политиками по умолчанию)"""
+    global _shared
+    if _shared is None:
+        _shared = HttpPool()
+    return _shared
+
+
+def configure_pool(config=None, warm_urls=()):
+    """Настраивает общий пул по секции http из config.json и прогревает соединения"""
+    global _shared
+    options = (config or {}).get('http', {})
+    _shared = HttpPool(options.get('endpoints'), options.get('pool_size', 4))
+    if options.get('warm_on_start', True):
+        _shared.warm(warm_urls)
+    return _shared
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from .streaming import normalize_word
+
+
+def words_of(text):
+    return [word for word in (normalize_word(w) for w in text.split()) if word]
+
+
+def similarity(a, b):
+    """Похожесть двух текстов по словам, от 0 до 1"""
+    return SequenceMatcher(None, words_of(a), words_of(b), autojunk=False).ratio()
+
+
+class SpeculativeDispatcher:
+    """Ранний запрос ответа по устоявшемуся промежуточному тексту.
+
+    Текст считается устоявшимся, когда последние stable_windows гипотез
+    совпадают в начале и самая свежая добавляет не больше max_tail_words
+    слов. Тогда /stream запрашивается сразу через AnswerLoop, не дожидаясь
+    конца фразы. Если окончательный текст похож на запрошенный меньше
+    чем на match_threshold, ранний ответ отменяется и вопрос отправляется
+    заново. Каждый исход пишется в metrics_file (JSONL) для подбора порогов.
+    """
+
+    def __init__(self, answers, stable_windows=2, min_words=4, max_tail_words=1,
+                 match_threshold=0.85, metrics_file=""):
+        self.answers = answers
+        self.stable_windows = max(stable_windows, 1)
+        self.min_words = min_words
+        self.max_tail_words = max_tail_words
+        self.match_threshold = match_threshold
+        self.metrics_file = metrics_file
+        self.partials = deque(maxlen=self.stable_windows)
+        self.answer = None
+        self.redispatches = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+
+    def stable_prefix(self):
+        """Общее начало последних гипотез (список слов)"""
+        prefix = self.partials[0]
+        for words in list(self.partials)[1:]:
+            count = 0
+            for a, b in zip(prefix, words):
+                if a != b:
+                    break
+                count += 1
+            prefix = prefix[:count]
+        return prefix
+
+    def on_partial(self, text, conversation_history=None, context_enabled=None):
+        """Новая промежуточная гипотеза; при устоявшемся тексте запрашивает ответ"""
+        with self.lock:
+            words = words_of(text)
+            self.partials.append(words)
+            if len(self.partials) < self.stable_windows:
+                return
+            prefix = self.stable_prefix()
+            if len(prefix) < self.min_words or len(words) - len(prefix) > self.max_tail_words:
+                return
+            if self.answer and similarity(self.answer.question, text) >= self.match_threshold:
+                return
+            if self.answer:
+                self.answer.cancel()
+                self.redispatches += 1
+            self.answer = self.answers.submit(text, conversation_history, context_enabled)
+
+    def reset(self):
+        """Отменяет ранний запрос и забывает гипотезы (фраза отброшена)"""
+        with self.lock:
+            if self.answer:
+                self.answer.cancel()
+                self.unused += 1
+            self.answer = None
+            self.partials.clear()
+            self.redispatches = 0
+
+    def resolve(self, final_text):
+        """Окончательный текст вопроса: AnswerStream раннего ответа или None"""
+        with self.lock:
+            answer = self.answer
+            redispatches = self.redispatches
+            self.answer = None
+            self.partials.clear()
+            self.redispatches = 0
+        if answer is None:
+            return None
+
+        score = similarity(answer.question, final_text)
+        hit = score >= self.match_threshold and not answer.failed
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            answer.cancel()
+
+        now = time.time()
+        self.record({
+            "timestamp": datetime.now().isoformat(),
+            "hit": hit,
+            "similarity": round(score, 3),
+            "failed": answer.failed,
+            "speculative_words": len(words_of(answer.question)),
+            "final_words": len(words_of(final_text)),
+            "lead_seconds": round(now - answer.started_at, 3),
+            "first_token_seconds": round(answer.first_token_at - answer.started_at, 3) if answer.first_token_at else None,
+            "redispatches": redispatches,
+            "stable_windows": self.stable_windows,
+            "match_threshold": self.match_threshold,
+        })
+        return answer if hit else None
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def record(self, entry):
+        if not self.metrics_file:
+            return
+        try:
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Не удалось записать метрики: {e}")
+
+    def summary(self):
+        return f"ранних ответов: попаданий {self.hits}, промахов {self.misses} ({self.hit_ratio:.0%}), отброшено {self.unused}"
+
+
+def create_dispatcher(config, answers):
+    """SpeculativeDispatcher по секции speculation из config.json или None"""
+    options = dict((config or {}).get('speculation', {}))
+    if not options.pop('enabled', False):
+        return None
+    return SpeculativeDispatcher(answers, **options)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+# Rust сервис (serde) пишет поля в порядке объявления StreamResponse, без пробелов
+_EVENT_PREFIX = '{"type":"'
+_CONTENT_FIELD = ',"content":"'
+_scanstring = json.decoder.scanstring
+
+
+class SSEParser:
+    """Инкрементальный разбор text/event-stream.
+
+    feed() принимает байты в том виде, как они пришли из сокета (сколько
+    угодно событий или обрывок одного), и возвращает поля data всех
+    завершённых событий. Строки не декодируются и не копируются по одной:
+    поток режется на события целиком, в частом случае событие - одна
+    строка data:.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, data):
+        """Новые байты потока -> список data (bytes) завершённых событий"""
+        buffer = self.buffer + data if self.buffer else data
+        if b"\r" in buffer:
+            buffer = buffer.replace(b"\r\n", b"\n")
+        blocks = buffer.split(b"\n\n")
+        self.buffer = blocks.pop()
+
+        payloads = []
+        for block in blocks:
+            if block.startswith(b"data:") and b"\n" not in block:
+                payloads.append(block[6:] if block[5:6] == b" " else block[5:])
+                continue
+            # Общий случай: комментарии, event:/id:, data в несколько строк
+            lines = [line[6:] if line[5:6] == b" " else line[5:]
+                     for line in block.split(b"\n") if line.startswith(b"data:")]
+            if lines:
+                payloads.append(b"\n".join(lines))
+        return payloads
+
+
+class ChunkedDecoder:
+    """Снимает обрамление Transfer-Encoding: chunked с произвольных кусков потока"""
+
+    def __init__(self):
+        self.buffer = b""
+        self.remaining = 0
+        self.finished = False
+
+    def feed(self, data):
+        """Байты из сокета -> байты тела; finished - встретился последний (нулевой) блок"""
+        buffer = self.buffer + data if self.buffer else data
+        body = []
+        position = 0
+        while not self.finished:
+            if self.remaining:
+                piece = buffer[position:position + self.remaining]
+                body.append(piece)
+                position += len(piece)
+                self.remaining -= len(piece)
+                if self.remaining:
+                    break
+                # CRLF после данных блока снимается вместе со строкой размера следующего
+                continue
+            line_end = buffer.find(b"\n", position)
+            if line_end < 0:
+                break
+            size_line = buffer[position:line_end].strip()
+            position = line_end + 1
+            if not size_line:
+                continue
+            size = int(size_line.split(b";")[0], 16)
+            if size == 0:
+                self.finished = True
+            self.remaining = size
+        self.buffer = buffer[position:]
+        return b"".join(body)
+
+
+def decode_event(payload):
+    """(type, content) из JSON события сервиса.
+
+    Для компактного JSON от serde достаточно найти поле type и разобрать
+    одну строку content; всё остальное идёт через json.loads.
+    """
+    text = payload.decode('utf-8')
+    if text.startswith(_EVENT_PREFIX):
+        end = text.find('"', len(_EVENT_PREFIX))
+        if text.startswith(_CONTENT_FIELD, end + 1):
+            content, _ = _scanstring(text, end + 1 + len(_CONTENT_FIELD))
+            return text[len(_EVENT_PREFIX):end], content
+    data = json.loads(text)
+    return data['type'], data['content']
+
+
+def decode_events(payloads):
+    """Список data -> список (type, content); битые события пропускаются"""
+    events = []
+    for payload in payloads:
+        try:
+            events.append(decode_event(payload))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return events
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from .capture import AudioRingBuffer, to_audio_data
+from .preprocess import downmix
+
+
+def normalize_word(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def merge_words(left, right, max_overlap=8):
+    """Склеивает тексты соседних окон, убирая слова, повторённые на стыке"""
+    a, b = left.split(), right.split()
+    for n in range(min(len(a), len(b), max_overlap), 0, -1):
+        if [normalize_word(w) for w in a[-n:]] == [normalize_word(w) for w in b[:n]]:
+            return " ".join(a + b[n:])
+    return " ".join(a + b)
+
+
+class Utterance:
+    """Одна фраза в потоковом распознавании.
+
+    Звук делится на блоки по тихим местам: закрытый блок распознаётся
+    один раз и попадает в committed, открытый хвост распознаётся заново
+    на каждом шаге и даёт промежуточную гипотезу.
+    """
+
+    def __init__(self, streaming, start):
+        self.streaming = streaming
+        self.start = start
+        self.end = None
+        self.block_start = start
+        self.committed = ""
+        self.failed = False
+        self.paused = False
+        self.partial = None
+        self.pending = None
+        self.pending_done = threading.Event()
+        self.lock = threading.Lock()
+
+    def text_with(self, tail):
+        return merge_words(self.committed, tail) if tail else self.committed
+
+    def result(self):
+        """Окончательный текст фразы (блокирует до распознавания хвоста)"""
+        return self.streaming.result(self)
+
+
+class StreamingTranscriber:
+    """Распознавание по ходу речи поверх обычного Transcriber.
+
+    Кадры подаются через feed() из потока захвата (дёшево), фоновый поток
+    каждые step_seconds распознаёт окно от начала открытого блока до текущего
+    момента и отдаёт промежуточный текст в on_partial. Блок длиннее
+    block_seconds закрывается в самом тихом месте своего конца, следующий
+    начинается на overlap_seconds раньше разреза, повтор слов убирается
+    при склейке. К концу фразы остаётся распознать только короткий хвост,
+    а чаще хватает последней гипотезы, уже покрывающей конец речи.
+    """
+
+    def __init__(self, transcriber, rate, channels, max_seconds=35, step_seconds=0.7,
+                 block_seconds=6.0, overlap_seconds=0.3, on_partial=None):
+        self.transcriber = transcriber
+        self.rate = rate
+        self.ring = AudioRingBuffer(int(max_seconds * rate), channels)
+        self.step = step_seconds
+        self.block_frames = int(block_seconds * rate)
+        self.overlap = int(overlap_seconds * rate)
+        self.min_frames = int(0.5 * rate)
+        self.on_partial = on_partial
+        self.current = None
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+    @property
+    def total_frames(self):
+        return self.ring.total_frames
+
+    def start(self):
+        """Запускает фоновый поток распознавания"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.current = None
+        self.wake.set()
+
+    def feed(self, chunk):
+        """Добавляет блок кадров из потока захвата"""
+        self.ring.write(chunk)
+
+    def begin(self, start=None):
+        """Начинает новую фразу с абсолютного кадра start (по умолчанию - с текущего)"""
+        self.current = Utterance(self, self.total_frames if start is None else start)
+        self.wake.set()
+        return self.current
+
+    def end(self, end=None):
+        """Закрывает текущую фразу на кадре end; вызывается из потока захвата"""
+        utterance = self.current
+        self.current = None
+        if utterance:
+            utterance.end = self.total_frames if end is None else end
+        return utterance
+
+    def mark_pause(self, paused):
+        """Пауза в речи: хвост распознаётся сразу, чтобы гипотеза успела покрыть конец фразы"""
+        utterance = self.current
+        if utterance is None:
+            return
+        if paused and not utterance.paused:
+            self.wake.set()
+        utterance.paused = paused
+
+    def cancel(self):
+        """Отбрасывает текущую фразу (например, слишком короткую для детектора)"""
+        self.current = None
+
+    def recognize(self, start, end):
+        samples = self.ring.slice(start, end)
+        if not len(samples):
+            return ""
+        try:
+            return self.transcriber.transcribe(to_audio_data(samples, self.rate))
+        except sr.UnknownValueError:
+            return ""
+
+    def find_cut(self, start, end):
+        """Самое тихое место в последних двух секундах окна"""
+        search_start = max(start + self.min_frames, end - 2 * self.rate)
+        mono = downmix(self.ring.slice(search_start, end)).astype(np.float32)
+        frame = max(self.rate // 50, 1)
+        count = len(mono) // frame
+        if count < 2:
+            return end
+        energy = np.mean(np.abs(mono[:count * frame].reshape(count, frame)), axis=1)
+        return search_start + int(np.argmin(energy)) * frame + frame // 2
+
+    def run(self):
+        while self.running:
+            self.wake.wait(self.step)
+            self.wake.clear()
+            utterance = self.current
+            if utterance is None or utterance.failed:
+                continue
+            now = self.total_frames
+            if now - utterance.block_start < self.min_frames:
+                continue
+            if now - utterance.block_start >= self.block_frames:
+                self.commit_block(utterance, now)
+            else:
+                self.update_partial(utterance, now)
+
+    def commit_block(self, utterance, now):
+        with utterance.lock:
+            cut = self.find_cut(utterance.block_start, now)
+            try:
+                text = self.recognize(max(utterance.block_start - self.overlap, utterance.start), cut)
+            except sr.RequestError:
+                # Без этого блока склейка неполна: в конце фраза распознается целиком
+                utterance.failed = True
+                return
+            utterance.committed = merge_words(utterance.committed, text)
+            utterance.block_start = cut
+            utterance.partial = None
+
+    def update_partial(self, utterance, now):
+        block_start = utterance.block_start
+        utterance.pending = (block_start, now)
+        utterance.pending_done.clear()
+        try:
+            text = self.recognize(max(block_start - self.overlap, utterance.start), now)
+        except sr.RequestError:
+            text = None
+        fresh = text is not None and utterance.block_start == block_start
+        if fresh:
+            utterance.partial = (block_start, now, text)
+        utterance.pending_done.set()
+        if fresh and self.on_partial and utterance is self.current:
+            self.on_partial(utterance.text_with(text))
+
+    def result(self, utterance):
+        """Склеенный окончательный текст; пустой результат - sr.UnknownValueError"""
+        end = utterance.end if utterance.end is not None else self.total_frames
+
+        with utterance.lock:
+            if utterance.failed:
+                text = self.recognize(utterance.start, end)
+            else:
+                block_start = utterance.block_start
+                # Гипотеза, которая уже считается и покрывает конец речи, - быстрее нового запроса
+                if utterance.pending and utterance.pending[0] == block_start and utterance.pending[1] >= end:
+                    utterance.pending_done.wait()
+                partial = utterance.partial
+                if partial and partial[0] == block_start and partial[1] >= end:
+                    tail = partial[2]
+                else:
+                    tail = self.recognize(max(block_start - self.overlap, utterance.start), end)
+                text = utterance.text_with(tail)
+
+        if not text:
+            raise sr.UnknownValueError()
+        return text
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from .endpointing import split_at_silence
+from .preprocess import SPEECH_RATE
+
+
+def pcm16(audio):
+    """Сырые 16-битные кадры 16 кГц моно из sr.AudioData"""
+    return audio.get_raw_data(convert_rate=SPEECH_RATE, convert_width=2)
+
+
+class GoogleBackend:
+    """Облачное распознавание Google (speech_recognition)"""
+
+    def __init__(self, recognizer=None, language="ru-RU", **options):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+class VoskBackend:
+    """Локальное распознавание Vosk (Kaldi) на CPU.
+
+    Язык определяется моделью: vosk_model - путь к распакованной модели,
+    например vosk-model-small-ru-0.22.
+    """
+
+    def __init__(self, recognizer=None, language="ru-RU", vosk_model="", **options):
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        if not vosk_model:
+            raise ValueError("не задан путь asr.vosk_model")
+        self.vosk = vosk
+        self.model = vosk.Model(vosk_model)
+
+    def transcribe(self, audio):
+        recognizer = self.vosk.KaldiRecognizer(self.model, SPEECH_RATE)
+        recognizer.AcceptWaveform(pcm16(audio))
+        return json.loads(recognizer.FinalResult()).get('text', '')
+
+
+class WhisperBackend:
+    """Локальный Whisper (faster-whisper, CTranslate2) на CPU"""
+
+    def __init__(self, recognizer=None, language="ru-RU", whisper_model="small",
+                 compute_type="int8", threads=0, **options):
+        from faster_whisper import WhisperModel
+
+        self.language = language.split('-')[0]
+        self.model = WhisperModel(whisper_model, device="cpu", compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe(self, audio):
+        samples = np.frombuffer(pcm16(audio), dtype=np.int16).astype(np.float32) / 32768
+        segments, _ = self.model.transcribe(samples, language=self.language, beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments)
+
+
+ASR_BACKENDS = {
+    'google': GoogleBackend,
+    'vosk': VoskBackend,
+    'whisper': WhisperBackend,
+}
+
+
+class Transcriber:
+    """Распознавание речи из sr.AudioData выбранным движком.
+
+    Ошибки распознавания (sr.UnknownValueError, sr.RequestError)
+    пробрасываются вызывающему, как и раньше во фронтендах; локальные
+    движки тоже сообщают о пустом результате через sr.UnknownValueError.
+    """
+
+    def __init__(self, recognizer=None, language="ru-RU", engine="google", **options):
+        if engine not in ASR_BACKENDS:
+            raise ValueError(f"неизвестный движок распознавания: {engine}")
+        self.engine = engine
+        self.backend = ASR_BACKENDS[engine](recognizer, language, **options)
+
+    def transcribe(self, audio):
+        """Возвращает распознанный текст (может быть пустым)"""
+        try:
+            text = self.backend.transcribe(audio).strip()
+        except (sr.UnknownValueError, sr.RequestError):
+            raise
+        except Exception as e:
+            raise sr.RequestError(f"{self.engine}: {e}")
+        if not text and self.engine != 'google':
+            raise sr.UnknownValueError()
+        return text
+
+
+class ParallelTranscriber:
+    """Длинная запись режется по паузам и распознаётся кусками параллельно.
+
+    Куски распознаются в ограниченном пуле потоков (движки ждут сеть или
+    нативный код и отпускают GIL), тексты склеиваются по порядку. Сбой
+    запроса повторяется только для своего куска; если кусок так и не
+    распознался, остальной текст всё равно возвращается, а on_warning
+    (если задан) получает сообщение о потере.
+    """
+
+    def __init__(self, transcriber, workers=4, segment_seconds=8, retries=2, retry_delay=0.3, on_warning=None):
+        self.transcriber = transcriber
+        self.on_warning = on_warning
+        self.engine = transcriber.engine
+        self.segment_seconds = segment_seconds
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asr')
+
+    def transcribe_piece(self, audio):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.transcriber.transcribe(audio)
+            except sr.UnknownValueError:
+                return ""
+            except sr.RequestError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.retry_delay * (attempt + 1))
+
+    def transcribe(self, audio):
+        """Возвращает распознанный текст, как Transcriber.transcribe"""
+        raw = pcm16(audio)
+        mono = np.frombuffer(raw, dtype=np.int16)
+        bounds = split_at_silence(mono, SPEECH_RATE, self.segment_seconds, self.segment_seconds / 4)
+        if len(bounds) == 1:
+            return self.transcriber.transcribe(audio)
+
+        pieces = [sr.AudioData(mono[start:end].tobytes(), SPEECH_RATE, 2) for start, end in bounds]
+        futures = [self.pool.submit(self.transcribe_piece, piece) for piece in pieces]
+
+        texts = []
+        errors = []
+        for future in futures:
+            try:
+                texts.append(future.result().strip())
+            except sr.RequestError as e:
+                errors.append(e)
+        if errors and len(errors) == len(futures):
+            raise errors[0]
+        if errors and self.on_warning:
+            self.on_warning(f"⚠️ Не распознано кусков записи: {len(errors)} из {len(futures)}")
+
+        text = " ".join(text for text in texts if text)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def create_transcriber(config=None, recognizer=None, on_warning=None):
+    """Transcriber по секции asr из config.json; без локального движка - Google.
+
+    on_warning(message) получает предупреждения для показа пользователю:
+    замену движка на Google и куски записи, которые не распознались.
+    """
+    options = dict((config or {}).get('asr', {}))
+    engine = options.pop('engine', 'google')
+    workers = options.pop('parallel_workers', 1)
+    segment_seconds = options.pop('segment_seconds', 8)
+    retries = options.pop('retries', 2)
+    try:
+        transcriber = Transcriber(recognizer, engine=engine, **options)
+    except Exception as e:
+        if engine == 'google':
+            raise
+        if on_warning:
+            on_warning(f"⚠️ Движок распознавания {engine} недоступен ({e}), используется Google")
+        transcriber = Transcriber(recognizer, options.get('language', 'ru-RU'))
+    if workers > 1:
+        return ParallelTranscriber(transcriber, workers, segment_seconds, retries, on_warning=on_warning)
+    return transcriber
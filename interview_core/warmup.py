@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from .sessions import shared_pool
+
+OLLAMA_URL = "http://localhost:11434/api"
+
+
+class ModelWarmer:
+    """Прогрев модели Ollama и удержание её в памяти.
+
+    /api/tags и /health отвечают сразу после старта Ollama, а модель
+    загружается только первым вопросом - для deepseek-coder-v2 это
+    десятки секунд. warm() отправляет запрос с пустым промптом: Ollama
+    загружает модель и ничего не генерирует; keep_alive задаёт, сколько
+    модель остаётся в памяти. Пульс повторяет такой запрос реже, чем
+    истекает keep_alive, и модель не выгружается посреди собеседования.
+    """
+
+    def __init__(self, model, base_url=OLLAMA_URL, keep_alive="30m", heartbeat_seconds=240,
+                 timeout=180, pool=None):
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.heartbeat_seconds = heartbeat_seconds
+        self.timeout = timeout
+        self.pool = pool
+        self.ready = threading.Event()
+        self.load_seconds = None
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @property
+    def http(self):
+        return self.pool or shared_pool()
+
+    def warm(self):
+        """Загружает модель (блокирует), возвращает время до готовности в секундах"""
+        start = time.time()
+        response = self.http.post(
+            'ollama',
+            f"{self.base_url}/generate",
+            json={"model": self.model, "prompt": "", "keep_alive": self.keep_alive},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+        self.load_seconds = response.json().get('load_duration', 0) / 1e9
+        self.error = None
+        self.ready.set()
+        return time.time() - start
+
+    def is_loaded(self):
+        """Находится ли модель в памяти Ollama прямо сейчас (/api/ps)"""
+        try:
+            response = self.http.get('health', f"{self.base_url}/ps")
+            models = response.json().get('models', []) if response.status_code == 200 else []
+        except Exception:
+            return False
+        return any(item.get('name', '').split(':')[0] == self.model.split(':')[0] for item in models)
+
+    def start(self, on_ready=None, on_error=None):
+        """Прогрев и пульс в фоне; on_ready(секунды) / on_error(исключение) - из фонового потока"""
+        def run():
+            try:
+                seconds = self.warm()
+            except Exception as e:
+                self.error = e
+                if on_error:
+                    on_error(e)
+            else:
+                if on_ready:
+                    on_ready(seconds)
+            while not self.stopped.wait(self.heartbeat_seconds):
+                self.heartbeat(on_ready, on_error)
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def heartbeat(self, on_ready=None, on_error=None):
+        """Продлевает keep_alive; если модель выгрузилась или не загрузилась - загружает заново"""
+        was_ready = self.ready.is_set() and self.is_loaded()
+        if not was_ready:
+            self.ready.clear()
+        try:
+            seconds = self.warm()
+        except Exception as e:
+            self.ready.clear()
+            if self.error is None and on_error:
+                on_error(e)
+            self.error = e
+            return
+        if not was_ready and on_ready:
+            on_ready(seconds)
+
+    def wait(self, timeout=None):
+        """Ждёт готовности модели; True - модель загружена"""
+        return self.ready.wait(timeout)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def create_warmer(config):
+    """ModelWarmer по секциям warmup и ollama из config.json или None"""
+    options = dict((config or {}).get('warmup', {}))
+    if not options.pop('enabled', False):
+        return None
+    ollama = (config or {}).get('ollama', {})
+    return ModelWarmer(ollama.get('model', 'deepseek-coder-v2'), ollama.get('base_url', OLLAMA_URL), **options)
+
+
+def start_warmup(config, log=print):
+    """Запускает прогрев по config.json; log сообщает, когда модель действительно готова"""
+    warmer = create_warmer(config)
+    if warmer is None:
+        return None
+    log(f"🔥 Прогреваю модель {warmer.model}...")
+    warmer.start(
+        on_ready=lambda seconds: log(f"✅ Модель {warmer.model} загружена и готова ({seconds:.1f} сек)"),
+        on_error=lambda e: log(f"⚠️ Не удалось прогреть модель {warmer.model}: {e}")
+    )
+    return warmer
@@ -16,11 +16,16 @@ struct QuestionRequest {
     question: String,
 }
 
+// Сколько Ollama держит модель в памяти после запроса; без поля каждый
+// запрос сбрасывает его на 5 минут по умолчанию, перекрывая прогрев клиента
+const OLLAMA_KEEP_ALIVE: &str = "30m";
+
 #[derive(Debug, Serialize)]
 struct OllamaRequest {
     model: String,
     prompt: String,
     stream: bool,
+    keep_alive: String,
 }
 
 #[derive(Debug, Deserialize)]
@@ -94,6 +99,7 @@ async fn query_ollama(question: &str, stream: bool) -> Result<String, Box<dyn st
             question
         ),
         stream,
+        keep_alive: OLLAMA_KEEP_ALIVE.to_string(),
     };
 
     let response = client
@@ -132,6 +138,7 @@ async fn stream_ollama_response(
             question
         ),
         stream: true,
+        keep_alive: OLLAMA_KEEP_ALIVE.to_string(),
     };
 
     let response = client
@@ -2,33 +2,53 @@
 # -*- coding: utf-8 -*-
 
 import speech_recognition as sr
-import requests
-import json
 import threading
-import time
 import sys
 from datetime import datetime
-import sseclient
-import pyaudio
-import wave
-import numpy as np
+
+from interview_core import (
+    AnswerClient,
+    CaptureEngine,
+    DualSourceListener,
+    PrerollListener,
+    VoiceActivityDetector,
+    archive_capture,
+    configure_pool,
+    create_transcriber,
+    list_devices,
+    load_config,
+    open_audio,
+    rms_volume,
+    service_url,
+    start_warmup,
+    to_audio_data,
+)
 
 class SystemAudioTranscriber:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.rust_api_url = "http://127.0.0.1:3030"
+        self.config = load_config()
+        self.rust_api_url = service_url(self.config)
+        self.answer_client = AnswerClient(self.rust_api_url)
+        configure_pool(self.config, [self.rust_api_url])
+        self.transcriber = create_transcriber(self.config, on_warning=print)
+        self.archive_dir = self.config.get('speech', {}).get('archive_dir', '')
+        self.preroll_seconds = self.config.get('speech', {}).get('preroll_seconds', 0)
+        self.preroll_listener = None
+        self.dual_source = self.config.get('speech', {}).get('dual_source', False)
         
-        self.audio_format = pyaudio.paInt16
         self.channels = 2
         self.rate = 44100
         self.chunk_size = 1024
         self.recording = False
         
-        self.audio = pyaudio.PyAudio()
+        self.audio = open_audio(self.config)
         
         self.find_blackhole_device()
         
         self.check_rust_service()
+        self.warmer = start_warmup(self.config)
+        
+        self.start_preroll_listener()
 
     def find_blackhole_device(self):
         """Находит BlackHole аудио устройство"""
@@ -36,15 +56,12 @@ class SystemAudioTranscriber:
         
         print("🔍 Ищу BlackHole устройство...")
         
-        for i in range(self.audio.get_device_count()):
-            device_info = self.audio.get_device_info_by_index(i)
-            device_name = device_info['name'].lower()
-            
-            print(f"   Устройство {i}: {device_info['name']}")
+        for i, name, inputs in list_devices(self.audio):
+            print(f"   Устройство {i}: {name}")
             
-            if 'blackhole' in device_name:
+            if 'blackhole' in name.lower() and inputs > 0:
                 self.blackhole_device = i
-                print(f"✅ Найдено BlackHole устройство: {device_info['name']} (ID: {i})")
+                print(f"✅ Найдено BlackHole устройство: {name} (ID: {i})")
                 break
         
         if self.blackhole_device is None:
@@ -57,16 +74,22 @@ class SystemAudioTranscriber:
             print("   5. Установите этот Multi-Output как системный выход звука")
             sys.exit(1)
 
+    def start_preroll_listener(self):
+        """Держит BlackHole открытым и хранит последние секунды звука"""
+        if not self.preroll_seconds:
+            return
+        
+        engine = CaptureEngine(self.audio, self.blackhole_device, self.channels, self.rate, self.chunk_size)
+        self.preroll_listener = PrerollListener(engine, self.preroll_seconds)
+        self.preroll_listener.start()
+        print(f"👂 Фоновое прослушивание: запись начнётся за {self.preroll_seconds} сек до Enter")
+
     def check_rust_service(self):
         """Проверяет доступность Rust сервиса"""
         try:
             print("🔗 Проверяю Rust сервис...")
-            response = requests.get(f"{self.rust_api_url}/health", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Rust сервис доступен: {data.get('service', 'unknown')}")
-            else:
-                raise Exception(f"HTTP {response.status_code}")
+            data = self.answer_client.health()
+            print(f"✅ Rust сервис доступен: {data.get('service', 'unknown')}")
         except Exception as e:
             print(f"❌ Rust сервис недоступен: {e}")
             print("💡 Запустите: cargo run")
@@ -79,41 +102,29 @@ class SystemAudioTranscriber:
             print(f"⏱️  Максимум {duration} секунд. Нажмите Enter когда закончите.")
             print("🔊 Убедитесь что звук из браузера/приложений идёт через Multi-Output Device")
             
-            stream = self.audio.open(
-                format=self.audio_format,
-                channels=self.channels,
-                rate=self.rate,
-                input=True,
-                input_device_index=self.blackhole_device,
-                frames_per_buffer=self.chunk_size
-            )
+            if self.preroll_listener and self.preroll_listener.running:
+                engine = self.preroll_listener.engine
+                capture = self.preroll_listener.record
+            else:
+                engine = CaptureEngine(self.audio, self.blackhole_device, self.channels, self.rate, self.chunk_size)
+                capture = engine.record
             
             audio_data = []
             self.recording = True
             recording_complete = threading.Event()
             
+            def show_level(chunk):
+                if rms_volume(chunk) > 500:
+                    print("🔉", end="", flush=True)
+                else:
+                    print(".", end="", flush=True)
+            
             def record():
                 try:
-                    frames = []
-                    start_time = time.time()
-                    
-                    while self.recording and (time.time() - start_time) < duration:
-                        data = stream.read(self.chunk_size, exception_on_overflow=False)
-                        frames.append(data)
-                        
-                        audio_array = np.frombuffer(data, dtype=np.int16)
-                        volume = np.sqrt(np.mean(audio_array**2))
-                        
-                        if volume > 500:
-                            print("🔉", end="", flush=True)
-                        else:
-                            print(".", end="", flush=True)
-                    
-                    audio_data.extend(frames)
-                    recording_complete.set()
-                    
+                    audio_data.append(capture(duration, lambda: self.recording, show_level))
                 except Exception as e:
                     print(f"\n❌ Ошибка записи: {e}")
+                finally:
                     recording_complete.set()
             
             record_thread = threading.Thread(target=record)
@@ -125,33 +136,26 @@ class SystemAudioTranscriber:
             print("\n🛑 Запись остановлена...")
             
             recording_complete.wait(timeout=2)
-            stream.close()
+            self.report_capture_losses(engine)
             
-            if audio_data:
-                temp_filename = "temp_system_audio.wav"
-                with wave.open(temp_filename, 'wb') as wf:
-                    wf.setnchannels(self.channels)
-                    wf.setsampwidth(self.audio.get_sample_size(self.audio_format))
-                    wf.setframerate(self.rate)
-                    wf.writeframes(b''.join(audio_data))
+            if audio_data and len(audio_data[0]):
+                samples = audio_data[0]
+                if self.archive_dir:
+                    archive_capture(self.archive_dir, samples, self.channels, self.rate, engine.sample_width)
                 
-                self.transcribe_system_audio(temp_filename)
+                self.transcribe_system_audio(to_audio_data(samples, self.rate, engine.sample_width))
             else:
                 print("❌ Аудио не записано")
                 
         except Exception as e:
             print(f"❌ Ошибка: {e}")
 
-    def transcribe_system_audio(self, audio_file):
+    def transcribe_system_audio(self, audio):
         """Транскрибирует системное аудио"""
         try:
             print("🔄 Транскрибирую системный звук...")
             
-            with sr.AudioFile(audio_file) as source:
-                audio = self.recognizer.record(source)
-            
-            text = self.recognizer.recognize_google(audio, language="ru-RU")
-            text = text.strip()
+            text = self.transcriber.transcribe(audio)
             
             if not text:
                 print("⚠️ В записи не обнаружена речь")
@@ -162,12 +166,6 @@ class SystemAudioTranscriber:
             print("-" * 80)
             
             self.send_to_rust_streaming(text)
-            
-            import os
-            try:
-                os.remove(audio_file)
-            except:
-                pass
                 
         except sr.UnknownValueError:
             print("⚠️ В системном звуке не распознана речь")
@@ -179,49 +177,18 @@ class SystemAudioTranscriber:
     def send_to_rust_streaming(self, question):
         """Отправляет вопрос в Rust сервис и получает streaming ответ"""
         try:
-            payload = {"question": question}
-            
-            response = requests.post(
-                f"{self.rust_api_url}/stream",
-                json=payload,
-                headers={"Accept": "text/event-stream"},
-                stream=True,
-                timeout=60
-            )
-            
-            if response.status_code != 200:
-                print(f"❌ Ошибка Rust API: {response.status_code}")
-                return
-            
-            client = sseclient.SSEClient(response)
-            full_response = []
-            
-            for event in client.events():
-                if event.data:
-                    try:
-                        data = json.loads(event.data)
-                        
-                        if data['type'] == 'word':
-                            chunk = data['content']
-                            print(chunk, end='', flush=True)
-                            full_response.append(chunk)
-                            
-                        elif data['type'] == 'done':
-                            print("\n" + "="*80)
-                            print(f"📅 {datetime.now().strftime('%H:%M:%S')} - Ответ получен!")
-                            
-                            clean_response = data['content']
-                            
-                            print(f"💡 Полный ответ: {clean_response}")
-                            print("="*80)
-                            break
-                            
-                        elif data['type'] == 'error':
-                            print(f"\n❌ Ошибка: {data['content']}")
-                            break
-                            
-                    except json.JSONDecodeError:
-                        continue
+            for event_type, content in self.answer_client.stream(question):
+                if event_type == 'word':
+                    print(content, end='', flush=True)
+                    
+                elif event_type == 'done':
+                    print("\n" + "="*80)
+                    print(f"📅 {datetime.now().strftime('%H:%M:%S')} - Ответ получен!")
+                    print(f"💡 Полный ответ: {content}")
+                    print("="*80)
+                    
+                elif event_type == 'error':
+                    print(f"\n❌ Ошибка: {content}")
                         
         except Exception as e:
             print(f"❌ Ошибка при работе с Rust API: {e}")
@@ -230,18 +197,53 @@ class SystemAudioTranscriber:
         """Непрерывный мониторинг системного аудио"""
         print("\n🎧 РЕЖИМ МОНИТОРИНГА СИСТЕМНОГО ЗВУКА")
         print("="*70)
-        print("💡 Нажмите Enter когда услышите вопрос интервьюера")
+        print("💡 Вопросы интервьюера выделяются автоматически по паузам в речи")
         print("🔊 Звук должен идти через Multi-Output Device с BlackHole")
         print("🛑 Нажмите Ctrl+C для выхода")
         print("="*70)
         
+        engine = CaptureEngine(self.audio, self.blackhole_device, self.channels, self.rate, self.chunk_size)
+        vad = VoiceActivityDetector(self.rate)
+        
+        def on_segment(segment):
+            print(f"\n🎙️ Фраза: {segment.end_time - segment.start_time:.1f} сек")
+            if self.archive_dir:
+                archive_capture(self.archive_dir, segment.samples, self.channels, self.rate, engine.sample_width)
+            self.transcribe_system_audio(to_audio_data(segment.samples, segment.rate, engine.sample_width))
+        
+        mic_engine = None
+        self.recording = True
         try:
-            while True:
-                input("\n👉 Нажмите Enter чтобы начать захват звука...")
-                self.record_system_audio(duration=30)
-                
+            if self.dual_source:
+                mic_engine = CaptureEngine(self.audio, None, channels=1, rate=16000, source='mic')
+                listener = DualSourceListener(engine, mic_engine, vad, VoiceActivityDetector(mic_engine.rate))
+                print("🎤 Микрофон подключен: ваша речь не отправляется в AI")
+                workers = listener.listen(lambda: self.recording, on_segment, self.on_candidate_segment)
+            else:
+                workers = [engine.listen(lambda: self.recording, on_segment, vad)]
+            for worker in workers:
+                worker.join()
         except KeyboardInterrupt:
             print("\n👋 Завершение мониторинга...")
+        finally:
+            self.recording = False
+            self.report_capture_losses(engine)
+            if mic_engine:
+                self.report_capture_losses(mic_engine)
+
+    def on_candidate_segment(self, segment):
+        """Речь кандидата: только распознаётся и показывается"""
+        try:
+            text = self.transcriber.transcribe(to_audio_data(segment.samples, segment.rate))
+            if text:
+                print(f"\n🗣️ Кандидат: {text}")
+        except (sr.UnknownValueError, sr.RequestError):
+            pass
+
+    def report_capture_losses(self, engine):
+        """Сообщает о потерянном при захвате аудио"""
+        if engine.lost_audio:
+            print(f"\n⚠️ Потери при захвате: переполнений {engine.overflows}, отброшено кадров {engine.dropped_frames}")
 
     def show_menu(self):
         """Показывает главное меню"""
@@ -259,12 +261,11 @@ class SystemAudioTranscriber:
         print("\n📱 ДОСТУПНЫЕ АУДИО УСТРОЙСТВА:")
         print("="*50)
         
-        for i in range(self.audio.get_device_count()):
-            device_info = self.audio.get_device_info_by_index(i)
-            device_type = "🎤" if device_info['maxInputChannels'] > 0 else "🔊"
+        for i, name, inputs in list_devices(self.audio):
+            device_type = "🎤" if inputs > 0 else "🔊"
             current = " ← ТЕКУЩЕЕ" if i == self.blackhole_device else ""
             
-            print(f"{device_type} {i}: {device_info['name']}{current}")
+            print(f"{device_type} {i}: {name}{current}")
         
         print("="*50)
 
@@ -305,6 +306,8 @@ class SystemAudioTranscriber:
         except Exception as e:
             print(f"❌ Ошибка: {e}")
         finally:
+            if self.preroll_listener:
+                self.preroll_listener.stop()
             self.audio.terminate()
 
 if __name__ == "__main__":
@@ -314,11 +317,13 @@ if __name__ == "__main__":
     
     required_packages = {
         'speech_recognition': 'SpeechRecognition',
-        'sseclient': 'sseclient-py', 
         'requests': 'requests',
         'pyaudio': 'pyaudio',
         'numpy': 'numpy'
     }
+    if load_config().get('speech', {}).get('replay_file'):
+        # Проигрывание WAV обходится без звуковой карты
+        del required_packages['pyaudio']
     
     missing = []
     for module, package in required_packages.items():
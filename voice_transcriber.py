@@ -2,44 +2,50 @@
 # -*- coding: utf-8 -*-
 
 import speech_recognition as sr
-import requests
-import json
 import threading
-import time
 import sys
 from datetime import datetime
-import sseclient
+
+from interview_core import (
+    AnswerClient,
+    CaptureEngine,
+    VoiceActivityDetector,
+    configure_pool,
+    create_calibration,
+    create_transcriber,
+    load_config,
+    service_url,
+    start_warmup,
+    to_audio_data,
+)
 
 class VoiceTranscriber:
     def __init__(self):
         self.recognizer = sr.Recognizer()
+        self.config = load_config()
+        self.transcriber = create_transcriber(self.config, self.recognizer, on_warning=print)
         self.microphone = sr.Microphone()
-        self.rust_api_url = "http://127.0.0.1:3030"
+        self.calibration = None
+        self.rust_api_url = service_url(self.config)
+        self.answer_client = AnswerClient(self.rust_api_url)
+        configure_pool(self.config, [self.rust_api_url])
         
         self.setup_microphone()
         
         self.check_rust_service()
+        self.warmer = start_warmup(self.config)
 
     def setup_microphone(self):
-        """Настраивает микрофон"""
-        try:
-            print("🎤 Настраиваю микрофон...")
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-            print("✅ Микрофон готов!")
-        except Exception as e:
-            print(f"❌ Ошибка микрофона: {e}")
+        """Настраивает микрофон: порог из сохранённого профиля шума"""
+        print("🎤 Настраиваю микрофон...")
+        self.calibration = create_calibration(self.config, self.microphone, self.recognizer)
 
     def check_rust_service(self):
         """Проверяет доступность Rust сервиса"""
         try:
             print("🔗 Проверяю Rust сервис...")
-            response = requests.get(f"{self.rust_api_url}/health", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Rust сервис доступен: {data.get('service', 'unknown')}")
-            else:
-                raise Exception(f"HTTP {response.status_code}")
+            data = self.answer_client.health()
+            print(f"✅ Rust сервис доступен: {data.get('service', 'unknown')}")
         except Exception as e:
             print(f"❌ Rust сервис недоступен: {e}")
             print("💡 Запустите: cargo run")
@@ -57,8 +63,7 @@ class VoiceTranscriber:
             def record():
                 nonlocal audio
                 try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(source, phrase_time_limit=30)
+                    audio = self.calibration.listen(self.microphone, self.recognizer, phrase_time_limit=30)
                     recording_complete.set()
                 except Exception as e:
                     print(f"❌ Ошибка записи: {e}")
@@ -83,13 +88,43 @@ class VoiceTranscriber:
         except Exception as e:
             print(f"❌ Ошибка: {e}")
 
+    def listen_auto(self):
+        """Автоматический режим: фразы выделяются детектором речи без Enter"""
+        print("\n🎙️ АВТОМАТИЧЕСКИЙ РЕЖИМ")
+        print("💡 Вопрос отправляется сам, когда вы замолкаете")
+        print("🛑 Нажмите Ctrl+C для выхода")
+        
+        self.calibration.wait()
+        audio = sr.Microphone.get_pyaudio().PyAudio()
+        engine = CaptureEngine(audio, self.microphone.device_index, channels=1, rate=16000)
+        vad = VoiceActivityDetector(engine.rate, energy_threshold=self.recognizer.energy_threshold)
+        
+        def on_chunk(chunk):
+            # Порог следует за шумом комнаты по паузам в потоке, без остановки на калибровку
+            threshold = self.calibration.observe(chunk, engine.rate)
+            if threshold:
+                vad.energy_threshold = self.recognizer.energy_threshold = threshold
+        
+        def on_segment(segment):
+            print(f"\n🎙️ Фраза: {segment.end_time - segment.start_time:.1f} сек")
+            self.transcribe_and_process(to_audio_data(segment.samples, segment.rate, engine.sample_width))
+        
+        listening = [True]
+        try:
+            worker = engine.listen(lambda: listening[0], on_segment, vad, on_chunk)
+            worker.join()
+        except KeyboardInterrupt:
+            print("\n🛑 Автоматический режим остановлен")
+        finally:
+            listening[0] = False
+            audio.terminate()
+
     def transcribe_and_process(self, audio):
         """Транскрибирует аудио и отправляет в Rust сервис"""
         try:
             print("🔄 Транскрибирую речь...")
             
-            text = self.recognizer.recognize_google(audio, language="ru-RU")
-            text = text.strip()
+            text = self.transcriber.transcribe(audio)
             
             if not text:
                 print("⚠️ Пустой текст")
@@ -111,45 +146,21 @@ class VoiceTranscriber:
     def send_to_rust_streaming(self, question):
         """Отправляет вопрос в Rust сервис и получает streaming ответ"""
         try:
-            payload = {"question": question}
-            
-            response = requests.post(
-                f"{self.rust_api_url}/stream",
-                json=payload,
-                headers={"Accept": "text/event-stream"},
-                stream=True,
-                timeout=60
-            )
-            
-            if response.status_code != 200:
-                print(f"❌ Ошибка Rust API: {response.status_code}")
-                return
-            
-            client = sseclient.SSEClient(response)
             full_response = []
             
-            for event in client.events():
-                if event.data:
-                    try:
-                        data = json.loads(event.data)
-                        
-                        if data['type'] == 'word':
-                            print(data['content'], end=' ', flush=True)
-                            full_response.append(data['content'])
-                            
-                        elif data['type'] == 'done':
-                            print("\n" + "="*80)
-                            print(f"📅 {datetime.now().strftime('%H:%M:%S')} - Ответ получен!")
-                            print(f"💡 Полный ответ: {' '.join(full_response)}")
-                            print("="*80)
-                            break
-                            
-                        elif data['type'] == 'error':
-                            print(f"\n❌ Ошибка: {data['content']}")
-                            break
-                            
-                    except json.JSONDecodeError:
-                        continue
+            for event_type, content in self.answer_client.stream(question):
+                if event_type == 'word':
+                    print(content, end=' ', flush=True)
+                    full_response.append(content)
+                    
+                elif event_type == 'done':
+                    print("\n" + "="*80)
+                    print(f"📅 {datetime.now().strftime('%H:%M:%S')} - Ответ получен!")
+                    print(f"💡 Полный ответ: {' '.join(full_response)}")
+                    print("="*80)
+                    
+                elif event_type == 'error':
+                    print(f"\n❌ Ошибка: {content}")
                         
         except Exception as e:
             print(f"❌ Ошибка при работе с Rust API: {e}")
@@ -157,25 +168,14 @@ class VoiceTranscriber:
     def send_to_rust_simple(self, question):
         """Простой non-streaming запрос (для тестирования)"""
         try:
-            payload = {"question": question}
-            
-            response = requests.post(
-                f"{self.rust_api_url}/ask",
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                print("="*80)
-                print(f"📅 {datetime.now().strftime('%H:%M:%S')}")
-                print(f"❓ ВОПРОС: {question}")
-                print("-"*80)
-                print(f"💡 ОТВЕТ (RUST+OLLAMA):")
-                print(data['content'])
-                print("="*80)
-            else:
-                print(f"❌ Ошибка API: {response.status_code}")
+            content = self.answer_client.ask(question)
+            print("="*80)
+            print(f"📅 {datetime.now().strftime('%H:%M:%S')}")
+            print(f"❓ ВОПРОС: {question}")
+            print("-"*80)
+            print(f"💡 ОТВЕТ (RUST+OLLAMA):")
+            print(content)
+            print("="*80)
                 
         except Exception as e:
             print(f"❌ Ошибка при работе с Rust API: {e}")
@@ -187,7 +187,8 @@ class VoiceTranscriber:
         print("="*70)
         print("1. 🌊 Записать вопрос (STREAMING - быстро)")
         print("2. 📝 Записать вопрос (обычный режим)")
-        print("3. 🚪 Выход")
+        print("3. 🎙️ Автоматический режим (без Enter)")
+        print("4. 🚪 Выход")
         print("="*70)
 
     def run(self):
@@ -204,7 +205,7 @@ class VoiceTranscriber:
                 self.show_menu()
                 
                 try:
-                    choice = input("\n👉 Ваш выбор (1-3): ").strip()
+                    choice = input("\n👉 Ваш выбор (1-4): ").strip()
                     
                     if choice == '1':
                         print("🌊 Режим: Streaming (слово за словом)")
@@ -213,10 +214,12 @@ class VoiceTranscriber:
                         print("📝 Режим: Обычный (полный ответ)")
                         self.record_audio_simple()
                     elif choice == '3':
+                        self.listen_auto()
+                    elif choice == '4':
                         print("👋 До свидания!")
                         break
                     else:
-                        print("⚠️ Неверный выбор. Введите 1, 2 или 3")
+                        print("⚠️ Неверный выбор. Введите 1, 2, 3 или 4")
                         
                 except KeyboardInterrupt:
                     print("\n👋 Завершение по Ctrl+C...")
@@ -237,8 +240,8 @@ class VoiceTranscriber:
             def record():
                 nonlocal audio
                 try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(source, phrase_time_limit=30)
+                    # Фоновая калибровка ещё может менять energy_threshold - ждём её
+                    audio = self.calibration.listen(self.microphone, self.recognizer, phrase_time_limit=30)
                     recording_complete.set()
                 except Exception as e:
                     print(f"❌ Ошибка записи: {e}")
@@ -254,8 +257,7 @@ class VoiceTranscriber:
             
             if audio:
                 print("🔄 Транскрибирую речь...")
-                text = self.recognizer.recognize_google(audio, language="ru-RU")
-                text = text.strip()
+                text = self.transcriber.transcribe(audio)
                 
                 if text:
                     print(f"🎯 Транскрипция: {text}")
@@ -284,12 +286,6 @@ if __name__ == "__main__":
         print("❌ Установите SpeechRecognition: pip install SpeechRecognition")
         sys.exit(1)
     
-    try:
-        import sseclient
-    except ImportError:
-        print("❌ Установите sseclient: pip install sseclient-py")
-        sys.exit(1)
-    
     try:
         import requests
     except ImportError: